@@ -0,0 +1,162 @@
+"""
+Response compression for the JSON API.
+
+WhiteNoise only compresses static files. ApiCompressionMiddleware
+compresses API responses (API_COMPRESSION_PATH_PREFIXES) with brotli or
+gzip, whichever Accept-Encoding prefers, and leaves bodies shorter than
+API_COMPRESSION_MIN_LENGTH alone: the framing would eat the savings.
+
+BREACH: a compressed response that reflects request input next to a secret
+leaks the secret through its length. gzip output gets GZipMiddleware's
+random padding, but brotli has no equivalent. So endpoints that return
+credentials or tokens (API_COMPRESSION_EXCLUDED_PATH_PREFIXES: login,
+JWT, password reset, payments) are never compressed, with either coding.
+
+Responses served from the versioned catalog cache (products/cache.py) carry
+their cache key in `response.compression_cache_key`. Their compressed bytes
+are cached next to the data, so a cache hit is compressed once per catalog
+version and encoding, not once per request.
+"""
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+
+# Dynamic responses favour speed; level 4 still beats gzip -6 on JSON
+BROTLI_QUALITY = 4
+
+# Same BREACH mitigation as django.middleware.gzip.GZipMiddleware
+GZIP_MAX_RANDOM_BYTES = 100
+
+COMPRESSIBLE_CONTENT_TYPES = ('application/json', 'text/')
+
+# Responses carrying credentials or tokens (see BREACH above)
+DEFAULT_EXCLUDED_PATH_PREFIXES = ('/api/accounts/', '/api/token/', '/api/payments/')
+
+_CODING_RE = re.compile(r'^\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$')
+
+
+def get_min_length():
+    return getattr(settings, 'API_COMPRESSION_MIN_LENGTH', 1024)
+
+
+def get_path_prefixes():
+    return tuple(getattr(settings, 'API_COMPRESSION_PATH_PREFIXES', ('/api/',)))
+
+
+def get_excluded_path_prefixes():
+    return tuple(getattr(settings, 'API_COMPRESSION_EXCLUDED_PATH_PREFIXES', DEFAULT_EXCLUDED_PATH_PREFIXES))
+
+
+def parse_accept_encoding(header):
+    """{coding: q} from an Accept-Encoding header; malformed entries are ignored."""
+    codings = {}
+    for item in (header or '').split(','):
+        match = _CODING_RE.match(item)
+        if not match:
+            continue
+        try:
+            quality = float(match.group(2)) if match.group(2) is not None else 1.0
+        except ValueError:
+            continue
+        codings[match.group(1).lower()] = quality
+    return codings
+
+
+def negotiate_encoding(header):
+    """'br', 'gzip' or None (identity) for this Accept-Encoding header."""
+    codings = parse_accept_encoding(header)
+    wildcard = codings.get('*', 0)
+    available = ['br', 'gzip'] if brotli is not None else ['gzip']
+
+    best, best_quality = None, 0
+    for coding in available:
+        # On a tie the earlier (better compressing) coding wins
+        quality = codings.get(coding, wildcard)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=BROTLI_QUALITY)
+    return compress_string(content, max_random_bytes=GZIP_MAX_RANDOM_BYTES)
+
+
+def _compressible(request, response):
+    if response.streaming or response.has_header('Content-Encoding'):
+        return False
+    if response.status_code in (204, 206, 304):
+        return False
+    if not request.path_info.startswith(get_path_prefixes()):
+        return False
+    if request.path_info.startswith(get_excluded_path_prefixes()):
+        return False
+    if 'no-transform' in response.get('Cache-Control', ''):
+        return False
+    content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+    return content_type.startswith(COMPRESSIBLE_CONTENT_TYPES)
+
+
+class ApiCompressionMiddleware:
+    """
+    Brotli/gzip for API responses, negotiated per request (Vary:
+    Accept-Encoding). A compressed body is only sent if it is smaller, and
+    a strong ETag is weakened as RFC 9110 requires for a re-encoded body.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not _compressible(request, response) or len(response.content) < get_min_length():
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING'))
+        if encoding is None:
+            return response
+
+        content = response.content
+        compressed = self.get_compressed(response, content, encoding)
+        if len(compressed) >= len(content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
+
+    def get_compressed(self, response, content, encoding):
+        """Compressed `content`, reusing the bytes cached for catalog responses."""
+        base_key = getattr(response, 'compression_cache_key', None)
+        if base_key is None or response.status_code != 200:
+            return compress(content, encoding)
+
+        # The key already covers the catalog version, host, path and query;
+        # the content type tells the JSON and browsable API renderings apart
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type != 'application/json':
+            return compress(content, encoding)
+
+        key = f'{base_key}:{encoding}'
+        cached = cache.get(key)
+        # The original length guards against a rendering that changed since
+        if cached is not None and cached[0] == len(content):
+            return cached[1]
+        compressed = compress(content, encoding)
+        cache.set(key, (len(content), compressed), getattr(settings, 'CATALOG_CACHE_TIMEOUT', 3600))
+        return compressed
@@ -0,0 +1,92 @@
+"""
+Conditional GET support (ETag / Last-Modified) for read endpoints.
+
+Views derive their validators from cheap queries on `updated_at` columns
+and version counters — never from the serialized payload — so a matching
+If-None-Match / If-Modified-Since is answered with 304 before any
+serialization happens.
+
+Generic views use ConditionalGetMixin and implement get_validators();
+APIViews with their own get() call conditional_response() directly.
+"""
+import hashlib
+
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def make_etag(*parts):
+    """Strong ETag from the given validator parts (ids, timestamps, versions)."""
+    raw = '|'.join('' if part is None else str(part) for part in parts)
+    return '"{}"'.format(hashlib.md5(raw.encode('utf-8')).hexdigest())
+
+
+def etag_matches(request, etag):
+    """Weak comparison against If-None-Match, as RFC 9110 requires for GET."""
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header or not etag:
+        return False
+    client_etags = [e[2:] if e.startswith('W/') else e for e in parse_etags(header)]
+    return '*' in client_etags or etag in client_etags
+
+
+def not_modified_since(request, last_modified):
+    header = request.META.get('HTTP_IF_MODIFIED_SINCE')
+    if not header or last_modified is None:
+        return False
+    since = parse_http_date_safe(header)
+    return since is not None and int(last_modified.timestamp()) <= since
+
+
+def is_not_modified(request, etag=None, last_modified=None):
+    """If-None-Match takes precedence; If-Modified-Since is only used without it."""
+    if request.META.get('HTTP_IF_NONE_MATCH'):
+        return etag_matches(request, etag)
+    return not_modified_since(request, last_modified)
+
+
+def set_validators(response, etag=None, last_modified=None):
+    if etag:
+        response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Let clients keep the body but always revalidate
+    response.setdefault('Cache-Control', 'no-cache')
+    return response
+
+
+def conditional_response(request, etag, last_modified, build_response):
+    """
+    Return 304 if the client's copy is current, otherwise build the response
+    with `build_response()` and attach the validators to it.
+    """
+    if etag is None and last_modified is None:
+        return build_response()
+
+    if is_not_modified(request, etag, last_modified):
+        return set_validators(Response(status=status.HTTP_304_NOT_MODIFIED), etag, last_modified)
+
+    response = build_response()
+    if response.status_code == status.HTTP_200_OK:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Conditional GET for generic views. Subclasses implement
+    get_validators() returning (etag, last_modified); either may be None,
+    and (None, None) skips conditional handling (e.g. object not found).
+    """
+
+    def get_validators(self, request, *args, **kwargs):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request, *args, **kwargs)
+        parent_get = super().get
+        return conditional_response(
+            request, etag, last_modified,
+            lambda: parent_get(request, *args, **kwargs)
+        )
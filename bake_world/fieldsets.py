@@ -0,0 +1,177 @@
+"""
+Sparse fieldsets for read endpoints: ?fields=id,name,price or ?omit=description.
+
+Excluded fields are removed from the serializer before it is bound, so they
+are never computed (no image URL building, no method-field queries), and the
+view narrows its queryset with .only() to the columns the remaining fields
+read.
+
+Serializers opt in with SparseFieldsetMixin. Fields whose source is a
+concrete model column are resolved automatically; anything else (dotted
+sources, properties, method fields) is declared in `Meta.sparse_sources` as
+the model paths it reads. A selected field that is neither leaves the
+queryset un-narrowed rather than risk a deferred load per row.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+FIELDS_QUERY_PARAM = 'fields'
+OMIT_QUERY_PARAM = 'omit'
+
+
+def parse_field_list(value):
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+class SparseFieldset:
+    """The ?fields= / ?omit= selection of one request."""
+
+    def __init__(self, fields=None, omit=None, serializer_class=None):
+        self.fields = fields or []
+        self.omit = omit or []
+        self.serializer_class = serializer_class
+
+    @classmethod
+    def from_request(cls, request, serializer_class=None):
+        params = request.query_params
+        return cls(
+            fields=parse_field_list(params.get(FIELDS_QUERY_PARAM)),
+            omit=parse_field_list(params.get(OMIT_QUERY_PARAM)),
+            serializer_class=serializer_class,
+        )
+
+    def __bool__(self):
+        return bool(self.fields or self.omit)
+
+    def select(self, available):
+        """Names kept out of `available`; unknown names are a client error."""
+        unknown = [name for name in self.fields + self.omit if name not in available]
+        if unknown:
+            param = FIELDS_QUERY_PARAM if set(unknown) & set(self.fields) else OMIT_QUERY_PARAM
+            raise serializers.ValidationError({
+                param: f"Unknown field(s): {', '.join(unknown)}. "
+                       f"Available fields: {', '.join(available)}."
+            })
+        selected = [name for name in available if not self.fields or name in self.fields]
+        return [name for name in selected if name not in self.omit]
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin applying the request's sparse fieldset. Only the
+    serializer the view was configured with honours it; nested serializers
+    (declared or built in method fields) always return their full shape.
+    """
+
+    def _get_sparse_fieldset(self):
+        fieldset = self.context.get('sparse_fieldset')
+        if not fieldset or fieldset.serializer_class is not type(self):
+            return None
+        parent = self.parent
+        if parent is not None and not (isinstance(parent, serializers.ListSerializer) and parent.parent is None):
+            return None
+        return fieldset
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fieldset = self._get_sparse_fieldset()
+        if fieldset:
+            selected = set(fieldset.select(list(fields)))
+            fields = {name: field for name, field in fields.items() if name in selected}
+        return fields
+
+    def get_model_paths(self):
+        """
+        Model paths (for .only()) read by the selected fields, or None when
+        the queryset can't be narrowed safely.
+        """
+        if not self._get_sparse_fieldset():
+            return None
+
+        model = self.Meta.model
+        declared = getattr(self.Meta, 'sparse_sources', {})
+        paths = set()
+        for name, field in self.fields.items():
+            if name in declared:
+                paths.update(declared[name])
+                continue
+            try:
+                model_field = model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                return None
+            if not model_field.concrete:
+                return None
+            paths.add(field.source)
+        return paths
+
+
+def _select_related_paths(select_related, prefix=''):
+    for name, nested in select_related.items():
+        yield prefix + name
+        yield from _select_related_paths(nested, prefix + name + '__')
+
+
+def narrow_queryset(queryset, paths):
+    """
+    Apply .only() for `paths`, keeping the columns the queryset itself
+    needs (primary key, ordering keys). select_related joins no selected
+    field reads are dropped.
+    """
+    select_related = queryset.query.select_related
+    if select_related is True:
+        return queryset
+
+    paths = set(paths)
+    paths.add(queryset.model._meta.pk.name)
+    for key in queryset.query.order_by:
+        if isinstance(key, str):
+            key = key.lstrip('-')
+            if '__' not in key and key != '?' and key not in queryset.query.annotations:
+                paths.add(key)
+
+    if select_related:
+        # A join is needed if a path goes through it or reads it as a whole
+        needed = [
+            relation for relation in _select_related_paths(select_related)
+            if any(path == relation or path.startswith(relation + '__') for path in paths)
+        ]
+        queryset = queryset.select_related(None)
+        if needed:
+            queryset = queryset.select_related(*needed)
+            paths.update(needed)
+    return queryset.only(*paths)
+
+
+class SparseFieldsetViewMixin:
+    """
+    View mixin: passes the request's sparse fieldset to the serializer and
+    narrows the queryset of GET requests to the columns it needs. Narrowing
+    happens in filter_queryset() so views keep their own get_queryset().
+    """
+
+    def get_sparse_fieldset(self):
+        if not hasattr(self, '_sparse_fieldset'):
+            self._sparse_fieldset = SparseFieldset.from_request(
+                self.request, serializer_class=self.get_serializer_class()
+            )
+        return self._sparse_fieldset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        request = getattr(self, 'request', None)
+        if request is not None and request.method == 'GET':
+            context['sparse_fieldset'] = self.get_sparse_fieldset()
+        return context
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        request = getattr(self, 'request', None)
+        if request is None or request.method != 'GET' or not self.get_sparse_fieldset():
+            return queryset
+
+        serializer = self.get_serializer_class()(context=self.get_serializer_context())
+        paths = serializer.get_model_paths()
+        if paths:
+            queryset = narrow_queryset(queryset, paths)
+        return queryset
@@ -0,0 +1,100 @@
+"""
+orjson-backed JSON renderer and parser for DRF, with the stdlib as fallback.
+
+FastJSONRenderer matches DRF's JSONRenderer output byte for byte (compact
+separators, unescaped unicode, U+2028/U+2029 escaped). orjson encodes dicts,
+lists, strings, numbers and UUIDs itself. Everything it would encode
+differently (Decimal, datetime/date/time, timedelta, lazy strings,
+querysets, ...) goes through DRF's own JSONEncoder.default().
+
+One known difference remains: floats that need an exponent are written as
+1e16 / 1e-7 rather than 1e+16 / 1e-07; money amounts never get there.
+
+orjson writes NaN and Infinity as null. Output that contains null is
+checked for non-finite numbers, and if there are any it is rendered by
+JSONRenderer instead, which raises ValueError as before.
+
+Without orjson, or when indented output is requested (browsable API,
+`; indent=` media type parameter), both classes behave exactly like their
+DRF parents. `manage.py benchmark_json_renderers` compares the two on real
+cart and order payloads.
+"""
+import math
+from decimal import Decimal
+
+from rest_framework import renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json
+    orjson = None
+
+
+if orjson is not None:
+    # Datetimes go through DRF's encoder (millisecond precision, 'Z' suffix)
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+else:
+    ORJSON_OPTIONS = 0
+
+_encoder = JSONEncoder()
+
+
+def has_non_finite_number(data):
+    """True if `data` holds a NaN or infinite float or Decimal anywhere."""
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, Decimal):
+            if not value.is_finite():
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return False
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type or '', renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=_encoder.default, option=ORJSON_OPTIONS)
+        except TypeError:
+            # Integers beyond 64 bits and other values orjson rejects
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if b'null' in ret and has_non_finite_number(data):
+            # orjson wrote them as null; JSONRenderer rejects them
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Valid JSON but not valid JavaScript; JSONRenderer escapes them too
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', 'utf-8')
+        if orjson is None or encoding.lower().replace('_', '-') != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            # Rejects NaN and Infinity like the strict JSONParser
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
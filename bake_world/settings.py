@@ -139,7 +139,10 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    # Brotli/gzip for API JSON (see bake_world/compression.py)
+    "bake_world.compression.ApiCompressionMiddleware",
+    # WhiteNoise, plus the catalog snapshot files (rebuilt without restarts)
+    "products.middleware.SnapshotWhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -189,6 +192,43 @@ else:
         }
     }
 
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+# LocMem by default, one per worker process; CACHE_BACKEND/CACHE_LOCATION
+# can point at a shared backend (e.g. Redis) so workers share entries. Cache
+# versions (catalog, pricing) live in the database either way, see
+# bake_world/versions.py.
+CACHES = {
+    "default": {
+        "BACKEND": config("CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": config("CACHE_LOCATION", default="bake-world"),
+        "TIMEOUT": config("CACHE_TIMEOUT", default=300, cast=int),
+    }
+}
+
+CATALOG_CACHE_TIMEOUT = config("CATALOG_CACHE_TIMEOUT", default=3600, cast=int)
+
+# Seconds a worker trusts its copy of a cache version before re-reading it
+CACHE_VERSION_TTL = config("CACHE_VERSION_TTL", default=2, cast=float)
+
+# Seconds after which a worker reloads its pricing table even without a
+# version bump (see cart/pricing.py)
+PRICING_TABLE_MAX_AGE = config("PRICING_TABLE_MAX_AGE", default=300, cast=int)
+
+# Static catalog snapshot, written under STATIC_ROOT (see products/snapshot.py)
+CATALOG_SNAPSHOT_DIR = "catalog"
+
+# Delta sync tombstones for deleted products/categories (see products/sync.py)
+CATALOG_TOMBSTONE_RETENTION_DAYS = config("CATALOG_TOMBSTONE_RETENTION_DAYS", default=30, cast=int)
+
+# API response compression: bodies under this many bytes are sent as is
+API_COMPRESSION_MIN_LENGTH = config("API_COMPRESSION_MIN_LENGTH", default=1024, cast=int)
+
+# Never compressed: responses with credentials or tokens (BREACH, see
+# bake_world/compression.py)
+API_COMPRESSION_EXCLUDED_PATH_PREFIXES = ('/api/accounts/', '/api/token/', '/api/payments/')
+
 # ---------------------------------------------------------------------------
 # Password validation
 # ---------------------------------------------------------------------------
@@ -222,6 +262,16 @@ REST_FRAMEWORK = {
         "rest_framework_simplejwt.authentication.JWTAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ],
+    # orjson-backed, same output as DRF's JSON classes (see bake_world/renderers.py)
+    "DEFAULT_RENDERER_CLASSES": [
+        "bake_world.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "bake_world.renderers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
 }
 
 # ---------------------------------------------------------------------------
@@ -311,6 +361,17 @@ CLOUDINARY_SETTINGS = {
     ],
 }
 
+# 'cloudinary', or 'local' to keep product/category images and their
+# variants under MEDIA_ROOT (see products/local_images.py). Defaults to
+# local when no Cloudinary account is configured.
+IMAGE_BACKEND = config(
+    "IMAGE_BACKEND",
+    default="cloudinary" if config("CLOUDINARY_CLOUD_NAME", default="") else "local",
+)
+# Local image variants rendered at once: threads per upload, processes in
+# `manage.py backfill_image_variants` (1 renders serially)
+IMAGE_VARIANT_WORKERS = config("IMAGE_VARIANT_WORKERS", default=min(os.cpu_count() or 1, 4), cast=int)
+
 # ---------------------------------------------------------------------------
 # Email
 # ---------------------------------------------------------------------------
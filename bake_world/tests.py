@@ -0,0 +1,41 @@
+from decimal import Decimal
+
+from django.http import JsonResponse
+from django.test import RequestFactory, SimpleTestCase
+from rest_framework.renderers import JSONRenderer
+
+from bake_world.compression import ApiCompressionMiddleware
+from bake_world.renderers import FastJSONRenderer
+
+
+class ApiCompressionMiddlewareTests(SimpleTestCase):
+
+    def get(self, path, encoding='br, gzip'):
+        request = RequestFactory().get(path, HTTP_ACCEPT_ENCODING=encoding)
+        body = {'items': [{'id': i, 'name': f'Product {i}'} for i in range(200)]}
+        middleware = ApiCompressionMiddleware(lambda request: JsonResponse(body))
+        return middleware(request)
+
+    def test_api_responses_are_compressed(self):
+        response = self.get('/api/products/', encoding='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_credential_endpoints_are_not_compressed(self):
+        for path in ('/api/accounts/login/', '/api/token/refresh/', '/api/payments/initialize/'):
+            for encoding in ('br', 'gzip'):
+                with self.subTest(path=path, encoding=encoding):
+                    self.assertFalse(self.get(path, encoding=encoding).has_header('Content-Encoding'))
+
+
+class FastJSONRendererTests(SimpleTestCase):
+
+    def test_matches_json_renderer(self):
+        data = {'name': 'Cr\u00e8me \u2028', 'price': Decimal('350.00'), 'layers': None, 'ratio': 1.5}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_non_finite_numbers_raise_like_json_renderer(self):
+        for value in (float('nan'), float('inf'), -float('inf'), Decimal('NaN')):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    FastJSONRenderer().render({'items': [{'score': value}]})
@@ -0,0 +1,108 @@
+"""
+Version counters shared by every worker process.
+
+Cache keys and in-process snapshots (catalog responses, the pricing table)
+are tied to version counters. The default cache is a per-process LocMem
+cache, so the counters live in single-row database tables instead: a bump
+made by one worker is seen by all of them.
+
+Each process keeps the value it last read and re-reads it at most every
+CACHE_VERSION_TTL seconds (one primary-key query), so another worker's
+bump is picked up within that window. The process that bumps drops its
+copy when the transaction commits and sees the new value right away.
+"""
+import threading
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+
+COUNTER_PK = 1
+
+
+def get_version_ttl():
+    return getattr(settings, 'CACHE_VERSION_TTL', 2)
+
+
+def on_commit_once(func, using=None):
+    """
+    transaction.on_commit(func), unless `func` is already waiting for the
+    current transaction to commit: N saves in one transaction run it once.
+    Outside a transaction `func` runs immediately, as with on_commit.
+    """
+    connection = transaction.get_connection(using)
+    if connection.in_atomic_block:
+        # A pending callback is only dropped by rolling back a savepoint
+        # that is still open (rolled-back ones took their callbacks with
+        # them, released ones can't be rolled back alone), and that would
+        # drop this registration too
+        if any(pending[1] is func for pending in connection.run_on_commit):
+            return
+    transaction.on_commit(func, using=using)
+
+
+class VersionCounter:
+    """
+    Process-local view of a counter row (a model with `version` and
+    `modified_at` fields, see cart.PricingVersion and products.CatalogVersion).
+    """
+
+    def __init__(self, model_label):
+        self.model_label = model_label
+        self._lock = threading.Lock()
+        self._row = None
+        self._read_at = 0.0
+
+    def get_model(self):
+        return apps.get_model(self.model_label)
+
+    def _read(self):
+        model = self.get_model()
+        row = model.objects.filter(pk=COUNTER_PK).values_list('version', 'modified_at').first()
+        if row is None:
+            # Seeded from the clock, so a recreated table never reuses a
+            # version that a shared cache may still hold entries for
+            counter, _ = model.objects.get_or_create(
+                pk=COUNTER_PK, defaults={'version': int(time.time())}
+            )
+            row = (counter.version, counter.modified_at)
+        return row
+
+    def get_row(self):
+        """(version, modified_at), re-read once the TTL has passed."""
+        now = time.monotonic()
+        row = self._row
+        if row is not None and now - self._read_at < get_version_ttl():
+            return row
+        with self._lock:
+            if self._row is None or time.monotonic() - self._read_at >= get_version_ttl():
+                self._row = self._read()
+                self._read_at = time.monotonic()
+            return self._row
+
+    def get(self):
+        return self.get_row()[0]
+
+    def get_modified(self):
+        return self.get_row()[1]
+
+    def expire(self):
+        """Forget this process's copy; the next get() reads the row."""
+        self._row = None
+
+    def bump(self):
+        """Increment the counter; returns the new version."""
+        model = self.get_model()
+        with transaction.atomic():
+            updated = model.objects.filter(pk=COUNTER_PK).update(
+                version=F('version') + 1, modified_at=timezone.now()
+            )
+            if not updated:
+                self._read()
+        transaction.on_commit(self.expire)
+        self.expire()
+        return self.get()
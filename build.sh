@@ -32,6 +32,13 @@ python manage.py migrate
 # Collect static files (only need to do this once)
 python manage.py collectstatic --no-input
 
+# Rebuild product list cards (needed after ProductListSerializer changes)
+python manage.py rebuild_product_cards
+
+# Pre-render the static catalog snapshot (clients delta-sync from it;
+# `build_catalog_snapshot --if-stale` from cron refreshes it in between)
+python manage.py build_catalog_snapshot
+
 # Create superuser if CREATE_SUPERUSER is set
 if [[ $CREATE_SUPERUSER ]]; then
   # Use Django shell to create superuser only if it doesn't exist
@@ -1,10 +1,13 @@
 # cart/admin.py
 from django.contrib import admin
 from django import forms
+from django.core.exceptions import ValidationError
+from django.forms.models import BaseInlineFormSet
 from .models import (
     CakeCustomizationOption, CakeSizeMultiplier, 
     CakeFlavorPrice, Cart, CartItem, DeliveryInfo,CartItemAddon
 )
+from .fingerprints import normalize_addons
 from decimal import Decimal
 
 
@@ -70,7 +73,8 @@ class CartAdmin(admin.ModelAdmin):
                    'subtotal', 'delivery_cost', 'grand_total', 'created_at']
     list_filter = ['is_active', 'created_at']
     search_fields = ['user__username', 'user__email', 'session_key']
-    readonly_fields = ['created_at', 'updated_at', 'subtotal', 'delivery_cost', 'grand_total']
+    readonly_fields = ['created_at', 'updated_at', 'item_count', 'subtotal', 'delivery_cost',
+                       'grand_total', 'pricing_version']
     inlines = [CartItemInline]
     
     fieldsets = [
@@ -81,7 +85,7 @@ class CartAdmin(admin.ModelAdmin):
             'fields': ['is_active']
         }),
         ('Totals', {
-            'fields': ['subtotal', 'delivery_cost', 'grand_total']
+            'fields': ['item_count', 'subtotal', 'delivery_cost', 'grand_total', 'pricing_version']
         }),
         ('Timestamps', {
             'fields': ['created_at', 'updated_at'],
@@ -101,10 +105,52 @@ class CartAdmin(admin.ModelAdmin):
         return obj.grand_total
     grand_total.short_description = 'Grand Total'
 
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        form.instance.refresh_totals()
+
+
+
+class CartItemAddonInlineFormSet(BaseInlineFormSet):
+    """
+    Checks the edited line, with the addons as submitted, against the other
+    lines of its cart: saving a line identical to another one would break
+    the (cart, customization_fingerprint) constraint.
+    """
+
+    def clean(self):
+        super().clean()
+        item = self.instance
+        if any(self.errors) or not item.cart_id or not item.product_id:
+            return
+
+        addons = []
+        for form in self.forms:
+            if not form.cleaned_data or self._should_delete_form(form):
+                continue
+            addons.append((form.cleaned_data['addon'].pk, form.cleaned_data['quantity']))
+        addons = normalize_addons(addons)
+
+        duplicate = (
+            CartItem.objects.filter(
+                cart_id=item.cart_id,
+                customization_fingerprint=item.build_customization_fingerprint(addons),
+            )
+            .exclude(pk=item.pk)
+            .first()
+        )
+        if duplicate is not None:
+            raise ValidationError(
+                f'Cart item #{duplicate.pk} already has this product with the same customizations. '
+                'Change its quantity instead.'
+            )
+        # save_model() prices and fingerprints the line with these addons
+        item.set_pending_addons(addons)
 
 
 class CartItemAddonInline(admin.TabularInline):
     model = CartItemAddon
+    formset = CartItemAddonInlineFormSet
     extra = 0
     fields = ['addon', 'quantity', 'total_cost']
     readonly_fields = ['total_cost']
@@ -162,6 +208,23 @@ class CartItemAdmin(admin.ModelAdmin):
         return obj.flavor_multiplier_value
     flavor_multiplier_value.short_description = 'Flavor Multiplier'
 
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # The line was saved with the inline addons (see CartItemAddonInlineFormSet)
+        form.instance.set_pending_addons(None)
+        form.instance.cart.refresh_totals()
+
+    def delete_model(self, request, obj):
+        cart = obj.cart
+        super().delete_model(request, obj)
+        cart.refresh_totals()
+
+    def delete_queryset(self, request, queryset):
+        carts = {item.cart for item in queryset.select_related('cart')}
+        super().delete_queryset(request, queryset)
+        for cart in carts:
+            cart.refresh_totals()
+
 @admin.register(CartItemAddon)
 class CartItemAddonAdmin(admin.ModelAdmin):
     list_display = ['id', 'cart_item', 'addon', 'quantity', 'total_cost', 'added_at']
@@ -173,6 +236,25 @@ class CartItemAddonAdmin(admin.ModelAdmin):
         return f"₦{obj.total_cost:,.2f}"
     total_cost.short_description = 'Total Cost'
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        self.refresh_cart_item(obj.cart_item)
+
+    def delete_model(self, request, obj):
+        cart_item = obj.cart_item
+        super().delete_model(request, obj)
+        self.refresh_cart_item(cart_item)
+
+    def delete_queryset(self, request, queryset):
+        cart_items = {addon.cart_item for addon in queryset.select_related('cart_item')}
+        super().delete_queryset(request, queryset)
+        for cart_item in cart_items:
+            self.refresh_cart_item(cart_item)
+
+    def refresh_cart_item(self, cart_item):
+        cart_item.save()   # addons are part of the customization fingerprint
+        cart_item.cart.refresh_totals()
+
 
 @admin.register(DeliveryInfo)
 class DeliveryInfoAdmin(admin.ModelAdmin):
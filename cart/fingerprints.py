@@ -0,0 +1,72 @@
+"""
+Customization fingerprints for cart lines.
+
+Two cart lines are the same line when they share the product and every
+customization: flavours, size, colours, legacy addon counts, dynamic addons
+and notes. CartItem.customization_fingerprint stores a hash of all of that,
+unique per cart, so finding the line to add to is one indexed lookup on
+(cart, customization_fingerprint) instead of a filter on 13 columns,
+including the unindexed additional_notes.
+"""
+import hashlib
+import json
+
+
+# Customization columns of CartItem, with the value an omitted field takes
+FINGERPRINT_FIELDS = {
+    'flavour_1': '',
+    'flavour_2': '',
+    'size': '',
+    'colours': '',
+    'cake_topper': 0,
+    'candle': 0,
+    'birthday_card': 0,
+    'chocolate': 0,
+    'wine': 0,
+    'whiskey_200ml': 0,
+    'additional_notes': '',
+}
+
+FINGERPRINT_LENGTH = 64
+
+
+def normalize_addons(addons):
+    """
+    {addon_id: quantity} from a mapping or from (addon_id, quantity) pairs.
+    An addon listed twice counts once, with the quantities summed.
+    """
+    if isinstance(addons, dict):
+        addons = addons.items()
+    quantities = {}
+    for addon_id, quantity in addons:
+        quantities[int(addon_id)] = quantities.get(int(addon_id), 0) + int(quantity)
+    return quantities
+
+
+def compute_fingerprint(product_id, values, addons=()):
+    """
+    sha256 hex digest of a cart line's customization.
+
+    `values` maps FINGERPRINT_FIELDS to their values (a dict of validated
+    request data, or a CartItem's fields); missing keys take the field
+    default. `addons` is a {addon_id: quantity} mapping or pairs.
+    """
+    customization = []
+    for field, default in FINGERPRINT_FIELDS.items():
+        value = values.get(field, default)
+        if value is None:
+            value = default
+        customization.append(int(value) if isinstance(default, int) else str(value))
+
+    payload = [
+        int(product_id),
+        customization,
+        sorted(normalize_addons(addons).items()),
+    ]
+    encoded = json.dumps(payload, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def item_values(item):
+    """FINGERPRINT_FIELDS values of a CartItem (or a historical model instance)."""
+    return {field: getattr(item, field) for field in FINGERPRINT_FIELDS}
@@ -0,0 +1,93 @@
+import io
+import timeit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from bake_world.renderers import FastJSONParser, FastJSONRenderer, orjson
+from cart.models import Cart
+from cart.serializers import CartSerializer
+from cart.utils import prefetch_cart_items
+from orders.models import Order
+from orders.serializers import OrderDetailSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare DRF's JSON renderer/parser with FastJSONRenderer/FastJSONParser "
+        "on real CartSerializer and OrderDetailSerializer payloads"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cart', type=int, help='Cart id (default: the cart with the most items)')
+        parser.add_argument('--order', type=int, help='Order id (default: the order with the most items)')
+        parser.add_argument(
+            '--items', type=int, default=0,
+            help='Repeat the payload items up to this many, to size a large cart/order'
+        )
+        parser.add_argument('--iterations', type=int, default=2000, help='Runs per measurement (default: 2000)')
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed: the fast classes use the stdlib.'))
+
+        payloads = []
+        cart = self._get_object(Cart, options['cart'])
+        if cart is not None:
+            payloads.append(('CartSerializer', CartSerializer(prefetch_cart_items(cart)).data))
+        order = self._get_object(Order, options['order'])
+        if order is not None:
+            payloads.append(('OrderDetailSerializer', OrderDetailSerializer(order).data))
+        if not payloads:
+            raise CommandError('No cart or order to benchmark; create one first.')
+
+        for name, data in payloads:
+            if options['items']:
+                data = self._resize(data, options['items'])
+            self._benchmark(name, data, options['iterations'])
+
+    def _get_object(self, model, pk):
+        if pk is not None:
+            obj = model.objects.filter(pk=pk).first()
+            if obj is None:
+                raise CommandError(f'{model.__name__} {pk} does not exist.')
+            return obj
+        return model.objects.annotate(item_total=Count('items')).order_by('-item_total', '-pk').first()
+
+    def _resize(self, data, count):
+        data = dict(data)
+        items = list(data.get('items') or [])
+        if items:
+            data['items'] = [items[i % len(items)] for i in range(count)]
+        return data
+
+    def _benchmark(self, name, data, iterations):
+        stdlib_body = JSONRenderer().render(data)
+        fast_body = FastJSONRenderer().render(data)
+        identical = stdlib_body == fast_body
+
+        results = [
+            ('render', lambda: JSONRenderer().render(data), lambda: FastJSONRenderer().render(data)),
+            (
+                'parse',
+                lambda: JSONParser().parse(io.BytesIO(stdlib_body)),
+                lambda: FastJSONParser().parse(io.BytesIO(stdlib_body)),
+            ),
+        ]
+
+        item_count = len(data.get('items') or [])
+        self.stdout.write(f'\n{name}: {len(stdlib_body)} bytes, {item_count} items')
+        for label, stdlib, fast in results:
+            stdlib_us = min(timeit.repeat(stdlib, number=iterations, repeat=3)) / iterations * 1e6
+            fast_us = min(timeit.repeat(fast, number=iterations, repeat=3)) / iterations * 1e6
+            self.stdout.write(
+                f'  {label:<7} stdlib {stdlib_us:9.1f} us   fast {fast_us:9.1f} us   '
+                f'x{stdlib_us / fast_us:.1f}'
+            )
+
+        if identical:
+            self.stdout.write(self.style.SUCCESS('  output identical'))
+        else:
+            self.stdout.write(self.style.ERROR('  output differs from JSONRenderer'))
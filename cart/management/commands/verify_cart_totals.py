@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from cart.models import Cart
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalculate cart totals and compare them with the stored ones. '
+        'Carts whose totals drifted are listed; --fix stores the recalculated totals'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Check inactive carts too (default: active carts only)'
+        )
+        parser.add_argument(
+            '--fix', action='store_true',
+            help='Store the recalculated totals of drifted and stale carts'
+        )
+
+    def handle(self, *args, **options):
+        carts = Cart.objects.order_by('pk')
+        if not options['all']:
+            carts = carts.filter(is_active=True)
+
+        checked = drifted = stale = 0
+        for cart in carts.iterator():
+            checked += 1
+            expected = cart.calculate_totals()
+
+            # Totals priced with an older pricing table are expected to
+            # differ; they are re-priced on the next read of the cart
+            current = cart.pricing_version == expected['pricing_version']
+            compared = ('item_count', 'subtotal', 'grand_total') if current else ('item_count',)
+            differences = [
+                f'{field} {getattr(cart, field)} != {expected[field]}'
+                for field in compared if getattr(cart, field) != expected[field]
+            ]
+
+            if differences:
+                drifted += 1
+                self.stdout.write(self.style.WARNING(f'Cart {cart.pk}: ' + ', '.join(differences)))
+            elif not current:
+                stale += 1
+            else:
+                continue
+
+            if options['fix']:
+                cart.refresh_totals()
+
+        summary = f'{checked} carts checked, {drifted} drifted, {stale} priced with an older pricing version.'
+        if drifted and not options['fix']:
+            raise CommandError(f'{summary} Run with --fix to repair.')
+        if options['fix']:
+            summary += f' {drifted + stale} repaired.'
+        self.stdout.write(self.style.SUCCESS(f'Done. {summary}'))
@@ -0,0 +1,89 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:14
+
+import hashlib
+import json
+
+from django.db import migrations, models
+
+
+# Frozen copy of cart/fingerprints.py as of this migration; later changes
+# there must not change what this migration computes
+FINGERPRINT_FIELDS = {
+    'flavour_1': '',
+    'flavour_2': '',
+    'size': '',
+    'colours': '',
+    'cake_topper': 0,
+    'candle': 0,
+    'birthday_card': 0,
+    'chocolate': 0,
+    'wine': 0,
+    'whiskey_200ml': 0,
+    'additional_notes': '',
+}
+
+
+def compute_fingerprint(product_id, item, addons):
+    customization = []
+    for field, default in FINGERPRINT_FIELDS.items():
+        value = getattr(item, field)
+        if value is None:
+            value = default
+        customization.append(int(value) if isinstance(default, int) else str(value))
+
+    payload = [
+        int(product_id),
+        customization,
+        sorted((int(addon_id), int(quantity)) for addon_id, quantity in addons.items()),
+    ]
+    encoded = json.dumps(payload, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def backfill_fingerprints(apps, schema_editor):
+    """
+    Fingerprint existing cart lines. Lines that turn out identical within a
+    cart are folded into the oldest one, as add-to-cart would have done.
+    """
+    CartItem = apps.get_model('cart', 'CartItem')
+    CartItemAddon = apps.get_model('cart', 'CartItemAddon')
+
+    addons = {}
+    for cart_item_id, addon_id, quantity in CartItemAddon.objects.values_list(
+        'cart_item_id', 'addon_id', 'quantity'
+    ):
+        addons.setdefault(cart_item_id, {})[addon_id] = quantity
+
+    lines = {}
+    duplicates = []
+    for item in CartItem.objects.order_by('cart_id', 'id').iterator():
+        item.customization_fingerprint = compute_fingerprint(
+            item.product_id, item, addons.get(item.id, {})
+        )
+        key = (item.cart_id, item.customization_fingerprint)
+        if key in lines:
+            lines[key].quantity += item.quantity
+            duplicates.append(item.id)
+        else:
+            lines[key] = item
+
+    CartItem.objects.bulk_update(
+        list(lines.values()), ['customization_fingerprint', 'quantity'], batch_size=500
+    )
+    CartItem.objects.filter(id__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0005_cartitemaddon'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cartitem',
+            name='customization_fingerprint',
+            field=models.CharField(blank=True, editable=False, help_text='Hash of the product and all customizations (see cart/fingerprints.py)', max_length=64),
+        ),
+        migrations.RunPython(backfill_fingerprints, migrations.RunPython.noop),
+    ]
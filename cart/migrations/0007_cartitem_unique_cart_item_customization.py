@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0006_cartitem_customization_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='cartitem',
+            constraint=models.UniqueConstraint(fields=('cart', 'customization_fingerprint'), name='unique_cart_item_customization'),
+        ),
+    ]
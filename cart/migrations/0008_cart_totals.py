@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:18
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_item_counts(apps, schema_editor):
+    """
+    Item counts only need the quantities. The money totals need the pricing
+    table: pricing_version stays empty here and 0010 prices them.
+    """
+    Cart = apps.get_model('cart', 'Cart')
+    counts = (
+        Cart.objects.filter(items__isnull=False)
+        .annotate(total=Sum('items__quantity'))
+        .values_list('pk', 'total')
+    )
+    carts = [Cart(pk=pk, item_count=total) for pk, total in counts]
+    Cart.objects.bulk_update(carts, ['item_count'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0007_cartitem_unique_cart_item_customization'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cart',
+            name='grand_total',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Subtotal plus delivery fee', max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='cart',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0, help_text='Total quantity of all items'),
+        ),
+        migrations.AddField(
+            model_name='cart',
+            name='pricing_version',
+            field=models.BigIntegerField(blank=True, help_text='Pricing table version the totals were computed with', null=True),
+        ),
+        migrations.AddField(
+            model_name='cart',
+            name='subtotal',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Items total, before delivery', max_digits=10),
+        ),
+        migrations.RunPython(backfill_item_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:29
+
+import time
+
+from django.db import migrations, models
+
+
+def create_counter(apps, schema_editor):
+    # Seeded from the clock: versions stored before this (cache-backed,
+    # also clock-seeded) are never reused
+    PricingVersion = apps.get_model('cart', 'PricingVersion')
+    PricingVersion.objects.get_or_create(pk=1, defaults={'version': int(time.time())})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0008_cart_totals'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PricingVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField(default=0)),
+                ('modified_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Pricing Version',
+            },
+        ),
+        migrations.RunPython(create_counter, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,111 @@
+from decimal import Decimal
+
+from django.db import migrations
+
+
+CENT = Decimal('0.01')
+ONE = Decimal('1.00')
+
+# Frozen copy of cart.pricing.LEGACY_ADDON_FIELDS: (CartItem field, customization_type)
+LEGACY_ADDON_FIELDS = [
+    ('cake_topper', 'topper'),
+    ('candle', 'candle'),
+    ('birthday_card', 'birthday_card'),
+    ('chocolate', 'chocolate'),
+    ('wine', 'wine'),
+    ('whiskey_200ml', 'whiskey'),
+]
+
+
+def price_cart_totals(apps, schema_editor):
+    """
+    0008 only backfilled item counts: the money totals of existing carts
+    were left at zero with no pricing_version. Price them here, with the
+    rules of cart.pricing / CartItem.calculate_total_price as of this
+    migration, and record the pricing version they were computed with.
+    """
+    Cart = apps.get_model('cart', 'Cart')
+    CartItem = apps.get_model('cart', 'CartItem')
+    CartItemAddon = apps.get_model('cart', 'CartItemAddon')
+    DeliveryInfo = apps.get_model('cart', 'DeliveryInfo')
+    CakeSizeMultiplier = apps.get_model('cart', 'CakeSizeMultiplier')
+    CakeFlavorPrice = apps.get_model('cart', 'CakeFlavorPrice')
+    CakeCustomizationOption = apps.get_model('cart', 'CakeCustomizationOption')
+    PricingVersion = apps.get_model('cart', 'PricingVersion')
+
+    cart_ids = list(Cart.objects.filter(pricing_version__isnull=True).values_list('pk', flat=True))
+    if not cart_ids:
+        return
+
+    version = PricingVersion.objects.values_list('version', flat=True).get(pk=1)
+    size_multipliers = dict(CakeSizeMultiplier.objects.values_list('size', 'multiplier'))
+    flavor_multipliers = dict(
+        CakeFlavorPrice.objects.filter(is_active=True).values_list('flavor', 'price_multiplier')
+    )
+    # Ordered by name: the last active option of a type prices the legacy field
+    prices_by_type = {}
+    prices_by_id = {}
+    for addon_id, ctype, price in CakeCustomizationOption.objects.filter(
+        is_active=True
+    ).order_by('name').values_list('id', 'customization_type', 'price_per_unit'):
+        prices_by_type[ctype] = price
+        prices_by_id[addon_id] = price
+
+    def unit_price(item, addons):
+        design_price = item.base_price
+        if design_price is None:
+            design_price = item.product.price
+        size_multiplier = size_multipliers.get(item.size, ONE) if item.size else ONE
+        flavours = [
+            flavor_multipliers.get(flavour, ONE)
+            for flavour in (item.flavour_1, item.flavour_2) if flavour
+        ]
+        flavor_multiplier = sum(flavours, Decimal('0.00')) / len(flavours) if flavours else ONE
+
+        cost = Decimal('0.00')
+        for field_name, ctype in LEGACY_ADDON_FIELDS:
+            quantity = getattr(item, field_name) or 0
+            if quantity > 0 and ctype in prices_by_type:
+                cost += prices_by_type[ctype] * quantity
+        for addon_id, quantity in addons:
+            if addon_id in prices_by_id:
+                cost += prices_by_id[addon_id] * quantity
+        return design_price * size_multiplier * flavor_multiplier + cost
+
+    for start in range(0, len(cart_ids), 500):
+        batch = cart_ids[start:start + 500]
+        subtotals = dict.fromkeys(batch, Decimal('0.00'))
+
+        items = list(CartItem.objects.filter(cart_id__in=batch).select_related('product'))
+        addons = {}
+        for item_id, addon_id, quantity in CartItemAddon.objects.filter(
+            cart_item__cart_id__in=batch
+        ).values_list('cart_item_id', 'addon_id', 'quantity'):
+            addons.setdefault(item_id, []).append((addon_id, quantity))
+        for item in items:
+            subtotals[item.cart_id] += unit_price(item, addons.get(item.pk, ())) * item.quantity
+
+        fees = dict(
+            DeliveryInfo.objects.filter(cart_id__in=batch).values_list('cart_id', 'calculated_fee')
+        )
+        carts = []
+        for cart_id, subtotal in subtotals.items():
+            subtotal = subtotal.quantize(CENT)
+            carts.append(Cart(
+                pk=cart_id,
+                subtotal=subtotal,
+                grand_total=subtotal + (fees.get(cart_id) or Decimal('0.00')),
+                pricing_version=version,
+            ))
+        Cart.objects.bulk_update(carts, ['subtotal', 'grand_total', 'pricing_version'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0009_pricingversion'),
+    ]
+
+    operations = [
+        migrations.RunPython(price_cart_totals, migrations.RunPython.noop),
+    ]
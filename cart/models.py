@@ -1,9 +1,12 @@
 from django.db import models
-from django.db.models import Sum
 from django.core.validators import MinValueValidator
 from django.db import transaction
 from decimal import Decimal, InvalidOperation
 from django.conf import settings
+from django.utils import timezone
+
+from .fingerprints import FINGERPRINT_LENGTH, compute_fingerprint, item_values, normalize_addons
+from .pricing import CENT
 
 
 # ============================================================================
@@ -122,6 +125,20 @@ class CartItemAddon(models.Model):
 
 
 
+class PricingVersion(models.Model):
+    """
+    Single-row counter bumped on every pricing change (see cart/pricing.py).
+    Kept in the database so every worker process agrees on it.
+    """
+    version = models.BigIntegerField(default=0)
+    modified_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Pricing Version'
+
+    def __str__(self):
+        return f"Pricing version {self.version}"
+
 
 # CART MODELS
 
@@ -236,6 +253,32 @@ class Cart(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
 
+    # Totals, maintained by refresh_totals() on every cart mutation;
+    # `manage.py verify_cart_totals` reports (and with --fix repairs) drift
+    item_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Total quantity of all items"
+    )
+    subtotal = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        help_text="Items total, before delivery"
+    )
+    grand_total = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        help_text="Subtotal plus delivery fee"
+    )
+    pricing_version = models.BigIntegerField(
+        null=True,
+        blank=True,
+        help_text="Pricing table version the totals were computed with"
+    )
+
+    TOTAL_FIELDS = ('item_count', 'subtotal', 'grand_total', 'pricing_version')
+
     class Meta:
         ordering = ['-created_at']
         # Removed unique_together — it incorrectly prevented multiple inactive carts per user
@@ -250,40 +293,78 @@ class Cart(models.Model):
     def is_guest_cart(self):
         return self.user is None and self.session_key is not None
 
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.pricing_version is None:
+            # An empty cart's zero totals are current for any pricing
+            from cart.pricing import get_pricing_version
+            self.pricing_version = get_pricing_version()
+        super().save(*args, **kwargs)
+
     @property
     def total_price(self):
-        """Calculate total price including all customizations"""
-        total = Decimal('0.00')
-        for item in self.items.all():
-            total += item.total_item_price
-        return total
+        """Alias for subtotal (before delivery)"""
+        return self.subtotal
 
     @property
-    def item_count(self):
-        """Get total number of items in cart"""
-        result = self.items.aggregate(total=Sum('quantity'))
-        return result['total'] or 0
+    def delivery_cost(self):
+        """Delivery fee included in grand_total (DeliveryInfo.calculated_fee)."""
+        return self.grand_total - self.subtotal
 
-    @property
-    def subtotal(self):
-        """Alias for total_price (before delivery)"""
-        return self.total_price
+    # ========================================================================
+    # PERSISTED TOTALS
+    # ========================================================================
 
-    @property
-    def delivery_cost(self):
+    def calculate_totals(self):
         """
-        Get delivery cost from DeliveryInfo if available.
-        Fixed: was always returning 0.00 — now reads from calculated_fee.
+        Totals of the current items and delivery fee, priced with the
+        current pricing table. Returns the values of TOTAL_FIELDS.
         """
-        try:
-            return self.delivery_info.calculated_fee or Decimal('0.00')
-        except DeliveryInfo.DoesNotExist:
-            return Decimal('0.00')
+        from cart.pricing import get_pricing_table
+
+        pricing_version = get_pricing_table().version
+        item_count = 0
+        subtotal = Decimal('0.00')
+        for item in self.items.select_related('product').prefetch_related('dynamic_addons'):
+            item_count += item.quantity
+            subtotal += item.total_item_price
+
+        delivery_fee = (
+            DeliveryInfo.objects.filter(cart=self)
+            .values_list('calculated_fee', flat=True)
+            .first()
+        ) or Decimal('0.00')
+
+        subtotal = subtotal.quantize(CENT)
+        return {
+            'item_count': item_count,
+            'subtotal': subtotal,
+            'grand_total': subtotal + delivery_fee,
+            'pricing_version': pricing_version,
+        }
+
+    def refresh_totals(self):
+        """
+        Recompute and store the totals. Every cart mutation calls this in
+        its transaction; the row lock makes concurrent mutations of the
+        same cart store their totals one after the other.
+        """
+        with transaction.atomic():
+            self.lock()
+            totals = self.calculate_totals()
+            Cart.objects.filter(pk=self.pk).update(updated_at=timezone.now(), **totals)
 
-    @property
-    def grand_total(self):
-        """Total price including delivery"""
-        return self.total_price + self.delivery_cost
+        for field, value in totals.items():
+            setattr(self, field, value)
+        return totals
+
+    def lock(self):
+        """Lock this cart's row until the end of the current transaction."""
+        list(Cart.objects.select_for_update().filter(pk=self.pk).values_list('pk', flat=True))
+
+    def totals_are_current(self):
+        """False once the pricing has changed since the totals were stored."""
+        from cart.pricing import get_pricing_version
+        return self.pricing_version == get_pricing_version()
 
 
 class CartItem(models.Model):
@@ -368,6 +449,13 @@ class CartItem(models.Model):
         max_length=1000
     )
 
+    customization_fingerprint = models.CharField(
+        max_length=FINGERPRINT_LENGTH,
+        blank=True,
+        editable=False,
+        help_text="Hash of the product and all customizations (see cart/fingerprints.py)"
+    )
+
     # Pricing snapshots
     base_price = models.DecimalField(
         max_digits=10,
@@ -386,90 +474,95 @@ class CartItem(models.Model):
 
     added_at = models.DateTimeField(auto_now_add=True)
 
+    # Dynamic addons an unsaved item is about to get; see set_pending_addons()
+    _pending_addons = None
+
     class Meta:
         ordering = ['-added_at']
+        constraints = [
+            # One line per customization: adding the same thing again
+            # increases the quantity of the existing line
+            models.UniqueConstraint(
+                fields=['cart', 'customization_fingerprint'],
+                name='unique_cart_item_customization',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.quantity}x {self.product.name}"
 
+    # ========================================================================
+    # CUSTOMIZATION FINGERPRINT
+    # ========================================================================
+
+    def set_pending_addons(self, addons):
+        """
+        Price and fingerprint this item with `addons` ({addon_id: quantity}
+        or pairs) before its CartItemAddon rows exist. Cleared once they do,
+        or with None.
+        """
+        self._pending_addons = None if addons is None else normalize_addons(addons)
+
+    def get_addon_quantities(self):
+        """{addon_id: quantity} of the item's dynamic addons."""
+        if self._pending_addons is not None:
+            return self._pending_addons
+        if not self.pk:
+            return {}
+        return {dynamic.addon_id: dynamic.quantity for dynamic in self.dynamic_addons.all()}
+
+    def create_pending_addons(self):
+        """Create the CartItemAddon rows given to set_pending_addons()."""
+        if self._pending_addons:
+            CartItemAddon.objects.bulk_create([
+                CartItemAddon(cart_item=self, addon_id=addon_id, quantity=quantity)
+                for addon_id, quantity in self._pending_addons.items()
+            ])
+        self._pending_addons = None
+
+    def build_customization_fingerprint(self, addon_quantities=None):
+        if addon_quantities is None:
+            addon_quantities = self.get_addon_quantities()
+        return compute_fingerprint(self.product_id, item_values(self), addon_quantities)
+
     # ========================================================================
     # HELPER METHODS FOR PRICE CALCULATION
     # ========================================================================
 
+    def get_pricing_table(self):
+        """Shared in-memory pricing snapshot (see cart/pricing.py)."""
+        from cart.pricing import get_pricing_table
+        return get_pricing_table()
+
     def get_size_multiplier(self):
         """Get the multiplier for the selected cake size."""
-        if not self.size:
-            return Decimal('1.00')
-        try:
-            size_config = CakeSizeMultiplier.objects.get(size=self.size)
-            return size_config.multiplier
-        except CakeSizeMultiplier.DoesNotExist:
-            return Decimal('1.00')
+        return self.get_pricing_table().size_multiplier(self.size)
 
     def get_flavor_multiplier(self):
         """
         Calculate the effective flavor multiplier.
         If two flavors selected, returns the average of their multipliers.
         """
-        multipliers = []
-
-        if self.flavour_1:
-            try:
-                flavor = CakeFlavorPrice.objects.get(flavor=self.flavour_1, is_active=True)
-                multipliers.append(flavor.price_multiplier)
-            except CakeFlavorPrice.DoesNotExist:
-                multipliers.append(Decimal('1.00'))
-
-        if self.flavour_2:
-            try:
-                flavor = CakeFlavorPrice.objects.get(flavor=self.flavour_2, is_active=True)
-                multipliers.append(flavor.price_multiplier)
-            except CakeFlavorPrice.DoesNotExist:
-                multipliers.append(Decimal('1.00'))
-
-        if not multipliers:
-            return Decimal('1.00')
-
-        return sum(multipliers, Decimal('0.00')) / len(multipliers)
+        return self.get_pricing_table().flavor_multiplier(self.flavour_1, self.flavour_2)
 
-    def calculate_addons_cost(self):
+    def calculate_addons_cost(self, addon_quantities=None):
         """Calculate the total cost of all add-ons for ONE cake.
         Includes both legacy hardcoded fields and dynamic addons.
         """
-        total_addons = Decimal('0.00')
+        pricing = self.get_pricing_table()
 
         # ── Legacy hardcoded addons ────────────────────────────────
-        addon_prices = {}
-        try:
-            addon_options = CakeCustomizationOption.objects.filter(is_active=True)
-            addon_prices = {opt.customization_type: opt.price_per_unit for opt in addon_options}
-        except Exception:
-            pass
-
-        addon_mapping = [
-            ('cake_topper', 'topper'),
-            ('candle', 'candle'),
-            ('birthday_card', 'birthday_card'),
-            ('chocolate', 'chocolate'),
-            ('wine', 'wine'),
-            ('whiskey_200ml', 'whiskey'),
-        ]
-        
-        for field_name, option_type in addon_mapping:
-            quantity = getattr(self, field_name, 0)
-            if quantity > 0 and option_type in addon_prices:
-                total_addons += addon_prices[option_type] * quantity
+        total_addons = pricing.legacy_addons_cost(self)
 
         # ── Dynamic addons ─────────────────────────────────────────
-        # Only available after the item has been saved (has a pk)
-        if self.pk:
-            try:
-                for dynamic in self.dynamic_addons.select_related('addon').filter(
-                    addon__is_active=True
-                ):
-                    total_addons += dynamic.addon.price_per_unit * dynamic.quantity
-            except Exception:
-                pass
+        # Saved ones, or the pending ones of an item being created.
+        # Prices come from the snapshot; inactive addons are skipped.
+        if addon_quantities is None:
+            addon_quantities = self.get_addon_quantities()
+        for addon_id, quantity in addon_quantities.items():
+            price = pricing.addon_price(addon_id)
+            if price is not None:
+                total_addons += price * quantity
 
         return total_addons
 
@@ -550,9 +643,13 @@ class CartItem(models.Model):
         if self.base_price is None and self.product:
             self.base_price = self.product.price
 
-        self.customization_cost = self.calculate_addons_cost()
+        addon_quantities = self.get_addon_quantities()
+        self.customization_cost = self.calculate_addons_cost(addon_quantities)
+        self.customization_fingerprint = self.build_customization_fingerprint(addon_quantities)
 
-        self.full_clean()   # always validate, including on first save
+        # always validate, including on first save; (cart, fingerprint)
+        # uniqueness is left to the database constraint
+        self.full_clean(exclude=['customization_fingerprint'])
 
         super().save(*args, **kwargs)
 
@@ -626,37 +723,7 @@ class CartItem(models.Model):
 
     def get_addons_breakdown(self):
         """Return a detailed breakdown of add-on costs."""
-        items = []
-
-        addon_mapping = [
-            ('cake_topper', 'topper', 'Cake Topper'),
-            ('candle', 'candle', 'Candle'),
-            ('birthday_card', 'birthday_card', 'Birthday Card'),
-            ('chocolate', 'chocolate', 'Chocolate Box'),
-            ('wine', 'wine', 'Wine Bottle'),
-            ('whiskey_200ml', 'whiskey', 'Whiskey (200ml)'),
-        ]
-
-        addon_prices = {}
-        try:
-            addon_options = CakeCustomizationOption.objects.filter(is_active=True)
-            addon_prices = {opt.customization_type: opt.price_per_unit for opt in addon_options}
-        except Exception:
-            pass
-
-        for field_name, option_type, display_name in addon_mapping:
-            quantity = getattr(self, field_name, 0)
-            if quantity > 0 and option_type in addon_prices:
-                unit_price = addon_prices[option_type]
-                total_cost = unit_price * quantity
-                items.append({
-                    'name': display_name,
-                    'quantity': quantity,
-                    'unit_price': unit_price,
-                    'total_cost': total_cost
-                })
-
-        return items
+        return self.get_pricing_table().legacy_addons_breakdown(self)
 
     def get_customization_summary(self):
         """Get a human-readable summary of cake customizations"""
@@ -739,4 +806,18 @@ class DeliveryInfo(models.Model):
         verbose_name_plural = 'Delivery Information'
 
     def __str__(self):
-        return f"Delivery for Cart {self.cart_id}"
\ No newline at end of file
+        return f"Delivery for Cart {self.cart_id}"
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # The fee is part of the cart's stored grand_total
+            if self.cart.delivery_cost != (self.calculated_fee or Decimal('0.00')):
+                self.cart.refresh_totals()
+
+    def delete(self, *args, **kwargs):
+        cart = self.cart
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            cart.refresh_totals()
+        return result
\ No newline at end of file
@@ -0,0 +1,339 @@
+"""
+Process-wide cake pricing table.
+
+Size multipliers, flavor multipliers and addon prices change a few times a
+year but are read for every cart item on every cart render. Instead of
+querying CakeSizeMultiplier, CakeFlavorPrice and CakeCustomizationOption per
+item, all three tables are loaded once into an immutable PricingTable.
+
+The table carries a version number stored in the database (PricingVersion,
+see bake_world/versions.py). Saving or deleting any pricing row bumps the
+version once the change commits (see cart/signals.py), and every process
+reloads its snapshot the next time it sees a newer version, or at the
+latest after PRICING_TABLE_MAX_AGE seconds. The customization options
+document served to the customize page is keyed by the same version.
+"""
+import hashlib
+import json
+import threading
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+
+from bake_world.versions import VersionCounter
+
+
+# (CartItem field, CakeCustomizationOption.customization_type, display name)
+LEGACY_ADDON_FIELDS = [
+    ('cake_topper', 'topper', 'Cake Topper'),
+    ('candle', 'candle', 'Candle'),
+    ('birthday_card', 'birthday_card', 'Birthday Card'),
+    ('chocolate', 'chocolate', 'Chocolate Box'),
+    ('wine', 'wine', 'Wine Bottle'),
+    ('whiskey_200ml', 'whiskey', 'Whiskey (200ml)'),
+]
+
+DEFAULT_MULTIPLIER = Decimal('1.00')
+
+CENT = Decimal('0.01')
+
+
+class PricingTable:
+    """
+    Immutable in-memory snapshot of all cake pricing tables.
+    """
+
+    def __init__(self, version, size_multipliers, flavor_multipliers,
+                 addon_prices_by_type, addon_prices_by_id):
+        self.version = version
+        self.size_multipliers = size_multipliers
+        self.flavor_multipliers = flavor_multipliers
+        self.addon_prices_by_type = addon_prices_by_type
+        self.addon_prices_by_id = addon_prices_by_id
+        self.loaded_at = time.monotonic()
+
+    @classmethod
+    def load(cls, version):
+        """Build a snapshot with one query per pricing table."""
+        from cart.models import CakeSizeMultiplier, CakeFlavorPrice, CakeCustomizationOption
+
+        size_multipliers = dict(
+            CakeSizeMultiplier.objects.values_list('size', 'multiplier')
+        )
+        flavor_multipliers = dict(
+            CakeFlavorPrice.objects.filter(is_active=True)
+            .values_list('flavor', 'price_multiplier')
+        )
+
+        # Ordered by name (model default) so that, as before, the last active
+        # option of a given customization_type wins.
+        addon_prices_by_type = {}
+        addon_prices_by_id = {}
+        for addon_id, ctype, price in CakeCustomizationOption.objects.filter(
+            is_active=True
+        ).values_list('id', 'customization_type', 'price_per_unit'):
+            addon_prices_by_type[ctype] = price
+            addon_prices_by_id[addon_id] = price
+
+        return cls(
+            version=version,
+            size_multipliers=size_multipliers,
+            flavor_multipliers=flavor_multipliers,
+            addon_prices_by_type=addon_prices_by_type,
+            addon_prices_by_id=addon_prices_by_id,
+        )
+
+    def expired(self):
+        return time.monotonic() - self.loaded_at > get_pricing_table_max_age()
+
+    # ========================================================================
+    # LOOKUPS
+    # ========================================================================
+
+    def size_multiplier(self, size):
+        """Multiplier for a cake size, 1.00 if unknown or blank."""
+        if not size:
+            return DEFAULT_MULTIPLIER
+        return self.size_multipliers.get(size, DEFAULT_MULTIPLIER)
+
+    def flavor_multiplier(self, flavour_1='', flavour_2=''):
+        """
+        Effective flavor multiplier.
+        If two flavors are selected, returns the average of their multipliers.
+        """
+        multipliers = [
+            self.flavor_multipliers.get(flavour, DEFAULT_MULTIPLIER)
+            for flavour in (flavour_1, flavour_2) if flavour
+        ]
+        if not multipliers:
+            return DEFAULT_MULTIPLIER
+        return sum(multipliers, Decimal('0.00')) / len(multipliers)
+
+    def price_matrix(self, design_price, sizes, flavours):
+        """
+        Unit price before addons of every size x flavour combination, as
+        rows (one per size) aligned with `flavours` ((flavour_1, flavour_2)
+        pairs). The size prices and flavour multipliers are each computed
+        once, then every cell is a single multiplication. Not rounded: a
+        cart line is priced with the same exact unit price.
+        """
+        size_prices = [design_price * self.size_multiplier(size) for size in sizes]
+        flavour_multipliers = [self.flavor_multiplier(*pair) for pair in flavours]
+        return [
+            [size_price * multiplier for multiplier in flavour_multipliers]
+            for size_price in size_prices
+        ]
+
+    def addon_price(self, addon_id):
+        """Unit price of an active addon, or None if inactive/unknown."""
+        return self.addon_prices_by_id.get(addon_id)
+
+    def legacy_addons_cost(self, item):
+        """Cost of the legacy hardcoded addon fields for ONE cake."""
+        total = Decimal('0.00')
+        for field_name, option_type, _ in LEGACY_ADDON_FIELDS:
+            quantity = getattr(item, field_name, 0) or 0
+            if quantity > 0 and option_type in self.addon_prices_by_type:
+                total += self.addon_prices_by_type[option_type] * quantity
+        return total
+
+    def legacy_addons_breakdown(self, item):
+        """Per-addon breakdown of the legacy hardcoded addon fields."""
+        items = []
+        for field_name, option_type, display_name in LEGACY_ADDON_FIELDS:
+            quantity = getattr(item, field_name, 0) or 0
+            if quantity > 0 and option_type in self.addon_prices_by_type:
+                unit_price = self.addon_prices_by_type[option_type]
+                items.append({
+                    'name': display_name,
+                    'quantity': quantity,
+                    'unit_price': unit_price,
+                    'total_cost': unit_price * quantity
+                })
+        return items
+
+
+# ============================================================================
+# PROCESS-WIDE SNAPSHOT
+# ============================================================================
+
+_table = None
+_lock = threading.Lock()
+
+pricing_version = VersionCounter('cart.PricingVersion')
+
+
+def get_pricing_table_max_age():
+    return getattr(settings, 'PRICING_TABLE_MAX_AGE', 300)
+
+
+def get_pricing_version():
+    """Current pricing version, shared by all processes through the database."""
+    return pricing_version.get()
+
+
+def get_pricing_table():
+    """
+    Return the current PricingTable, reloading it when the pricing version
+    has moved past the snapshot held by this process, or when the snapshot
+    is older than PRICING_TABLE_MAX_AGE (changes that bypassed the signals).
+    """
+    global _table
+
+    version = get_pricing_version()
+    table = _table
+    if table is not None and table.version == version and not table.expired():
+        return table
+
+    with _lock:
+        if _table is None or _table.version != version or _table.expired():
+            _table = PricingTable.load(version)
+        return _table
+
+
+def invalidate_pricing_table():
+    """Bump the shared pricing version and drop this process's snapshot."""
+    global _table
+
+    pricing_version.bump()
+    _table = None
+
+
+# ============================================================================
+# CUSTOMIZATION OPTIONS DOCUMENT
+# ============================================================================
+
+CUSTOMIZATION_OPTIONS_CACHE_KEY = 'cart:customization_options:v{version}'
+
+
+def build_customization_options():
+    """Sizes, active flavors and active addons offered on the customize page."""
+    from cart.models import CakeSizeMultiplier, CakeFlavorPrice, CakeCustomizationOption
+
+    sizes = CakeSizeMultiplier.objects.all().order_by('size')
+    flavors = CakeFlavorPrice.objects.filter(is_active=True)
+    addons = CakeCustomizationOption.objects.filter(is_active=True)
+
+    return {
+        'sizes': [
+            {
+                'id': s.id,
+                'size': s.size,
+                'display': s.get_size_display(),
+                'multiplier': str(s.multiplier)
+            } for s in sizes
+        ],
+        'flavors': [
+            {
+                'id': f.id,
+                'name': f.flavor,
+                'multiplier': str(f.price_multiplier)
+            } for f in flavors
+        ],
+        'addons': [
+            {
+                'id': a.id,
+                'type': a.customization_type,
+                'name': a.name,
+                'price': str(a.price_per_unit),
+                'description': a.description
+            } for a in addons
+        ]
+    }
+
+
+def get_customization_options():
+    """
+    Return (options, etag) for the current pricing version.
+    The document is built once per version and shared through the cache;
+    the pricing signals that reload the PricingTable also retire it.
+    """
+    key = CUSTOMIZATION_OPTIONS_CACHE_KEY.format(version=get_pricing_version())
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    options = build_customization_options()
+    payload = json.dumps(options, sort_keys=True, separators=(',', ':'))
+    etag = '"{}"'.format(hashlib.sha1(payload.encode('utf-8')).hexdigest())
+
+    cache.set(key, (options, etag), timeout=None)
+    return options, etag
+
+
+# ============================================================================
+# PRICE MATRIX
+# ============================================================================
+
+PRICE_MATRIX_CACHE_KEY = 'cart:price_matrix:{format}:v{version}:{product_id}:{price}'
+PRICE_MATRIX_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Bump when the document changes shape (2: exact prices, no longer rounded)
+PRICE_MATRIX_FORMAT = 2
+
+
+def format_exact_price(price):
+    """`price` as a string with at least two decimals, never rounded."""
+    price = price.normalize()
+    if price.as_tuple().exponent > -2:
+        price = price.quantize(CENT)
+    return str(price)
+
+
+def get_price_matrix_etag(product, version=None):
+    from bake_world.conditional import make_etag
+
+    if version is None:
+        version = get_pricing_version()
+    return make_etag('price-matrix', PRICE_MATRIX_FORMAT, product.pk, product.price, version)
+
+
+def build_price_matrix(product, table=None):
+    """
+    Unit price (before addons) of a cake for every size and every flavour
+    choice: one flavour, or two (averaged, so listed once per pair).
+    Prices are exact, like CartItem.unit_price; totals are rounded to
+    cents only once summed, as the cart does.
+    """
+    from cart.models import CakeSizeMultiplier
+
+    table = table or get_pricing_table()
+    # CAKE_SIZES order (6" to 14"), rather than the string order of the column
+    size_order = {size: i for i, (size, _) in enumerate(CakeSizeMultiplier.CAKE_SIZES)}
+    sizes = sorted(table.size_multipliers, key=lambda size: (size_order.get(size, len(size_order)), size))
+    names = sorted(table.flavor_multipliers)
+    flavours = [(name, '') for name in names] + [
+        (first, second)
+        for i, first in enumerate(names)
+        for second in names[i + 1:]
+    ]
+
+    unit_prices = table.price_matrix(product.price, sizes, flavours)
+    return {
+        'product_id': product.pk,
+        'design_price': str(product.price),
+        'pricing_version': table.version,
+        'sizes': sizes,
+        'flavours': [list(pair) for pair in flavours],
+        'unit_prices': [[format_exact_price(price) for price in row] for row in unit_prices],
+    }
+
+
+def get_price_matrix(product):
+    """
+    Return (matrix, etag). The matrix is cached per product, design price
+    and pricing version, so a price or pricing change retires it.
+    """
+    table = get_pricing_table()
+    key = PRICE_MATRIX_CACHE_KEY.format(
+        format=PRICE_MATRIX_FORMAT, version=table.version, product_id=product.pk, price=product.price
+    )
+    etag = get_price_matrix_etag(product, table.version)
+
+    matrix = cache.get(key)
+    if matrix is None:
+        matrix = build_price_matrix(product, table)
+        cache.set(key, matrix, PRICE_MATRIX_CACHE_TIMEOUT)
+    return matrix, etag
@@ -90,6 +90,49 @@ class AddonInputSerializer(serializers.Serializer):
     quantity = serializers.IntegerField(min_value=1, default=1)
 
 
+def validate_cart_line(data, products, active_addon_ids):
+    """
+    Check one add-to-cart line against preloaded lookups: `products` maps
+    ids to available products, `active_addon_ids` holds the ids of the
+    active addons. Returns the line's product.
+    """
+    product = products.get(data['product_id'])
+    if product is None:
+        raise serializers.ValidationError({
+            'product_id': 'Product not found or not available.'
+        })
+
+    if product.is_cake:
+        if not data.get('size'):
+            raise serializers.ValidationError({
+                'size': 'Size is required for cakes.'
+            })
+        if not data.get('flavour_1'):
+            raise serializers.ValidationError({
+                'flavour_1': 'At least one flavor is required for cakes.'
+            })
+
+    # Validate dynamic addon IDs exist and are active
+    addon_ids = [a['addon_id'] for a in data.get('addons', [])]
+    missing = set(addon_ids) - set(active_addon_ids)
+    if missing:
+        raise serializers.ValidationError({
+            'addons': f'Invalid or inactive addon IDs: {list(missing)}'
+        })
+
+    return product
+
+
+def get_active_addon_ids(addon_ids):
+    if not addon_ids:
+        return set()
+    return set(
+        CakeCustomizationOption.objects.filter(
+            id__in=addon_ids, is_active=True
+        ).values_list('id', flat=True)
+    )
+
+
 class AddToCartSerializer(serializers.Serializer):
     product_id = serializers.IntegerField()
     quantity = serializers.IntegerField(min_value=1, default=1)
@@ -116,39 +159,49 @@ class AddToCartSerializer(serializers.Serializer):
     )
 
     def validate(self, data):
-        try:
-            product = Product.objects.get(id=data['product_id'], available=True)
-        except Product.DoesNotExist:
-            raise serializers.ValidationError({
-                'product_id': 'Product not found or not available.'
-            })
+        products = Product.objects.filter(available=True).in_bulk([data['product_id']])
+        active_addon_ids = get_active_addon_ids([a['addon_id'] for a in data.get('addons', [])])
+        self.context['product'] = validate_cart_line(data, products, active_addon_ids)
+        return data
 
-        if product.is_cake:
-            if not data.get('size'):
-                raise serializers.ValidationError({
-                    'size': 'Size is required for cakes.'
-                })
-            if not data.get('flavour_1'):
-                raise serializers.ValidationError({
-                    'flavour_1': 'At least one flavor is required for cakes.'
-                })
-
-        # Validate dynamic addon IDs exist and are active
-        addon_ids = [a['addon_id'] for a in data.get('addons', [])]
-        if addon_ids:
-            found = CakeCustomizationOption.objects.filter(
-                id__in=addon_ids, is_active=True
-            ).values_list('id', flat=True)
-            missing = set(addon_ids) - set(found)
-            if missing:
-                raise serializers.ValidationError({
-                    'addons': f'Invalid or inactive addon IDs: {list(missing)}'
-                })
 
-        self.context['product'] = product
+class CartLineSerializer(AddToCartSerializer):
+    """One line of a batch add; validated together by BatchAddToCartSerializer."""
+
+    def validate(self, data):
         return data
 
 
+class BatchAddToCartSerializer(serializers.Serializer):
+    """
+    Several add-to-cart lines at once. The products and addons of all
+    lines are loaded with one query each; every line gets its `product`.
+    """
+    MAX_LINES = 50
+
+    items = CartLineSerializer(many=True, allow_empty=False, max_length=MAX_LINES)
+
+    def validate_items(self, items):
+        products = Product.objects.filter(available=True).in_bulk(
+            {line['product_id'] for line in items}
+        )
+        active_addon_ids = get_active_addon_ids(
+            {addon['addon_id'] for line in items for addon in line.get('addons', [])}
+        )
+
+        errors = []
+        for line in items:
+            try:
+                line['product'] = validate_cart_line(line, products, active_addon_ids)
+                errors.append({})
+            except serializers.ValidationError as exc:
+                errors.append(exc.detail)
+
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return items
+
+
 class UpdateCartItemSerializer(serializers.Serializer):
     """
     Serializer for updating cart item quantity.
@@ -0,0 +1,18 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from bake_world.versions import on_commit_once
+
+from .models import CakeSizeMultiplier, CakeFlavorPrice, CakeCustomizationOption
+from .pricing import invalidate_pricing_table
+
+
+@receiver(post_save, sender=CakeSizeMultiplier)
+@receiver(post_delete, sender=CakeSizeMultiplier)
+@receiver(post_save, sender=CakeFlavorPrice)
+@receiver(post_delete, sender=CakeFlavorPrice)
+@receiver(post_save, sender=CakeCustomizationOption)
+@receiver(post_delete, sender=CakeCustomizationOption)
+def invalidate_pricing(sender, instance, **kwargs):
+    """Reload the pricing table once the pricing change is committed (once per transaction)."""
+    on_commit_once(invalidate_pricing_table)
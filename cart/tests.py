@@ -1,3 +1,401 @@
-from django.test import TestCase
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from cart import pricing
+from cart.fingerprints import compute_fingerprint
+from cart.models import (
+    CakeCustomizationOption, CakeFlavorPrice, CakeSizeMultiplier, Cart, CartItem, DeliveryInfo, PricingVersion,
+)
+from cart.utils import add_cart_item, add_cart_items, merge_carts, refresh_stale_totals
+from products.models import Product
+
+
+class PricingTableTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        # bulk_create: no signals, so no version bump is pending for the tests
+        cls.size, = CakeSizeMultiplier.objects.bulk_create([
+            CakeSizeMultiplier(size='8', multiplier=Decimal('1.50'))
+        ])
+        cls.flavour, = CakeFlavorPrice.objects.bulk_create([
+            CakeFlavorPrice(flavor='vanilla', price_multiplier=Decimal('1.20'))
+        ])
+        cls.addon, = CakeCustomizationOption.objects.bulk_create([
+            CakeCustomizationOption(
+                name='Candle', slug='candle', customization_type='candle',
+                price_per_unit=Decimal('100.00')
+            )
+        ])
+
+    def setUp(self):
+        pricing.pricing_version.expire()
+        pricing._table = None
+
+    def test_snapshot_is_reused_while_the_version_is_unchanged(self):
+        table = pricing.get_pricing_table()
+        with self.assertNumQueries(0):
+            self.assertIs(pricing.get_pricing_table(), table)
+
+    def test_pricing_change_bumps_the_version_once_per_transaction(self):
+        table = pricing.get_pricing_table()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.size.multiplier = Decimal('2.00')
+            self.size.save()
+            self.flavour.price_multiplier = Decimal('1.40')
+            self.flavour.save()
+
+        self.assertEqual(callbacks.count(pricing.invalidate_pricing_table), 1)
+        self.assertEqual(pricing.get_pricing_version(), table.version + 1)
+        new_table = pricing.get_pricing_table()
+        self.assertEqual(new_table.size_multiplier('8'), Decimal('2.00'))
+        self.assertEqual(new_table.flavor_multiplier('vanilla'), Decimal('1.40'))
+
+    @override_settings(CACHE_VERSION_TTL=0)
+    def test_bump_by_another_process_is_seen(self):
+        table = pricing.get_pricing_table()
+        # Another worker changed the pricing and bumped the shared row
+        CakeSizeMultiplier.objects.filter(pk=self.size.pk).update(multiplier=Decimal('3.00'))
+        PricingVersion.objects.filter(pk=1).update(version=table.version + 1)
+
+        self.assertEqual(pricing.get_pricing_table().size_multiplier('8'), Decimal('3.00'))
+
+    @override_settings(PRICING_TABLE_MAX_AGE=0)
+    def test_snapshot_expires_without_a_bump(self):
+        table = pricing.get_pricing_table()
+        CakeCustomizationOption.objects.filter(pk=self.addon.pk).update(price_per_unit=Decimal('150.00'))
+
+        new_table = pricing.get_pricing_table()
+        self.assertIsNot(new_table, table)
+        self.assertEqual(new_table.addon_price(self.addon.pk), Decimal('150.00'))
+
+
+class CartTotalsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        CakeSizeMultiplier.objects.bulk_create([CakeSizeMultiplier(size='8', multiplier=Decimal('1.50'))])
+        CakeFlavorPrice.objects.bulk_create([CakeFlavorPrice(flavor='Vanilla', price_multiplier=Decimal('1.20'))])
+        cls.candle, = CakeCustomizationOption.objects.bulk_create([
+            CakeCustomizationOption(
+                name='Candle', slug='candle', customization_type='candle',
+                price_per_unit=Decimal('100.00')
+            )
+        ])
+        # bulk_create: no catalog signals (search index, snapshot)
+        cls.cake, cls.pastry = Product.objects.bulk_create([
+            Product(
+                name='Butterfly Cake', slug='butterfly-cake', product_type='cake',
+                price=Decimal('1000.00'), layers=2, covering='fondant', preparation_days=2
+            ),
+            Product(name='Croissant', slug='croissant', product_type='pastry', price=Decimal('350.00')),
+        ])
+
+    def setUp(self):
+        pricing.pricing_version.expire()
+        pricing._table = None
+        self.cart = Cart.objects.create(session_key='guest')
+
+    def cake_line(self, **data):
+        return {'flavour_1': 'Vanilla', 'size': '8', 'candle': 2, **data}
+
+    def assertTotalsMatchRecompute(self, item_count, subtotal):
+        self.cart.refresh_from_db()
+        stored = {field: getattr(self.cart, field) for field in Cart.TOTAL_FIELDS}
+        self.assertEqual(stored, self.cart.calculate_totals())
+        self.assertEqual(self.cart.item_count, item_count)
+        self.assertEqual(self.cart.subtotal, Decimal(subtotal))
+
+    def test_new_cart_totals_are_current(self):
+        self.assertTrue(self.cart.totals_are_current())
+        self.assertTotalsMatchRecompute(0, '0.00')
+
+    def test_totals_after_each_mutation(self):
+        # 1000 x 1.50 (size) x 1.20 (flavour) + 2 candles = 2000.00 per cake
+        item, _ = add_cart_item(self.cart, self.cake, self.cake_line())
+        self.assertTotalsMatchRecompute(1, '2000.00')
+
+        add_cart_item(self.cart, self.cake, self.cake_line(quantity=2))
+        self.assertTotalsMatchRecompute(3, '6000.00')
+
+        add_cart_items(self.cart, [
+            {'product': self.pastry, 'quantity': 2},
+            {'product': self.cake, **self.cake_line(addons=[{'addon_id': self.candle.pk, 'quantity': 1}])},
+        ])
+        self.assertTotalsMatchRecompute(6, '8800.00')
+
+        item.refresh_from_db()
+        item.quantity = 1
+        item.save()
+        self.cart.refresh_totals()
+        self.assertTotalsMatchRecompute(4, '4800.00')
+
+        DeliveryInfo.objects.create(cart=self.cart, calculated_fee=Decimal('1500.00'))
+        self.assertTotalsMatchRecompute(4, '4800.00')
+        self.assertEqual(self.cart.grand_total, Decimal('6300.00'))
+
+        item.delete()
+        self.cart.refresh_totals()
+        self.assertTotalsMatchRecompute(3, '2800.00')
+
+    def test_pricing_change_makes_the_totals_stale(self):
+        add_cart_item(self.cart, self.cake, self.cake_line())
+        self.cart.refresh_from_db()
+        with self.captureOnCommitCallbacks(execute=True):
+            CakeSizeMultiplier.objects.get(size='8').save()
+
+        self.assertFalse(self.cart.totals_are_current())
+        refresh_stale_totals(self.cart)
+        self.assertTrue(self.cart.totals_are_current())
+        self.assertTotalsMatchRecompute(1, '2000.00')
+
+
+class CustomizationFingerprintTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.pastry, = Product.objects.bulk_create([
+            Product(name='Croissant', slug='croissant', product_type='pastry', price=Decimal('350.00'))
+        ])
+        cls.balloons, cls.card = CakeCustomizationOption.objects.bulk_create([
+            CakeCustomizationOption(name='Balloons', slug='balloons', price_per_unit=Decimal('50.00')),
+            CakeCustomizationOption(name='Card', slug='card', price_per_unit=Decimal('20.00')),
+        ])
+
+    def setUp(self):
+        pricing.pricing_version.expire()
+        pricing._table = None
+        self.cart = Cart.objects.create(session_key='guest')
+
+    def test_fingerprint_ignores_addon_order_and_omitted_defaults(self):
+        self.assertEqual(
+            compute_fingerprint(1, {'candle': 0}, [(2, 1), (3, 1)]),
+            compute_fingerprint(1, {'additional_notes': None}, {3: 1, 2: 1}),
+        )
+        self.assertNotEqual(
+            compute_fingerprint(1, {}, {2: 1}),
+            compute_fingerprint(1, {}, {2: 2}),
+        )
+
+    def test_same_customization_increments_the_quantity(self):
+        addons = [{'addon_id': self.balloons.pk, 'quantity': 1}, {'addon_id': self.card.pk, 'quantity': 2}]
+        item, created = add_cart_item(self.cart, self.pastry, {'quantity': 1, 'addons': addons})
+        self.assertTrue(created)
+
+        again, created = add_cart_item(self.cart, self.pastry, {'quantity': 2, 'addons': addons[::-1]})
+        self.assertFalse(created)
+        self.assertEqual(again.pk, item.pk)
+        self.assertEqual(again.quantity, 3)
+        self.assertEqual(self.cart.items.count(), 1)
+
+    def test_different_customization_is_a_new_line(self):
+        add_cart_item(self.cart, self.pastry, {'quantity': 1})
+        _, created = add_cart_item(self.cart, self.pastry, {'quantity': 1, 'additional_notes': 'Warm please'})
+
+        self.assertTrue(created)
+        self.assertEqual(
+            sorted(CartItem.objects.filter(cart=self.cart).values_list('quantity', flat=True)), [1, 1]
+        )
+
+
+class MergeCartsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email='ada@example.com', username='ada', first_name='Ada', last_name='Obi', password='x'
+        )
+        cls.croissant, cls.danish = Product.objects.bulk_create([
+            Product(name='Croissant', slug='croissant', product_type='pastry', price=Decimal('350.00')),
+            Product(name='Danish', slug='danish', product_type='pastry', price=Decimal('400.00')),
+        ])
+
+    def setUp(self):
+        pricing.pricing_version.expire()
+        pricing._table = None
+
+    def test_merge_folds_duplicate_lines(self):
+        user_cart = Cart.objects.create(user=self.user)
+        session_cart = Cart.objects.create(session_key='guest')
+        add_cart_item(user_cart, self.croissant, {'quantity': 1})
+        add_cart_item(session_cart, self.croissant, {'quantity': 2})
+        add_cart_item(session_cart, self.danish, {'quantity': 1})
+
+        merged = merge_carts(user_cart, session_cart, self.user)
+
+        self.assertEqual(merged, user_cart)
+        quantities = dict(merged.items.values_list('product__name', 'quantity'))
+        self.assertEqual(quantities, {'Croissant': 3, 'Danish': 1})
+        session_cart.refresh_from_db()
+        self.assertFalse(session_cart.is_active)
+        self.assertFalse(session_cart.items.exists())
+        merged.refresh_from_db()
+        self.assertEqual((merged.item_count, merged.subtotal), (4, Decimal('1450.00')))
+
+    def test_merge_without_user_cart_adopts_the_session_cart(self):
+        session_cart = Cart.objects.create(session_key='guest')
+        add_cart_item(session_cart, self.croissant, {'quantity': 1})
+
+        merged = merge_carts(None, session_cart, self.user)
+
+        self.assertEqual(merged.pk, session_cart.pk)
+        self.assertEqual(merged.user, self.user)
+        self.assertIsNone(merged.session_key)
+
+
+class BatchAddToCartTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.croissant, cls.danish = Product.objects.bulk_create([
+            Product(name='Croissant', slug='croissant', product_type='pastry', price=Decimal('350.00')),
+            Product(name='Danish', slug='danish', product_type='pastry', price=Decimal('400.00')),
+        ])
+
+    def setUp(self):
+        pricing.pricing_version.expire()
+        pricing._table = None
+
+    def post(self, items):
+        return self.client.post('/api/cart/add/batch/', {'items': items}, content_type='application/json')
+
+    def test_batch_add_creates_and_folds_lines(self):
+        response = self.post([
+            {'product_id': self.croissant.pk, 'quantity': 1},
+            {'product_id': self.danish.pk, 'quantity': 2},
+            {'product_id': self.croissant.pk, 'quantity': 1},
+        ])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['cart_item_count'], 4)
+
+        response = self.post([{'product_id': self.danish.pk, 'quantity': 1}])
+        self.assertEqual(response.status_code, 200)
+        cart = Cart.objects.get()
+        self.assertEqual(dict(cart.items.values_list('product__name', 'quantity')), {'Croissant': 2, 'Danish': 3})
+        self.assertEqual(cart.subtotal, Decimal('1900.00'))
+
+    def test_invalid_line_adds_nothing(self):
+        response = self.post([
+            {'product_id': self.croissant.pk, 'quantity': 1},
+            {'product_id': 0, 'quantity': 1},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(CartItem.objects.exists())
+
+
+class PriceMatrixTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        CakeSizeMultiplier.objects.bulk_create([
+            CakeSizeMultiplier(size='6', multiplier=Decimal('1.00')),
+            CakeSizeMultiplier(size='8', multiplier=Decimal('1.50')),
+        ])
+        CakeFlavorPrice.objects.bulk_create([
+            CakeFlavorPrice(flavor='Chocolate', price_multiplier=Decimal('1.15')),
+            CakeFlavorPrice(flavor='Vanilla', price_multiplier=Decimal('1.00')),
+        ])
+        cls.cake, cls.pastry = Product.objects.bulk_create([
+            Product(
+                name='Butterfly Cake', slug='butterfly-cake', product_type='cake',
+                price=Decimal('333.33'), layers=2, covering='fondant', preparation_days=2
+            ),
+            Product(name='Croissant', slug='croissant', product_type='pastry', price=Decimal('350.00')),
+        ])
+
+    def setUp(self):
+        cache.clear()
+        pricing.pricing_version.expire()
+        pricing._table = None
+
+    def get(self, product, **headers):
+        return self.client.get(f'/api/cart/price-matrix/{product.pk}/', **headers)
+
+    def test_matrix_prices_match_cart_lines(self):
+        matrix = self.get(self.cake).json()
+        self.assertEqual(matrix['sizes'], ['6', '8'])
+        self.assertEqual(
+            matrix['flavours'], [['Chocolate', ''], ['Vanilla', ''], ['Chocolate', 'Vanilla']]
+        )
+        # 333.33 x 1.50 = 499.995: exact, not rounded to cents
+        self.assertEqual(matrix['unit_prices'][1][1], '499.995')
+
+        cart = Cart.objects.create(session_key='guest')
+        for i, size in enumerate(matrix['sizes']):
+            for j, (flavour_1, flavour_2) in enumerate(matrix['flavours']):
+                item = CartItem(
+                    cart=cart, product=self.cake, size=size, flavour_1=flavour_1, flavour_2=flavour_2
+                )
+                with self.subTest(size=size, flavours=(flavour_1, flavour_2)):
+                    self.assertEqual(Decimal(matrix['unit_prices'][i][j]), item.unit_price)
+
+    def test_etag_and_not_modified(self):
+        response = self.get(self.cake)
+        response = self.get(self.cake, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_only_for_cakes(self):
+        self.assertEqual(self.get(self.pastry).status_code, 400)
+
+
+class CartItemAdminTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = get_user_model().objects.create_superuser(
+            email='admin@example.com', username='admin', first_name='Ada', last_name='Obi', password='x'
+        )
+        cls.pastry, = Product.objects.bulk_create([
+            Product(name='Croissant', slug='croissant', product_type='pastry', price=Decimal('350.00'))
+        ])
+        cls.balloons, = CakeCustomizationOption.objects.bulk_create([
+            CakeCustomizationOption(name='Balloons', slug='balloons', price_per_unit=Decimal('50.00')),
+        ])
+
+    def setUp(self):
+        pricing.pricing_version.expire()
+        pricing._table = None
+        self.client.force_login(self.admin)
+        self.cart = Cart.objects.create(session_key='guest')
+        self.plain, _ = add_cart_item(self.cart, self.pastry, {'quantity': 1})
+        self.warm, _ = add_cart_item(self.cart, self.pastry, {'quantity': 2, 'additional_notes': 'Warm please'})
+
+    def post(self, item, addons=(), **changes):
+        data = {
+            'cart': item.cart_id, 'product': item.product_id, 'quantity': item.quantity,
+            'flavour_1': '', 'flavour_2': '', 'size': '', 'colours': '',
+            'cake_topper': 0, 'candle': 0, 'birthday_card': 0, 'chocolate': 0, 'wine': 0, 'whiskey_200ml': 0,
+            'additional_notes': item.additional_notes, 'base_price': item.base_price,
+            'customization_cost': item.customization_cost,
+            'dynamic_addons-TOTAL_FORMS': len(addons), 'dynamic_addons-INITIAL_FORMS': 0,
+            'dynamic_addons-MIN_NUM_FORMS': 0, 'dynamic_addons-MAX_NUM_FORMS': 1000,
+        }
+        for index, (addon, quantity) in enumerate(addons):
+            data[f'dynamic_addons-{index}-addon'] = addon.pk
+            data[f'dynamic_addons-{index}-quantity'] = quantity
+        data.update(changes)
+        return self.client.post(f'/admin/cart/cartitem/{item.pk}/change/', data)
+
+    def test_edit_matching_another_line_is_a_form_error(self):
+        response = self.post(self.warm, additional_notes='')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, f'Cart item #{self.plain.pk} already has this product')
+        self.warm.refresh_from_db()
+        self.assertEqual(self.warm.additional_notes, 'Warm please')
+
+    def test_inline_addons_make_the_line_distinct(self):
+        response = self.post(self.warm, addons=[(self.balloons, 2)], additional_notes='')
+
+        self.assertEqual(response.status_code, 302)
+        self.warm.refresh_from_db()
+        self.assertEqual(self.warm.customization_cost, Decimal('100.00'))
+        self.assertEqual(
+            self.warm.customization_fingerprint,
+            compute_fingerprint(self.pastry.pk, {}, {self.balloons.pk: 2}),
+        )
+        self.cart.refresh_from_db()
+        self.assertEqual(self.cart.subtotal, Decimal('1250.00'))
@@ -7,9 +7,11 @@ urlpatterns = [
     # Main cart endpoints
     path('', views.CartDetailView.as_view(), name='cart-detail'),
     path('add/', views.AddToCartView.as_view(), name='cart-add'),
+    path('add/batch/', views.BatchAddToCartView.as_view(), name='cart-add-batch'),
     path('count/', views.CartItemCountView.as_view(), name='cart-count'),
     path('summary/', views.CartSummaryView.as_view(), name='cart-summary'),
     path('calculate-price/', views.CalculatePriceView.as_view(), name='calculate-price'),
+    path('price-matrix/<int:product_id>/', views.PriceMatrixView.as_view(), name='price-matrix'),
     
     # Cart item endpoints
     path('items/<int:item_id>/', views.CartItemDetailView.as_view(), name='cart-item-detail'),
@@ -1,7 +1,9 @@
 from django.db import transaction
-from django.db.models import Sum
+from django.db.models import F, prefetch_related_objects
 from django.db.utils import IntegrityError
 
+from .fingerprints import FINGERPRINT_FIELDS, compute_fingerprint, normalize_addons
+
 
 def get_or_create_cart(request):
     """
@@ -113,12 +115,134 @@ def create_new_cart(request):
     return cart
 
 
+def add_cart_item(cart, product, data):
+    """
+    Add a validated AddToCartSerializer line to `cart`.
+
+    The line is found by customization fingerprint: an identical line gets
+    its quantity increased in a single indexed UPDATE, otherwise the line
+    and its dynamic addons are created. Returns (cart_item, created).
+    """
+    from .models import CartItem
+
+    quantity = data.get('quantity', 1)
+    addons = normalize_addons(
+        (addon['addon_id'], addon['quantity']) for addon in data.get('addons', [])
+    )
+    fingerprint = compute_fingerprint(product.id, data, addons)
+    lines = CartItem.objects.filter(cart=cart, customization_fingerprint=fingerprint)
+
+    with transaction.atomic():
+        cart.lock()
+        if lines.update(quantity=F('quantity') + quantity):
+            cart.refresh_totals()
+            return lines.get(), False
+
+        cart_item = CartItem(
+            cart=cart,
+            product=product,
+            quantity=quantity,
+            base_price=product.price,
+            **{field: data.get(field, default) for field, default in FINGERPRINT_FIELDS.items()}
+        )
+        cart_item.set_pending_addons(addons)
+        try:
+            with transaction.atomic():
+                cart_item.save()
+                cart_item.create_pending_addons()
+        except IntegrityError:
+            # A concurrent request created the same line first
+            lines.update(quantity=F('quantity') + quantity)
+            cart.refresh_totals()
+            return lines.get(), False
+
+        cart.refresh_totals()
+
+    return cart_item, True
+
+
+def add_cart_items(cart, lines):
+    """
+    Add validated BatchAddToCartSerializer lines (each with its `product`)
+    to `cart` in one transaction.
+
+    Lines are matched by customization fingerprint, with each other and
+    with the cart's lines: matching cart lines get their quantity increased
+    in one bulk_update, the others are created with one bulk_create for the
+    items and one for their dynamic addons. Returns (created, updated).
+    """
+    from .models import CartItem, CartItemAddon
+
+    batch = {}
+    for data in lines:
+        addons = normalize_addons(
+            (addon['addon_id'], addon['quantity']) for addon in data.get('addons', [])
+        )
+        fingerprint = compute_fingerprint(data['product'].id, data, addons)
+        if fingerprint in batch:
+            batch[fingerprint]['quantity'] += data.get('quantity', 1)
+        else:
+            batch[fingerprint] = {'data': data, 'addons': addons, 'quantity': data.get('quantity', 1)}
+
+    with transaction.atomic():
+        cart.lock()
+        existing_items = {
+            item.customization_fingerprint: item
+            for item in CartItem.objects.filter(
+                cart=cart, customization_fingerprint__in=list(batch)
+            ).only('id', 'quantity', 'customization_fingerprint')
+        }
+
+        updated_items, new_items = [], []
+        for fingerprint, line in batch.items():
+            existing_item = existing_items.get(fingerprint)
+            if existing_item:
+                existing_item.quantity += line['quantity']
+                updated_items.append(existing_item)
+                continue
+
+            data = line['data']
+            cart_item = CartItem(
+                cart=cart,
+                product=data['product'],
+                quantity=line['quantity'],
+                base_price=data['product'].price,
+                customization_fingerprint=fingerprint,
+                **{field: data.get(field, default) for field, default in FINGERPRINT_FIELDS.items()}
+            )
+            cart_item.set_pending_addons(line['addons'])
+            cart_item.customization_cost = cart_item.calculate_addons_cost()
+            # The model checks save()'s full_clean() would add to the serializer's
+            cart_item.clean()
+            new_items.append(cart_item)
+
+        if updated_items:
+            CartItem.objects.bulk_update(updated_items, ['quantity'])
+        if new_items:
+            CartItem.objects.bulk_create(new_items)
+            CartItemAddon.objects.bulk_create([
+                CartItemAddon(cart_item=cart_item, addon_id=addon_id, quantity=quantity)
+                for cart_item in new_items
+                for addon_id, quantity in cart_item.get_addon_quantities().items()
+            ])
+
+        cart.refresh_totals()
+
+    return len(new_items), len(updated_items)
+
+
 @transaction.atomic
 def merge_carts(user_cart, session_cart, user):
     """
     Merge guest session cart into user cart when user logs in.
+
+    Both carts and their items are locked and loaded in one query each.
+    Guest lines whose fingerprint is already in the user cart are folded
+    into that line (one bulk_update), the others are reassigned in one
+    UPDATE and the folded ones removed in one DELETE. Quantities are the
+    only thing that changes, so no item is re-validated or re-priced.
     """
-    from .models import CartItem
+    from .models import Cart, CartItem
 
     if not user_cart:
         session_cart.user = user
@@ -126,36 +250,76 @@ def merge_carts(user_cart, session_cart, user):
         session_cart.save()
         return session_cart
 
-    for session_item in session_cart.items.all():
-        existing_item = user_cart.items.filter(
-            product=session_item.product,
-            flavour_1=session_item.flavour_1,
-            flavour_2=session_item.flavour_2,
-            size=session_item.size,
-            colours=session_item.colours,
-            cake_topper=session_item.cake_topper,
-            candle=session_item.candle,
-            birthday_card=session_item.birthday_card,
-            chocolate=session_item.chocolate,
-            wine=session_item.wine,
-            whiskey_200ml=session_item.whiskey_200ml,
-            additional_notes=session_item.additional_notes,
-        ).first()
-
+    # Lock in id order so two merges touching the same carts cannot deadlock
+    list(
+        Cart.objects.select_for_update()
+        .filter(pk__in=[user_cart.pk, session_cart.pk])
+        .order_by('pk')
+        .values_list('pk', flat=True)
+    )
+    items = list(
+        CartItem.objects.select_for_update()
+        .filter(cart__in=[user_cart.pk, session_cart.pk])
+        .order_by('pk')
+        .only('id', 'cart_id', 'quantity', 'customization_fingerprint')
+    )
+
+    existing_items = {
+        item.customization_fingerprint: item
+        for item in items if item.cart_id == user_cart.pk
+    }
+    updated_items, moved_ids, folded_ids = [], [], []
+    for session_item in items:
+        if session_item.cart_id != session_cart.pk:
+            continue
+        existing_item = existing_items.get(session_item.customization_fingerprint)
         if existing_item:
             existing_item.quantity += session_item.quantity
-            existing_item.save()
-            session_item.delete()
+            updated_items.append(existing_item)
+            folded_ids.append(session_item.pk)
         else:
-            session_item.cart = user_cart
-            session_item.save()
+            moved_ids.append(session_item.pk)
+
+    if updated_items:
+        CartItem.objects.bulk_update(updated_items, ['quantity'])
+    if moved_ids:
+        CartItem.objects.filter(pk__in=moved_ids).update(cart=user_cart)
+    if folded_ids:
+        CartItem.objects.filter(pk__in=folded_ids).delete()
 
     session_cart.is_active = False
     session_cart.save()
+    session_cart.refresh_totals()
+    user_cart.refresh_totals()
 
     return user_cart
 
 
+def prefetch_cart_items(cart):
+    """
+    Load a cart's items with their products and dynamic addons in one go,
+    so pricing every item (against the in-memory pricing table) and
+    serializing the cart don't issue per-item queries.
+    """
+    if cart is not None:
+        prefetch_related_objects(
+            [cart],
+            'items__product',
+            'items__dynamic_addons__addon',
+        )
+    return cart
+
+
+def refresh_stale_totals(cart):
+    """
+    Re-price the stored cart totals if the pricing has changed since they
+    were computed (see Cart.refresh_totals).
+    """
+    if cart is not None and not cart.totals_are_current():
+        cart.refresh_totals()
+    return cart
+
+
 def get_cart_item_count(request):
     """
     Get total number of items in cart without creating one if it doesn't exist.
@@ -163,8 +327,7 @@ def get_cart_item_count(request):
     cart = get_cart_if_exists(request)
     if not cart:
         return 0
-    result = cart.items.aggregate(total=Sum('quantity'))
-    return result['total'] or 0
+    return cart.item_count
 
 
 def clear_cart(request):
@@ -172,5 +335,7 @@ def clear_cart(request):
     Clear all items from cart.
     """
     cart = get_or_create_cart(request)
-    cart.items.all().delete()
+    with transaction.atomic():
+        cart.items.all().delete()
+        cart.refresh_totals()
     return cart
\ No newline at end of file
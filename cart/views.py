@@ -1,27 +1,34 @@
 from rest_framework import status, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.shortcuts import get_object_or_404
 from django.db import transaction
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from decimal import Decimal
 
-from cart.models import Cart, CartItem, DeliveryInfo, CartItemAddon, CakeCustomizationOption
+from cart.models import Cart, CartItem, DeliveryInfo
+from cart.pricing import get_pricing_table, get_price_matrix, get_price_matrix_etag
 from products.models import Product
 from cart.utils import (
+    add_cart_item,
+    add_cart_items,
     get_or_create_cart,
     get_cart_if_exists,
     get_cart_item_count,
     clear_cart,
     merge_carts,
+    prefetch_cart_items,
+    refresh_stale_totals,
 )
 from .serializers import (
-    CartSerializer, CartItemSerializer, AddToCartSerializer,
+    CartSerializer, CartItemSerializer, AddToCartSerializer, BatchAddToCartSerializer,
     UpdateCartItemSerializer, PriceCalculationSerializer,
     DeliveryInfoSerializer, GuestCartMergeSerializer
 )
 from delivery.models import DeliveryService
+from bake_world.conditional import conditional_response
 
 
 # ============================================================================
@@ -41,7 +48,8 @@ class CartDetailView(APIView):
         responses={200: openapi.Response(description="Cart retrieved successfully.")}
     )
     def get(self, request):
-        cart = get_or_create_cart(request)
+        cart = refresh_stale_totals(get_or_create_cart(request))
+        prefetch_cart_items(cart)
         return Response(CartSerializer(cart).data)
 
     @swagger_auto_schema(
@@ -83,89 +91,58 @@ class AddToCartView(APIView):
         product = serializer.context['product']
         cart = get_or_create_cart(request)
 
-        existing_item = CartItem.objects.filter(
-            cart=cart,
-            product=product,
-            flavour_1=data.get('flavour_1', ''),
-            flavour_2=data.get('flavour_2', ''),
-            size=data.get('size', ''),
-            colours=data.get('colours', ''),
-            cake_topper=data.get('cake_topper', 0),
-            candle=data.get('candle', 0),
-            birthday_card=data.get('birthday_card', 0),
-            chocolate=data.get('chocolate', 0),
-            wine=data.get('wine', 0),
-            whiskey_200ml=data.get('whiskey_200ml', 0),
-            additional_notes=data.get('additional_notes', '')
-        ).first()
-
-        if existing_item:
-            existing_item.quantity += data.get('quantity', 1)
-            existing_item.save()
-
-            for addon_input in data.get('addons', []):
-                try:
-                    addon = CakeCustomizationOption.objects.get(
-                        id=addon_input['addon_id'], is_active=True
-                    )
-                    addon_obj, created = CartItemAddon.objects.get_or_create(
-                        cart_item=existing_item,
-                        addon=addon,
-                        defaults={'quantity': addon_input['quantity']}
-                    )
-                    if not created:
-                        addon_obj.quantity += addon_input['quantity']
-                        addon_obj.save()
-                except CakeCustomizationOption.DoesNotExist:
-                    pass
+        cart_item, created = add_cart_item(cart, product, data)
 
+        if not created:
             return Response({
                 'message': f"Updated quantity of {product.name} in cart.",
-                'cart_item': CartItemSerializer(existing_item).data,
+                'cart_item': CartItemSerializer(cart_item).data,
                 'cart_item_count': get_cart_item_count(request)
             }, status=status.HTTP_200_OK)
 
-        else:
-            cart_item = CartItem(
-                cart=cart,
-                product=product,
-                quantity=data.get('quantity', 1),
-                flavour_1=data.get('flavour_1', ''),
-                flavour_2=data.get('flavour_2', ''),
-                size=data.get('size', ''),
-                colours=data.get('colours', ''),
-                cake_topper=data.get('cake_topper', 0),
-                candle=data.get('candle', 0),
-                birthday_card=data.get('birthday_card', 0),
-                chocolate=data.get('chocolate', 0),
-                wine=data.get('wine', 0),
-                whiskey_200ml=data.get('whiskey_200ml', 0),
-                additional_notes=data.get('additional_notes', ''),
-                base_price=product.price
-            )
-            cart_item.save()
+        return Response({
+            'message': f"Added {product.name} to cart.",
+            'cart_item': CartItemSerializer(cart_item).data,
+            'cart_item_count': get_cart_item_count(request)
+        }, status=status.HTTP_201_CREATED)
 
-            for addon_input in data.get('addons', []):
-                try:
-                    addon = CakeCustomizationOption.objects.get(
-                        id=addon_input['addon_id'], is_active=True
-                    )
-                    CartItemAddon.objects.create(
-                        cart_item=cart_item,
-                        addon=addon,
-                        quantity=addon_input['quantity']
-                    )
-                except CakeCustomizationOption.DoesNotExist:
-                    pass
-
-            cart_item.customization_cost = cart_item.calculate_addons_cost()
-            cart_item.save()
 
-            return Response({
-                'message': f"Added {product.name} to cart.",
-                'cart_item': CartItemSerializer(cart_item).data,
-                'cart_item_count': get_cart_item_count(request)
-            }, status=status.HTTP_201_CREATED)
+class BatchAddToCartView(APIView):
+    """
+    POST /api/cart/add/batch/ - Add several items to cart at once
+    """
+    permission_classes = [permissions.AllowAny]
+
+    @swagger_auto_schema(
+        operation_summary="Add Items to Cart in Batch",
+        operation_description=(
+            "Add up to 50 products with their customization options in one request "
+            "(reorders, party bundles). Lines identical to an existing cart item, or "
+            "to each other, update its quantity. All lines are added or none is."
+        ),
+        request_body=BatchAddToCartSerializer,
+        responses={
+            201: openapi.Response(description="Items added to cart."),
+            200: openapi.Response(description="Existing items' quantities updated."),
+            400: openapi.Response(description="Validation error."),
+        }
+    )
+    def post(self, request):
+        serializer = BatchAddToCartSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        cart = get_or_create_cart(request)
+        try:
+            created, updated = add_cart_items(cart, serializer.validated_data['items'])
+        except DjangoValidationError as exc:
+            return Response({'error': exc.messages}, status=status.HTTP_400_BAD_REQUEST)
+
+        prefetch_cart_items(cart)
+        return Response({
+            'message': f"Added {created} new and updated {updated} existing items in cart.",
+            'cart': CartSerializer(cart).data,
+            'cart_item_count': cart.item_count
+        }, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
 
 
 class CartItemDetailView(APIView):
@@ -177,7 +154,9 @@ class CartItemDetailView(APIView):
 
     def get_object(self, request, item_id):
         cart = get_or_create_cart(request)
-        return get_object_or_404(CartItem, id=item_id, cart=cart)
+        cart_item = get_object_or_404(CartItem, id=item_id, cart=cart)
+        cart_item.cart = cart
+        return cart_item
 
     @swagger_auto_schema(
         operation_summary="Update Cart Item",
@@ -198,20 +177,24 @@ class CartItemDetailView(APIView):
         action = data.get('action', 'set')
         quantity = data.get('quantity', 1)
 
-        if action == 'set':
-            cart_item.quantity = quantity
-        elif action == 'increase':
-            cart_item.quantity += quantity
-        elif action == 'decrease':
-            if cart_item.quantity <= quantity:
-                cart_item.delete()
-                return Response({
-                    'message': 'Item removed from cart.',
-                    'cart_item_count': get_cart_item_count(request)
-                })
-            cart_item.quantity -= quantity
-
-        cart_item.save()
+        with transaction.atomic():
+            if action == 'set':
+                cart_item.quantity = quantity
+            elif action == 'increase':
+                cart_item.quantity += quantity
+            elif action == 'decrease':
+                if cart_item.quantity <= quantity:
+                    cart_item.delete()
+                    cart_item.cart.refresh_totals()
+                    return Response({
+                        'message': 'Item removed from cart.',
+                        'cart_item_count': get_cart_item_count(request)
+                    })
+                cart_item.quantity -= quantity
+
+            cart_item.save()
+            cart_item.cart.refresh_totals()
+
         return Response({
             'message': 'Cart item updated successfully.',
             'cart_item': CartItemSerializer(cart_item).data,
@@ -229,7 +212,9 @@ class CartItemDetailView(APIView):
     def delete(self, request, item_id):
         cart_item = self.get_object(request, item_id)
         product_name = cart_item.product.name
-        cart_item.delete()
+        with transaction.atomic():
+            cart_item.delete()
+            cart_item.cart.refresh_totals()
         return Response({
             'message': f'{product_name} removed from cart.',
             'cart_item_count': get_cart_item_count(request)
@@ -258,6 +243,7 @@ class CalculatePriceView(APIView):
         data = serializer.validated_data
         product = serializer.context['product']
 
+        pricing = get_pricing_table()
         temp_item = CartItem(
             product=product,
             base_price=product.price,
@@ -272,10 +258,11 @@ class CalculatePriceView(APIView):
             whiskey_200ml=data.get('whiskey_200ml', 0)
         )
 
-        unit_price = temp_item.calculate_total_price()
-        addons_cost = temp_item.calculate_addons_cost()
-        size_multiplier = temp_item.get_size_multiplier()
-        flavor_multiplier = temp_item.get_flavor_multiplier()
+        # Priced entirely from the in-memory pricing table — no DB queries
+        size_multiplier = pricing.size_multiplier(temp_item.size)
+        flavor_multiplier = pricing.flavor_multiplier(temp_item.flavour_1, temp_item.flavour_2)
+        addons_cost = pricing.legacy_addons_cost(temp_item)
+        unit_price = product.price * size_multiplier * flavor_multiplier + addons_cost
 
         return Response({
             'product_id': product.id,
@@ -290,6 +277,46 @@ class CalculatePriceView(APIView):
         })
 
 
+class PriceMatrixView(APIView):
+    """
+    GET /api/cart/price-matrix/<product_id>/ - Unit prices of a cake for
+    every size and flavour choice, so the customize page can price locally.
+
+    unit_prices[i][j] is the price for sizes[i] and flavours[j], before
+    addons (their prices come with the customization options). Prices are
+    exact, not rounded to cents, so they match the cart's line prices; a
+    total is rounded once, like the cart subtotal. Cached per product and
+    pricing version, with an ETag for conditional requests.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    @swagger_auto_schema(
+        operation_summary="Get Price Matrix",
+        operation_description="Unit price of a cake for every size and flavour (or flavour pair), before add-ons.",
+        responses={
+            200: openapi.Response(description="Price matrix returned."),
+            304: openapi.Response(description="Prices unchanged since the given ETag."),
+            400: openapi.Response(description="This endpoint is only for cakes."),
+            404: openapi.Response(description="Product not found."),
+        }
+    )
+    def get(self, request, product_id):
+        product = get_object_or_404(
+            Product.objects.filter(available=True).only('id', 'price', 'product_type'),
+            pk=product_id
+        )
+        if not product.is_cake:
+            return Response(
+                {'error': 'This endpoint is only for cakes.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return conditional_response(
+            request, get_price_matrix_etag(product), None,
+            lambda: Response(get_price_matrix(product)[0])
+        )
+
+
 class CartItemCountView(APIView):
     """
     GET /api/cart/count/ - Get total number of items in cart
@@ -329,6 +356,9 @@ class CartSummaryView(APIView):
                 'items': []
             })
 
+        refresh_stale_totals(cart)
+        prefetch_cart_items(cart)
+
         items_data = []
         for item in cart.items.all():
             items_data.append({
@@ -391,7 +421,7 @@ class DeliveryInfoView(APIView):
         }
     )
     def post(self, request):
-        cart = get_or_create_cart(request)
+        cart = refresh_stale_totals(get_or_create_cart(request))
         delivery_info, created = DeliveryInfo.objects.get_or_create(cart=cart)
 
         serializer = DeliveryInfoSerializer(delivery_info, data=request.data, partial=True)
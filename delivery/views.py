@@ -2,9 +2,10 @@ from rest_framework import generics, status, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.db.models import Q, Count, Max
 from decimal import Decimal
 
+from bake_world.conditional import ConditionalGetMixin, make_etag
 from delivery.models import (
     DeliveryZone, DeliveryPricingRule, 
     DeliverySchedule, DeliveryException, DeliveryService
@@ -23,11 +24,12 @@ from .serializers import (
 # PUBLIC VIEWS
 # ============================================================================
 
-class DeliveryZoneListView(generics.ListAPIView):
+class DeliveryZoneListView(ConditionalGetMixin, generics.ListAPIView):
     """
     GET /api/delivery/zones/
     
     List all active delivery zones.
+    Supports If-None-Match / If-Modified-Since from the zones' updated_at.
     """
     permission_classes = [permissions.AllowAny]
     serializer_class = DeliveryZoneListSerializer
@@ -36,6 +38,14 @@ class DeliveryZoneListView(generics.ListAPIView):
         """Return active zones ordered by display order."""
         return DeliveryZone.objects.filter(status='active').order_by('display_order', 'name')
 
+    def get_validators(self, request):
+        """One aggregate query; the zone count catches deletions/deactivations."""
+        stats = DeliveryZone.objects.filter(status='active').aggregate(
+            total=Count('id'), last_modified=Max('updated_at')
+        )
+        etag = make_etag('zones', request.get_full_path(), stats['total'], stats['last_modified'])
+        return etag, stats['last_modified']
+
 
 class DeliveryZoneDetailView(generics.RetrieveAPIView):
     """
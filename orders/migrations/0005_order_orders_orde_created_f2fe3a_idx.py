@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0005_cartitemaddon'),
+        ('orders', '0004_alter_orderitem_additional_notes_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['-created_at', '-id'], name='orders_orde_created_f2fe3a_idx'),
+        ),
+    ]
@@ -246,6 +246,7 @@ class Order(models.Model):
             models.Index(fields=['paystack_transaction_id']),
             models.Index(fields=['paystack_reference']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['-created_at', '-id']),
         ]
     
     def __str__(self):
@@ -917,6 +918,9 @@ def create_order_from_cart(cart, customer_data, delivery_data, payment_method=''
     from django.db import transaction
     
     with transaction.atomic():
+        # Price the order with the current pricing, like its items below
+        cart.refresh_totals()
+
         # 1. Create the Order
         order = Order.objects.create(
             user=cart.user,
@@ -0,0 +1,13 @@
+from products.pagination import KeysetPagination
+
+
+class OrderKeysetPagination(KeysetPagination):
+    """
+    Keyset pagination for order listings, newest first, seeking on
+    (created_at, id). Counts are cached per user for a short while.
+    """
+    ordering = ('-created_at', '-id')
+    count_cache_timeout = 60
+
+    def get_count_cache_prefix(self, request, view):
+        return f"orders:count:user{request.user.pk}"
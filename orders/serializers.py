@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.conf import settings
 from django.utils import timezone
+from bake_world.fieldsets import SparseFieldsetMixin
 from orders.models import (
     Order, OrderItem, OrderDelivery, OrderHistory, OrderPayment,
     ORDER_STATUS_CHOICES, PAYMENT_STATUS_CHOICES
@@ -127,7 +128,7 @@ class OrderPaymentSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'processed_at']
 
 
-class OrderListSerializer(serializers.ModelSerializer):
+class OrderListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Simplified serializer for order list views.
     """
@@ -153,13 +154,21 @@ class OrderListSerializer(serializers.ModelSerializer):
             'item_count', 'delivery_address', 'delivery_date',
             'created_at', 'completed_at'
         ]
+        # Related data is loaded separately, no extra Order columns needed
+        sparse_sources = {
+            'status_display': ('status',),
+            'payment_status_display': ('payment_status',),
+            'item_count': (),
+            'delivery_address': (),
+            'delivery_date': (),
+        }
 
     def get_item_count(self, obj):
         """Get total number of items in order."""
         return obj.items.count()
 
 
-class OrderDetailSerializer(serializers.ModelSerializer):
+class OrderDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Detailed serializer for single order view.
     """
@@ -206,6 +215,16 @@ class OrderDetailSerializer(serializers.ModelSerializer):
             'ready_at', 'completed_at', 'cancelled_at',
             'cancellation_reason', 'admin_notes'
         ]
+        sparse_sources = {
+            'status_display': ('status',),
+            'payment_status_display': ('payment_status',),
+            'payment_method_display': (),
+            'customer_type': ('user',),
+            'items': (),
+            'delivery': (),
+            'history': (),
+            'payments': (),
+        }
 
     def get_payment_method_display(self, obj):
         """Always return Paystack as the payment method."""
@@ -3,6 +3,8 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
 from django.db import transaction
+from django.db.models import Count, Max
+from django.http import Http404
 from django.utils.timezone import now
 from django.conf import settings
 from drf_yasg.utils import swagger_auto_schema
@@ -15,6 +17,10 @@ from orders.emails import (
     send_order_status_update,
 )
 from cart.models import Cart, DeliveryInfo
+from bake_world.fieldsets import SparseFieldsetViewMixin
+from bake_world.conditional import conditional_response, make_etag
+from products.pagination import KeysetPaginationMixin
+from .pagination import OrderKeysetPagination
 from .serializers import (
     OrderListSerializer, OrderDetailSerializer, CreateOrderSerializer,
     OrderCancelSerializer, OrderStatusUpdateSerializer, OrderPaymentUpdateSerializer
@@ -36,13 +42,17 @@ class IsOrderOwnerOrAdmin(permissions.BasePermission):
         return False
 
 
-class OrderListView(generics.ListAPIView):
+class OrderListView(KeysetPaginationMixin, SparseFieldsetViewMixin, generics.ListAPIView):
     """
     GET /api/orders/
     List orders for the current user.
+
+    Pass ?pagination=cursor for keyset pagination (newest first) and
+    ?fields= / ?omit= for a sparse fieldset.
     """
     serializer_class = OrderListSerializer
     permission_classes = [permissions.IsAuthenticated]
+    keyset_pagination_class = OrderKeysetPagination
 
     def get_queryset(self):
         user = self.request.user
@@ -62,12 +72,12 @@ class OrderListView(generics.ListAPIView):
             if date_to:
                 queryset = queryset.filter(created_at__date__lte=date_to)
 
-            return queryset.order_by('-created_at')
+            return queryset.order_by('-created_at', '-id')
 
-        return Order.objects.filter(user=user).order_by('-created_at')
+        return Order.objects.filter(user=user).order_by('-created_at', '-id')
 
 
-class OrderDetailView(generics.RetrieveAPIView):
+class OrderDetailView(SparseFieldsetViewMixin, generics.RetrieveAPIView):
     """
     GET /api/orders/<id>/
     Get detailed information about a specific order.
@@ -348,6 +358,20 @@ class TrackOrderView(APIView):
         }
     )
     def get(self, request, id):
+        # Validators from one cheap query; a matching client copy gets a
+        # 304 before the order and its history are loaded.
+        state = Order.objects.filter(id=id).annotate(
+            history_count=Count('history'),
+            history_last=Max('history__timestamp'),
+        ).values('updated_at', 'history_count', 'history_last').first()
+        if state is None:
+            raise Http404('No Order matches the given query.')
+
+        last_modified = max(filter(None, [state['updated_at'], state['history_last']]))
+        etag = make_etag('track', id, state['updated_at'], state['history_count'], state['history_last'])
+        return conditional_response(request, etag, last_modified, lambda: self._build_response(id))
+
+    def _build_response(self, id):
         order = get_object_or_404(Order, id=id)
 
         data = {
@@ -45,7 +45,7 @@ class CategoryAdmin(admin.ModelAdmin):
     image_preview.short_description = 'Preview'
 
     def product_count(self, obj):
-        return obj.products.filter(available=True).count()
+        return obj.product_count
     product_count.short_description = 'Products'
 
 
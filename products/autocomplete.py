@@ -0,0 +1,207 @@
+"""
+In-process prefix index for search-box autocomplete.
+
+Product (available only) and category names are tokenized and kept in a
+sorted array of (token, entry id) pairs; a prefix lookup is two bisects.
+The arrays are replaced wholesale on every change (copy-on-write), so
+lookups never take a lock.
+
+Each process builds its own index lazily for the current catalog version.
+A Product/Category save or delete updates it incrementally once the change
+commits (products/signals.py). If the catalog moved on by more than that
+one change (another process wrote), the index is rebuilt on the next
+lookup instead.
+"""
+import bisect
+import heapq
+import re
+import threading
+import unicodedata
+
+from .cache import get_catalog_version
+
+
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Sorts after every character: (prefix + _MAX_CHAR,) bounds a prefix range
+_MAX_CHAR = chr(0x10FFFF)
+
+
+def normalize(text):
+    """Lowercase and strip accents, so 'Crème' matches 'creme'."""
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in text if not unicodedata.combining(c)).lower()
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(normalize(text))
+
+
+class PrefixIndex:
+
+    def __init__(self):
+        self.version = None
+        self.entries = {}
+        self.keys = []
+        self.categories = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _indexed(entry):
+        """
+        Stored form of an entry: (payload, name tokens, normalized name,
+        query-independent part of its rank).
+        """
+        tokens = tuple(tokenize(entry['name']))
+        static_rank = (0 if entry['type'] == 'category' else 1, len(entry['name']), entry['name'])
+        return entry, tokens, ' '.join(tokens), static_rank
+
+    @staticmethod
+    def _entry_keys(entry_id, indexed):
+        return [(token, entry_id) for token in set(indexed[1])]
+
+    def rebuild(self):
+        from .models import Category, Product
+
+        version = get_catalog_version()
+        categories = {
+            row['id']: row for row in Category.objects.values('id', 'name', 'slug')
+        }
+        entries = {}
+        for row in categories.values():
+            entries[('category', row['id'])] = self._indexed({
+                'type': 'category', 'id': row['id'], 'name': row['name'], 'slug': row['slug'],
+            })
+        for row in Product.objects.filter(available=True).values('id', 'name', 'slug', 'category_id'):
+            entries[('product', row['id'])] = self._indexed(self._product_entry(row, categories))
+
+        keys = []
+        for entry_id, entry in entries.items():
+            keys.extend(self._entry_keys(entry_id, entry))
+        keys.sort()
+
+        with self._lock:
+            self.entries, self.keys, self.categories = entries, keys, categories
+            self.version = version
+
+    @staticmethod
+    def _product_entry(row, categories):
+        category = categories.get(row['category_id'])
+        return {
+            'type': 'product', 'id': row['id'], 'name': row['name'], 'slug': row['slug'],
+            'category': category['slug'] if category else None,
+        }
+
+    def ensure_current(self):
+        if self.version != get_catalog_version():
+            self.rebuild()
+
+    # ------------------------------------------------------------------
+    # Incremental updates
+    # ------------------------------------------------------------------
+
+    def _replace(self, entry_id, entry):
+        """Swap one entry (None removes it) in new copies of the arrays."""
+        entries = dict(self.entries)
+        keys = list(self.keys)
+
+        old = entries.pop(entry_id, None)
+        if old is not None:
+            for key in self._entry_keys(entry_id, old):
+                position = bisect.bisect_left(keys, key)
+                if position < len(keys) and keys[position] == key:
+                    del keys[position]
+        if entry is not None:
+            indexed = self._indexed(entry)
+            entries[entry_id] = indexed
+            for key in self._entry_keys(entry_id, indexed):
+                bisect.insort(keys, key)
+        return entries, keys
+
+    def apply_change(self, kind, pk, obj):
+        """
+        on_commit hook for a saved Product or Category, or a deleted one
+        (obj=None; Django clears a deleted instance's pk, hence `pk`).
+        Applied in place only if its transaction made the only bump since
+        the index was built. A transaction bumps the version once, so its
+        other changes find the version already applied.
+        """
+        with self._lock:
+            version = get_catalog_version()
+            if self.version is None or version not in (self.version, self.version + 1):
+                # Missed other changes; the next lookup rebuilds
+                return
+
+            entry_id = (kind, pk)
+            categories = self.categories
+            if kind == 'category':
+                categories = dict(categories)
+                if obj is None:
+                    categories.pop(pk, None)
+                    entry = None
+                else:
+                    categories[pk] = {'id': pk, 'name': obj.name, 'slug': obj.slug}
+                    entry = {'type': 'category', 'id': pk, 'name': obj.name, 'slug': obj.slug}
+                previous = self.categories.get(pk)
+                if previous is not None and (obj is None or obj.slug != previous['slug']):
+                    # Products carry the category slug; cheaper to rebuild
+                    self.version = None
+                    return
+            elif obj is None or not obj.available:
+                entry = None
+            else:
+                entry = self._product_entry(
+                    {'id': pk, 'name': obj.name, 'slug': obj.slug, 'category_id': obj.category_id},
+                    categories,
+                )
+
+            entries, keys = self._replace(entry_id, entry)
+            self.entries, self.keys, self.categories = entries, keys, categories
+            self.version = version
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        """
+        Entries whose name has a word starting with each query word, ranked:
+        name starts with the query, categories first, shorter names first.
+        """
+        self.ensure_current()
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        entries, keys = self.entries, self.keys
+        # Candidates from the term with the fewest matches, checked against the rest
+        ranges = []
+        for term in terms:
+            start = bisect.bisect_left(keys, (term,))
+            ranges.append((start, bisect.bisect_left(keys, (term + _MAX_CHAR,), start)))
+        start, end = min(ranges, key=lambda bounds: bounds[1] - bounds[0])
+        candidates = {keys[position][1] for position in range(start, end)}
+
+        normalized_query = ' '.join(terms)
+        matches = []
+        for entry_id in candidates:
+            indexed = entries.get(entry_id)
+            if indexed is None:
+                continue
+            entry, tokens, name, static_rank = indexed
+            # Candidates already match the pivot term; check the others
+            if len(terms) > 1 and not all(any(t.startswith(term) for t in tokens) for term in terms):
+                continue
+            matches.append((not name.startswith(normalized_query), static_rank, entry))
+
+        return [match[2] for match in heapq.nsmallest(limit, matches, key=lambda match: match[:2])]
+
+
+autocomplete_index = PrefixIndex()
@@ -0,0 +1,422 @@
+"""
+Bulk product writes: import/export (see the import_products /
+export_products management commands) and batch updates from the admin API.
+
+Rows are streamed from CSV or JSON Lines, validated with the rules of
+ProductCreateUpdateSerializer and upserted in batches keyed on
+(category, slug) with bulk_create / bulk_update. Bulk writes skip
+Product.save() and the model signals, so after_bulk_write() brings the
+product cards, the search index, the category counters and the catalog
+cache up to date.
+"""
+import csv
+import json
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+from rest_framework import serializers
+
+from bake_world.versions import on_commit_once
+
+from .cache import bump_catalog_version
+from .cards import refresh_product_cards
+from .counters import recount_categories
+from .models import Category, Product
+from .search import get_search_backend
+from .serializers import ProductCreateUpdateSerializer, ProductListSerializer
+
+
+FORMATS = ('csv', 'jsonl')
+
+# Columns written by export_products and read by import_products.
+# `category` is the category slug.
+PRODUCT_COLUMNS = [
+    'category', 'slug', 'name', 'product_type', 'description', 'price',
+    'available', 'layers', 'covering', 'inspiration', 'preparation_days',
+]
+
+# Changes that move a product between category counters (products/counters.py)
+COUNTER_CHANGES = {'category', 'product_type', 'available'}
+
+# Model fields an import can change (category and slug form the key)
+UPDATE_FIELDS = [
+    'name', 'product_type', 'description', 'price', 'available',
+    'layers', 'covering', 'inspiration', 'preparation_days',
+]
+
+
+def detect_format(path, default='csv'):
+    if path.endswith('.jsonl') or path.endswith('.ndjson'):
+        return 'jsonl'
+    if path.endswith('.csv'):
+        return 'csv'
+    return default
+
+
+def read_rows(stream, fmt):
+    """Yield (line_number, row dict) from a CSV or JSON Lines stream."""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, ValueError(f'Invalid JSON: {e}')
+            continue
+        if not isinstance(row, dict):
+            yield line_number, ValueError('Expected a JSON object.')
+            continue
+        yield line_number, row
+
+
+def write_rows(stream, fmt, rows):
+    """Write product value dicts (PRODUCT_COLUMNS) as CSV or JSON Lines."""
+    written = 0
+    if fmt == 'csv':
+        writer = csv.DictWriter(stream, fieldnames=PRODUCT_COLUMNS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({key: '' if value is None else value for key, value in row.items()})
+            written += 1
+        return written
+
+    for row in rows:
+        stream.write(json.dumps(row, default=_json_default) + '\n')
+        written += 1
+    return written
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def export_queryset(queryset):
+    """Stream products as PRODUCT_COLUMNS dicts without building model instances."""
+    values = queryset.order_by('category__slug', 'slug', 'id').values(
+        'category__slug', *PRODUCT_COLUMNS[1:]
+    )
+    for row in values.iterator(chunk_size=2000):
+        row['category'] = row.pop('category__slug')
+        yield {column: row[column] for column in PRODUCT_COLUMNS}
+
+
+class ProductImportSerializer(ProductCreateUpdateSerializer):
+    """
+    ProductCreateUpdateSerializer with the category given by slug and
+    resolved from a preloaded map (context['categories']), so validating a
+    row costs no queries. Images are not imported.
+    """
+    category = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+    slug = serializers.SlugField(max_length=200, required=False, allow_null=True, allow_blank=True)
+
+    class Meta(ProductCreateUpdateSerializer.Meta):
+        fields = PRODUCT_COLUMNS
+
+    def get_validators(self):
+        # (category, slug) uniqueness is the upsert key, resolved per batch,
+        # so skip the per-row UniqueTogetherValidator query
+        return []
+
+    def validate_category(self, value):
+        if not value:
+            return None
+        category = self.context['categories'].get(value)
+        if category is None:
+            raise serializers.ValidationError(f'Unknown category "{value}".')
+        return category
+
+
+def clean_row(row):
+    """
+    Keep known columns and drop blank CSV cells, so a new row gets the
+    model defaults and an existing row keeps its current values.
+    """
+    cleaned = {}
+    for key, value in row.items():
+        if key not in PRODUCT_COLUMNS:
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+            if not value:
+                continue
+        cleaned[key] = value
+    return cleaned
+
+
+def format_errors(errors):
+    parts = []
+    for field, messages in errors.items():
+        if not isinstance(messages, (list, tuple)):
+            messages = [messages]
+        parts.append(f"{field}: {' '.join(str(m) for m in messages)}")
+    return '; '.join(parts)
+
+
+class ProductImporter:
+    """
+    Upserts product rows in batches. Rows that fail validation are recorded
+    in `errors` as (line_number, message) and skipped; the run continues.
+    """
+
+    def __init__(self, batch_size=500, dry_run=False):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.categories = {category.slug: category for category in Category.objects.all()}
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.errors = []
+        self.touched_ids = set()
+        # Categories whose available-product counters may have changed
+        self.recount_ids = set()
+        self.full_reindex = False
+
+    @property
+    def processed(self):
+        return self.created + self.updated + self.unchanged + len(self.errors)
+
+    def run(self, rows):
+        batch = []
+        for line_number, row in rows:
+            if isinstance(row, Exception):
+                self.errors.append((line_number, str(row)))
+                continue
+            batch.append((line_number, clean_row(row)))
+            if len(batch) >= self.batch_size:
+                self._process_batch(batch)
+                batch = []
+        if batch:
+            self._process_batch(batch)
+
+        if (self.touched_ids or self.full_reindex) and not self.dry_run:
+            after_bulk_write(None if self.full_reindex else self.touched_ids, self.recount_ids)
+
+    def _row_key(self, row):
+        category = self.categories.get(row.get('category') or '')
+        slug = row.get('slug') or slugify(row.get('name') or '')
+        return (category.pk if category else None, slug)
+
+    def _load_existing(self, keys):
+        """Existing products for the batch keys, in one query per category."""
+        slugs_by_category = {}
+        for category_id, slug in keys:
+            slugs_by_category.setdefault(category_id, set()).add(slug)
+
+        existing = {}
+        for category_id, slugs in slugs_by_category.items():
+            queryset = Product.objects.filter(slug__in=slugs).order_by('id')
+            if category_id is None:
+                queryset = queryset.filter(category__isnull=True)
+            else:
+                queryset = queryset.filter(category_id=category_id)
+            for product in queryset:
+                # Uncategorized products may share a slug (NULLs are distinct); oldest wins
+                existing.setdefault((category_id, product.slug), product)
+        return existing
+
+    def _process_batch(self, batch):
+        existing = self._load_existing({self._row_key(row) for _, row in batch})
+        context = {'categories': self.categories}
+        now = timezone.now()
+
+        to_create = {}
+        to_update = {}
+        changed_fields = set()
+        recount_ids = set()
+        for line_number, row in batch:
+            key = self._row_key(row)
+            instance = to_create.get(key) or to_update.get(key) or existing.get(key)
+            stored = instance is not None and instance.pk is not None
+            # Rows for existing products only change the columns they set
+            serializer = ProductImportSerializer(
+                instance=instance if stored else None,
+                data=row,
+                context=context,
+                partial=stored,
+            )
+            if not serializer.is_valid():
+                self.errors.append((line_number, format_errors(serializer.errors)))
+                continue
+
+            data = serializer.validated_data
+            data['slug'] = data.get('slug') or key[1]
+            if instance is None:
+                instance = Product(**data)
+                to_create[key] = instance
+                recount_ids.add(key[0])
+                self.created += 1
+                continue
+
+            # category and slug are the key, so only the other fields can differ
+            changes = {
+                field: value for field, value in data.items()
+                if field in UPDATE_FIELDS and getattr(instance, field) != value
+            }
+            if not changes:
+                self.unchanged += 1
+                continue
+            for field, value in changes.items():
+                setattr(instance, field, value)
+            if instance.pk:
+                instance.updated_at = now
+                changed_fields.update(changes)
+                to_update[key] = instance
+                if COUNTER_CHANGES & set(changes):
+                    recount_ids.add(key[0])
+            # A repeated key within the batch updates the pending row
+            self.updated += 1
+
+        if self.dry_run:
+            return
+
+        with transaction.atomic():
+            if to_create:
+                created = Product.objects.bulk_create(list(to_create.values()), batch_size=self.batch_size)
+                # Backends that can't return ids from bulk_create get a full reindex
+                self.full_reindex = self.full_reindex or any(product.pk is None for product in created)
+                self.touched_ids.update(product.pk for product in created if product.pk)
+            if to_update:
+                # Only the columns that changed somewhere in this batch
+                fields = [field for field in UPDATE_FIELDS if field in changed_fields] + ['updated_at']
+                Product.objects.bulk_update(list(to_update.values()), fields, batch_size=self.batch_size)
+                self.touched_ids.update(product.pk for product in to_update.values())
+            self.recount_ids.update(recount_ids)
+
+
+class ProductBatchChangeSerializer(ProductCreateUpdateSerializer):
+    """Partial changes of one batch operation; images can't be batched."""
+
+    class Meta(ProductCreateUpdateSerializer.Meta):
+        fields = [field for field in ProductCreateUpdateSerializer.Meta.fields if field != 'image']
+
+
+def _error(result, errors):
+    result.pop('changed', None)
+    result.update(status='error', errors=errors)
+
+
+def batch_update_products(operations, context=None):
+    """
+    Validate every {slug, category, changes} operation, then apply them all
+    in one transaction with a single bulk_update.
+
+    Returns (results, applied): one result per operation, in order. Nothing
+    is written unless every operation is valid.
+    """
+    slugs = {operation['slug'] for operation in operations}
+    candidates = {}
+    for product in Product.objects.filter(slug__in=slugs).select_related('category').order_by('id'):
+        candidates.setdefault(product.slug, []).append(product)
+
+    results = []
+    pending = {}
+    changed_fields = set()
+    recount_ids = set()
+    now = timezone.now()
+    for index, operation in enumerate(operations):
+        result = {'index': index, 'slug': operation['slug']}
+        results.append(result)
+
+        matches = candidates.get(operation['slug'], [])
+        if operation.get('category'):
+            matches = [p for p in matches if p.category and p.category.slug == operation['category']]
+        if not matches:
+            _error(result, {'slug': ['No product matches this slug.']})
+            continue
+        if len(matches) > 1:
+            _error(result, {'category': ['Several products share this slug; pass the category slug.']})
+            continue
+        product = matches[0]
+        if product.pk in pending:
+            _error(result, {'slug': ['Duplicate operation for this product.']})
+            continue
+
+        serializer = ProductBatchChangeSerializer(product, data=operation['changes'], partial=True)
+        if not serializer.is_valid():
+            _error(result, serializer.errors)
+            continue
+
+        changes = {
+            field: value for field, value in serializer.validated_data.items()
+            if getattr(product, field) != value
+        }
+        if COUNTER_CHANGES & set(changes):
+            # Both the old and the new category when the product moves
+            recount_ids.add(product.category_id)
+        for field, value in changes.items():
+            setattr(product, field, value)
+        if 'name' in changes:
+            # Same rule as ProductCreateUpdateSerializer.update()
+            product.slug = slugify(product.name)
+            changes['slug'] = product.slug
+
+        result['changed'] = sorted(changes)
+        result['status'] = 'updated' if changes else 'unchanged'
+        if changes:
+            product.updated_at = now
+            changed_fields.update(changes)
+        pending[product.pk] = (result, product)
+        if COUNTER_CHANGES & set(changes):
+            recount_ids.add(product.category_id)
+
+    # Renamed or moved products must not collide with each other or with
+    # products outside the batch (one query)
+    keys = {}
+    moved = [p for result, p in pending.values() if {'slug', 'category'} & set(result['changed'])]
+    taken = set(
+        Product.objects.filter(slug__in={p.slug for p in moved}).exclude(pk__in=pending)
+        .values_list('category_id', 'slug')
+    ) if moved else set()
+    for result, product in pending.values():
+        key = (product.category_id, product.slug)
+        if key in keys or (key in taken and product in moved):
+            _error(result, {'name': ['Another product in this category already uses this slug.']})
+        keys[key] = product.pk
+
+    if any(result['status'] == 'error' for result in results):
+        # Valid operations were not written either
+        for result in results:
+            if result['status'] != 'error':
+                result['status'] = 'not_applied'
+        return results, False
+
+    updated = [product for result, product in pending.values() if result['status'] == 'updated']
+    if updated:
+        with transaction.atomic():
+            Product.objects.bulk_update(updated, sorted(changed_fields) + ['updated_at'])
+            after_bulk_write([product.pk for product in updated], recount_ids)
+
+    # Reloaded for their rebuilt cards
+    products = Product.objects.select_related('category').in_bulk(list(pending))
+    for product_id, (result, _) in pending.items():
+        result['product'] = ProductListSerializer(products[product_id], context=context).data
+    return results, True
+
+
+def after_bulk_write(product_ids, category_ids=None):
+    """
+    Redo what Product.save() and the signals would have done for rows
+    written with bulk_create / bulk_update / update(). `product_ids=None`
+    reindexes every product. `category_ids` are the categories whose
+    counters the write may have changed; None recounts every category.
+    """
+    refresh_product_cards(product_ids)
+
+    backend = get_search_backend()
+    if product_ids is None:
+        backend.rebuild()
+    else:
+        backend.index_products(product_ids)
+    recount_categories(category_ids)
+    on_commit_once(bump_catalog_version)
@@ -0,0 +1,101 @@
+"""
+Versioned response cache for the public catalog endpoints.
+
+Every cached catalog response is keyed by the current catalog version, so
+bumping the version (on any Product or Category save/delete, see
+products/signals.py) makes all previously cached pages unreachable at once.
+Stale entries simply expire after CATALOG_CACHE_TIMEOUT.
+
+The version is the CatalogVersion row, not a cache entry: with the default
+per-process LocMem cache a cached counter would only be bumped in the
+worker that saved the change (see bake_world/versions.py).
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+from bake_world.versions import VersionCounter
+
+
+catalog_version = VersionCounter('products.CatalogVersion')
+
+
+def get_catalog_cache_timeout():
+    return getattr(settings, 'CATALOG_CACHE_TIMEOUT', 3600)
+
+
+def get_catalog_version():
+    """Current catalog version, shared by all processes through the database."""
+    return catalog_version.get()
+
+
+def get_catalog_last_modified():
+    """When the catalog version was last bumped."""
+    return catalog_version.get_modified()
+
+
+def bump_catalog_version():
+    """Invalidate every cached catalog response."""
+    return catalog_version.bump()
+
+
+def normalize_query_params(query_params):
+    """
+    Stable, order-independent representation of a query string.
+    Blank values are dropped and ?page=1 is treated as no page at all.
+    """
+    items = []
+    for key in sorted(query_params.keys()):
+        values = sorted(v.strip() for v in query_params.getlist(key) if v.strip())
+        if key == 'page' and values == ['1']:
+            continue
+        for value in values:
+            items.append(f"{key}={value}")
+    return '&'.join(items)
+
+
+def catalog_cache_key(request, prefix='catalog'):
+    """
+    Cache key for a catalog request: version + host + path + normalized query.
+    The host is included because paginated responses carry absolute links.
+    """
+    raw = '|'.join([
+        request.get_host(),
+        request.path,
+        normalize_query_params(request.query_params),
+    ])
+    digest = hashlib.md5(raw.encode('utf-8')).hexdigest()
+    return f"{prefix}:v{get_catalog_version()}:{digest}"
+
+
+def cached_catalog_response(request, build_response):
+    """
+    Return the cached response data for this catalog request, or call
+    `build_response()` and cache its data if it succeeded. The compressed
+    body is cached under the same key (see bake_world/compression.py).
+    """
+    key = catalog_cache_key(request)
+    data = cache.get(key)
+    if data is not None:
+        response = Response(data)
+    else:
+        response = build_response()
+        if response.status_code == 200:
+            cache.set(key, response.data, get_catalog_cache_timeout())
+    # Lets ApiCompressionMiddleware cache the compressed body too
+    response.compression_cache_key = key
+    return response
+
+
+class CatalogCacheMixin:
+    """
+    Serve GET responses of a public catalog view from the versioned cache.
+    Only successful responses are stored. Views that define their own
+    get() call cached_catalog_response() directly instead.
+    """
+
+    def get(self, request, *args, **kwargs):
+        parent_get = super().get
+        return cached_catalog_response(request, lambda: parent_get(request, *args, **kwargs))
@@ -0,0 +1,136 @@
+"""
+Precomputed product cards: the ProductListSerializer payload of each product,
+stored in its `card` JSON column.
+
+List endpoints used to join the category, resolve display values and build
+image URLs for every row of every page. The card holds the finished
+payload instead, so serializing a list row is a dict lookup and list views
+only load (id, ordering keys, card).
+
+Cards are rebuilt in the same transaction as the change that affects them:
+Product.save() when a CARD_SOURCE_FIELDS value changed, Category.save()
+on a rename (the card embeds the category name), the category delete
+signals and after_bulk_write() for bulk paths. A card
+built by another version of ProductListSerializer (CARD_VERSION) is stale
+and the row is serialized live; `manage.py rebuild_product_cards` refreshes
+them after a deploy.
+"""
+from bake_world.fieldsets import narrow_queryset
+
+
+# Bump whenever ProductListSerializer's output changes
+CARD_VERSION = 1
+
+# What list views load when every row is served from its card
+CARD_MODEL_PATHS = ('card',)
+
+# Product columns the card is built from; other changes keep the card
+CARD_SOURCE_FIELDS = (
+    'name', 'slug', 'product_type', 'image', 'image_variants', 'price', 'available',
+    'category_id', 'created_at', 'layers', 'covering', 'preparation_days',
+)
+
+
+def build_card(product):
+    """Card document of `product`, serialized live."""
+    from .serializers import ProductListSerializer
+
+    serializer = ProductListSerializer()
+    # Bypass ProductListSerializer.to_representation, which reads the card
+    data = super(ProductListSerializer, serializer).to_representation(product)
+    return {'version': CARD_VERSION, 'data': dict(data)}
+
+
+def card_source_state(product):
+    """
+    The CARD_SOURCE_FIELDS values of `product`, or None if some are
+    deferred. Product.save() rebuilds the card only when this changed.
+    """
+    from .images import get_image_source
+
+    if not all(field in product.__dict__ for field in CARD_SOURCE_FIELDS):
+        return None
+    return tuple(
+        get_image_source(product.image) if field == 'image' else product.__dict__[field]
+        for field in CARD_SOURCE_FIELDS
+    )
+
+
+def get_card(product):
+    """Stored card payload, or None if it is deferred, missing or stale."""
+    card = product.__dict__.get('card')
+    if not card or card.get('version') != CARD_VERSION:
+        return None
+    return card['data']
+
+
+def card_is_stale(product):
+    """Card loaded but unusable (deferred cards don't count)."""
+    return 'card' in product.__dict__ and get_card(product) is None
+
+
+def refresh_cards(queryset, batch_size=500):
+    """
+    Rebuild the cards of the products in `queryset`, writing only those
+    that changed. Returns the number of cards written.
+    """
+    from .models import Product
+
+    changed = []
+    written = 0
+    for product in queryset.select_related('category').order_by('id').iterator(chunk_size=batch_size):
+        card = build_card(product)
+        if card != product.card:
+            product.card = card
+            changed.append(product)
+        if len(changed) >= batch_size:
+            Product.objects.bulk_update(changed, ['card'])
+            written += len(changed)
+            changed = []
+    if changed:
+        Product.objects.bulk_update(changed, ['card'])
+        written += len(changed)
+    return written
+
+
+def refresh_product_cards(product_ids=None, batch_size=500):
+    """refresh_cards() for these product ids (every product if None), in chunks."""
+    from .models import Product
+
+    if product_ids is None:
+        return refresh_cards(Product.objects.all(), batch_size)
+    product_ids = sorted(product_ids)
+    written = 0
+    for start in range(0, len(product_ids), batch_size):
+        chunk = product_ids[start:start + batch_size]
+        written += refresh_cards(Product.objects.filter(pk__in=chunk), batch_size)
+    return written
+
+
+def with_live_rows(products):
+    """
+    `products` with stale-card rows replaced by fully loaded ones (one
+    query), so they can be serialized live.
+    """
+    from .models import Product
+
+    stale = [product.pk for product in products if card_is_stale(product)]
+    if not stale:
+        return products
+    loaded = Product.objects.select_related('category').in_bulk(stale)
+    return [loaded.get(product.pk, product) for product in products]
+
+
+class ProductCardViewMixin:
+    """
+    View mixin for ProductListSerializer lists: narrows GET querysets to
+    the columns the cards need. Requests with a sparse fieldset keep the
+    SparseFieldsetViewMixin narrowing and are serialized live.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        request = getattr(self, 'request', None)
+        if request is not None and request.method == 'GET' and not self.get_sparse_fieldset():
+            queryset = narrow_queryset(queryset, CARD_MODEL_PATHS)
+        return queryset
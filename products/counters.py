@@ -0,0 +1,110 @@
+"""
+Denormalized available-product counters on Category.
+
+Each Category stores how many *available* products of each product_type it
+holds (Category.available_cake_count / available_pastry_count). A product
+counts towards exactly one counter: the one for its (category, product_type),
+and only while it is available. Product.save() and the post_delete signal
+move that contribution with F() updates in the same transaction as the row
+change. Bulk updates bypass this, so `manage.py recount_category_products`
+recomputes every counter from one grouped query.
+
+The counters are part of the category payload, so every counter write also
+bumps Category.updated_at for delta-sync clients (products/sync.py).
+"""
+from django.db.models import Count, F
+from django.utils import timezone
+
+
+# product_type -> Category counter column
+COUNTER_FIELDS = {
+    'cake': 'available_cake_count',
+    'pastry': 'available_pastry_count',
+}
+
+COUNTER_STATE_FIELDS = ('category_id', 'product_type', 'available')
+
+
+def counter_key(category_id, product_type, available):
+    """The (category_id, counter field) a product counts towards, or None."""
+    if not available or not category_id or product_type not in COUNTER_FIELDS:
+        return None
+    return (category_id, COUNTER_FIELDS[product_type])
+
+
+def product_counter_key(product):
+    return counter_key(product.category_id, product.product_type, product.available)
+
+
+def stored_counter_key(product):
+    """Counter key of the product as currently stored in the database."""
+    from products.models import Product
+
+    row = Product.objects.filter(pk=product.pk).values(*COUNTER_STATE_FIELDS).first()
+    if row is None:
+        return None
+    return counter_key(row['category_id'], row['product_type'], row['available'])
+
+
+def adjust_counter(key, delta):
+    if key is None or not delta:
+        return
+    from products.models import Category
+
+    category_id, field = key
+    Category.objects.filter(pk=category_id).update(**{field: F(field) + delta, 'updated_at': timezone.now()})
+
+
+def move_counter(old_key, new_key):
+    """Move one product's contribution from old_key to new_key."""
+    if old_key == new_key:
+        return
+    adjust_counter(old_key, -1)
+    adjust_counter(new_key, 1)
+
+
+def recount_categories(category_ids=None):
+    """
+    Recompute the category counters with one grouped query and one
+    bulk_update: every category, or only `category_ids`. Returns the
+    number of categories whose counters changed.
+    """
+    from products.models import Category, Product
+
+    products = Product.objects.filter(available=True, category__isnull=False)
+    categories = Category.objects.only('id', *COUNTER_FIELDS.values())
+    if category_ids is not None:
+        category_ids = {pk for pk in category_ids if pk}
+        if not category_ids:
+            return 0
+        products = products.filter(category_id__in=category_ids)
+        categories = categories.filter(pk__in=category_ids)
+
+    counts = {}
+    rows = (
+        products
+        .values('category_id', 'product_type')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    for row in rows:
+        field = COUNTER_FIELDS.get(row['product_type'])
+        if field:
+            counts[(row['category_id'], field)] = row['total']
+
+    changed = []
+    now = timezone.now()
+    for category in categories:
+        dirty = False
+        for field in COUNTER_FIELDS.values():
+            expected = counts.get((category.pk, field), 0)
+            if getattr(category, field) != expected:
+                setattr(category, field, expected)
+                dirty = True
+        if dirty:
+            category.updated_at = now
+            changed.append(category)
+
+    if changed:
+        Category.objects.bulk_update(changed, [*COUNTER_FIELDS.values(), 'updated_at'], batch_size=500)
+    return len(changed)
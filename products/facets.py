@@ -0,0 +1,136 @@
+"""
+Facet counts for the storefront filter sidebar.
+
+All facets (product type, category, covering, layers, price band) come from
+one grouped aggregation over the filtered queryset: rows are grouped on
+every facet column at once and the per-facet counts are summed up in
+Python. The result is cached per catalog version and filter combination,
+so paging through results reuses it.
+"""
+import hashlib
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Case, CharField, Count, Q, Value, When
+
+from .cache import get_catalog_cache_timeout, get_catalog_version, normalize_query_params
+from .models import Product
+
+
+# (value, label, min price inclusive, max price exclusive)
+PRICE_BANDS = [
+    ('under-10000', 'Under 10,000', None, Decimal('10000')),
+    ('10000-25000', '10,000 - 25,000', Decimal('10000'), Decimal('25000')),
+    ('25000-50000', '25,000 - 50,000', Decimal('25000'), Decimal('50000')),
+    ('50000-plus', '50,000 and above', Decimal('50000'), None),
+]
+
+# Query params that change the facet counts (pagination and output
+# shape params don't)
+FACET_FILTER_PARAMS = (
+    'search', 'product_type', 'category', 'category_slug',
+    'covering', 'layers', 'price_band',
+)
+
+
+def _price_band_q(band):
+    _, _, low, high = band
+    condition = Q()
+    if low is not None:
+        condition &= Q(price__gte=low)
+    if high is not None:
+        condition &= Q(price__lt=high)
+    return condition
+
+
+def price_band_expression():
+    return Case(
+        *[When(_price_band_q(band), then=Value(band[0])) for band in PRICE_BANDS],
+        output_field=CharField(),
+    )
+
+
+def filter_price_band(queryset, value):
+    for band in PRICE_BANDS:
+        if band[0] == value:
+            return queryset.filter(_price_band_q(band))
+    return queryset
+
+
+def compute_facets(queryset):
+    """Every facet's counts from a single GROUP BY over `queryset`."""
+    rows = (
+        queryset.order_by()
+        .annotate(price_band=price_band_expression())
+        .values(
+            'product_type', 'category_id', 'category__name', 'category__slug',
+            'covering', 'layers', 'price_band',
+        )
+        .annotate(total=Count('id'))
+    )
+
+    product_types = {}
+    categories = {}
+    coverings = {}
+    layers = {}
+    price_bands = {}
+    for row in rows:
+        total = row['total']
+        product_types[row['product_type']] = product_types.get(row['product_type'], 0) + total
+        if row['category_id'] is not None:
+            key = (row['category_id'], row['category__slug'], row['category__name'])
+            categories[key] = categories.get(key, 0) + total
+        if row['covering']:
+            coverings[row['covering']] = coverings.get(row['covering'], 0) + total
+        if row['layers'] is not None:
+            layers[row['layers']] = layers.get(row['layers'], 0) + total
+        if row['price_band']:
+            price_bands[row['price_band']] = price_bands.get(row['price_band'], 0) + total
+
+    type_labels = dict(Product.PRODUCT_TYPES)
+    covering_labels = dict(Product.COVERING_CHOICES)
+    return {
+        'product_type': [
+            {'value': value, 'label': label, 'count': product_types[value]}
+            for value, label in type_labels.items() if value in product_types
+        ],
+        'category': [
+            {'value': slug, 'id': category_id, 'label': name, 'count': count}
+            for (category_id, slug, name), count in sorted(categories.items(), key=lambda item: item[0][2])
+        ],
+        'covering': [
+            {'value': value, 'label': label, 'count': coverings[value]}
+            for value, label in covering_labels.items() if value in coverings
+        ],
+        'layers': [
+            {'value': value, 'label': str(value), 'count': layers[value]}
+            for value in sorted(layers)
+        ],
+        'price_band': [
+            {
+                'value': value, 'label': label, 'count': price_bands[value],
+                'min': str(low) if low is not None else None,
+                'max': str(high) if high is not None else None,
+            }
+            for value, label, low, high in PRICE_BANDS if value in price_bands
+        ],
+    }
+
+
+def facets_cache_key(request):
+    params = request.query_params.copy()
+    for key in list(params.keys()):
+        if key not in FACET_FILTER_PARAMS:
+            del params[key]
+    digest = hashlib.md5(normalize_query_params(params).encode('utf-8')).hexdigest()
+    return f"catalog:v{get_catalog_version()}:facets:{digest}"
+
+
+def get_facets(request, queryset):
+    """Cached facet counts for this request's filter combination."""
+    key = facets_cache_key(request)
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(queryset)
+        cache.set(key, facets, get_catalog_cache_timeout())
+    return facets
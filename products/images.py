@@ -0,0 +1,115 @@
+"""
+Precomputed image variant URLs for Product and Category.
+
+Building a Cloudinary URL with a transformation list is pure CPU work, but
+list endpoints used to do it four times per product per request. The URLs
+only change when the image changes, so they are built once and stored in the
+model's `image_variants` JSON column together with the public_id they were
+built from. A stale or missing entry falls back to building on the fly.
+
+With IMAGE_BACKEND = 'local' the same variants are files rendered next to
+the original under MEDIA_ROOT (see products/local_images.py).
+"""
+from cloudinary import CloudinaryImage
+
+from products.local_images import (
+    build_local_image_url,
+    build_local_variant_url,
+    use_local_images,
+)
+
+
+PRODUCT_IMAGE_VARIANTS = {
+    'thumbnail': [
+        {'width': 150, 'height': 150, 'crop': 'fill', 'gravity': 'center'},
+        {'quality': 'auto', 'fetch_format': 'auto'},
+    ],
+    'medium': [
+        {'width': 400, 'height': 300, 'crop': 'fit'},
+        {'quality': 'auto', 'fetch_format': 'auto'},
+    ],
+    'large': [
+        {'width': 800, 'height': 600, 'crop': 'fit'},
+        {'quality': 'auto', 'fetch_format': 'auto'},
+    ],
+}
+
+CATEGORY_IMAGE_VARIANTS = {}
+
+
+def get_image_source(image):
+    """Identifier of the stored image the variants were built from."""
+    if not image:
+        return None
+    return getattr(image, 'public_id', None) or str(image)
+
+
+def build_image_url(image):
+    """Full URL of the original image."""
+    if not image:
+        return None
+    if use_local_images():
+        return build_local_image_url(image)
+    return image.url
+
+
+def build_image_variant(image, name, variants):
+    """Build a single variant URL from its transformation list."""
+    if not image or name not in variants:
+        return None
+    if use_local_images():
+        return build_local_variant_url(image, name)
+    return CloudinaryImage(image.public_id).build_url(transformation=variants[name])
+
+
+def build_image_variants(image, variants):
+    """
+    Build the full variant document stored in `image_variants`:
+    {'source': <public_id>, 'original': <url>, '<variant>': <url>, ...}
+    """
+    if not image:
+        return {}
+    document = {
+        'source': get_image_source(image),
+        'original': build_image_url(image),
+    }
+    for name in variants:
+        document[name] = build_image_variant(image, name, variants)
+    return document
+
+
+class ImageVariantsMixin:
+    """
+    Model mixin serving image URLs from the precomputed `image_variants`
+    column. Subclasses set `IMAGE_VARIANTS` to their transformation map.
+    """
+    IMAGE_VARIANTS = {}
+
+    def image_variants_stale(self):
+        variants = self.image_variants or {}
+        return variants.get('source') != get_image_source(self.image)
+
+    def refresh_image_variants(self):
+        """Recompute the stored variants from the current image."""
+        self.image_variants = build_image_variants(self.image, self.IMAGE_VARIANTS)
+        return self.image_variants
+
+    def get_image_variant(self, name):
+        """Stored URL for a variant ('original', 'thumbnail', ...)."""
+        if not self.image:
+            return None
+        if not self.image_variants_stale() and name in self.image_variants:
+            return self.image_variants[name]
+        if name == 'original':
+            return build_image_url(self.image)
+        return build_image_variant(self.image, name, self.IMAGE_VARIANTS)
+
+    def save_image_variants_if_stale(self):
+        """
+        Persist fresh variants after save when the image changed.
+        Runs after the storage backend has uploaded the file, so the
+        public_id is final; uses a plain UPDATE to avoid a save loop.
+        """
+        if self.pk and self.image_variants_stale():
+            self.refresh_image_variants()
+            type(self).objects.filter(pk=self.pk).update(image_variants=self.image_variants)
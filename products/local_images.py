@@ -0,0 +1,160 @@
+"""
+Local image storage for deployments without Cloudinary (IMAGE_BACKEND =
+'local'): development, tests and offline setups.
+
+Uploads to Product.image / Category.image are written under MEDIA_ROOT, in
+the field's Cloudinary folder, and the column keeps the usual
+"image/upload/<path>.<ext>" value. The thumbnail/medium/large variants
+are generated with Pillow from the same transformation maps used for
+Cloudinary (products/images.py). They are stored next to the original as
+`<name>.<variant>.webp`, or `.jpg` when Pillow lacks WebP support, and
+served through the same `*_image_url` properties and precomputed
+`image_variants` URLs.
+
+Variants are rendered IMAGE_VARIANT_WORKERS at a time: the variants of
+an upload in threads at save time (Pillow releases the GIL while it
+resizes and encodes, and no worker outlives the request), every image at
+once in a process pool with `manage.py backfill_image_variants`.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from cloudinary import CloudinaryResource
+from cloudinary.models import CloudinaryField
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import UploadedFile
+from django.utils import timezone
+from PIL import Image, ImageOps, features
+
+
+VARIANT_FORMAT = 'webp' if features.check('webp') else 'jpeg'
+VARIANT_EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+VARIANT_QUALITY = 82
+
+
+def use_local_images():
+    return getattr(settings, 'IMAGE_BACKEND', 'cloudinary') == 'local'
+
+
+def get_storage():
+    return FileSystemStorage(location=settings.MEDIA_ROOT, base_url=settings.MEDIA_URL)
+
+
+def get_image_path(image):
+    """Path of a stored image relative to MEDIA_ROOT."""
+    public_id = getattr(image, 'public_id', None) or str(image)
+    image_format = getattr(image, 'format', None)
+    return f'{public_id}.{image_format}' if image_format else public_id
+
+
+def get_variant_path(path, name):
+    stem, _ = os.path.splitext(path)
+    return f'{stem}.{name}.{VARIANT_EXTENSIONS[VARIANT_FORMAT]}'
+
+
+def get_resize_options(transformation):
+    """(width, height, crop) from a Cloudinary transformation list."""
+    for step in transformation:
+        if 'width' in step or 'height' in step:
+            return step.get('width'), step.get('height'), step.get('crop', 'fit')
+    return None, None, 'fit'
+
+
+def render_variant(source, target, width, height, crop):
+    """
+    Write one resized copy of `source` to `target` (absolute paths).
+    May run in a worker process, so it only takes plain arguments.
+    """
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        # JPEG has no alpha channel; WebP keeps transparency
+        keep_alpha = VARIANT_FORMAT == 'webp' and image.has_transparency_data
+        image = image.convert('RGBA' if keep_alpha else 'RGB')
+
+        size = (width or image.width, height or image.height)
+        if crop == 'fill':
+            image = ImageOps.fit(image, size, method=Image.LANCZOS, centering=(0.5, 0.5))
+        else:
+            # 'fit': within the box, never upscaled
+            image.thumbnail(size, Image.LANCZOS)
+
+        tmp_target = f'{target}.tmp{os.getpid()}'
+        image.save(tmp_target, format=VARIANT_FORMAT.upper(), quality=VARIANT_QUALITY, optimize=True)
+        os.replace(tmp_target, target)
+    return target
+
+
+def get_variant_workers():
+    return getattr(settings, 'IMAGE_VARIANT_WORKERS', os.cpu_count() or 1)
+
+
+def generate_variants(paths, variants, force=False, executor=None):
+    """
+    Render `variants` ({name: transformation}) for every image path
+    (relative to MEDIA_ROOT), spread over `executor` if given. Existing
+    files are kept unless `force`. Returns the number of files written.
+    """
+    storage = get_storage()
+    jobs = []
+    for path in paths:
+        source = storage.path(path)
+        if not os.path.isfile(source):
+            continue
+        for name, transformation in variants.items():
+            target = storage.path(get_variant_path(path, name))
+            if force or not os.path.exists(target):
+                jobs.append((source, target, *get_resize_options(transformation)))
+
+    if executor is None or len(jobs) < 2:
+        return len([render_variant(*job) for job in jobs])
+    return len(list(executor.map(render_variant, *zip(*jobs))))
+
+
+def build_local_image_url(image):
+    return get_storage().url(get_image_path(image))
+
+
+def build_local_variant_url(image, name):
+    """URL of a generated variant, or of the original until it exists."""
+    storage = get_storage()
+    path = get_image_path(image)
+    variant_path = get_variant_path(path, name)
+    if storage.exists(variant_path):
+        return storage.url(variant_path)
+    return storage.url(path)
+
+
+class CloudinaryOrLocalField(CloudinaryField):
+    """
+    CloudinaryField that keeps uploads on local disk, with the model's
+    IMAGE_VARIANTS rendered right away, when IMAGE_BACKEND is 'local'.
+    """
+
+    def pre_save(self, model_instance, add):
+        value = getattr(model_instance, self.attname)
+        if not (use_local_images() and isinstance(value, UploadedFile)):
+            return super().pre_save(model_instance, add)
+
+        storage = get_storage()
+        folder = self.options.get('folder', '')
+        filename = storage.get_valid_name(os.path.basename(value.name))
+        name = os.path.join(folder, timezone.now().strftime('%Y/%m/%d'), filename)
+        if hasattr(value, 'seekable') and value.seekable():
+            value.seek(0)
+        path = storage.save(name, value)
+        variants = getattr(model_instance, 'IMAGE_VARIANTS', {})
+        workers = min(get_variant_workers(), len(variants))
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                generate_variants([path], variants, executor=executor)
+        else:
+            generate_variants([path], variants)
+
+        public_id, extension = os.path.splitext(path)
+        resource = CloudinaryResource(
+            public_id=public_id, format=extension.lstrip('.') or None,
+            type=self.type, resource_type=self.resource_type,
+        )
+        setattr(model_instance, self.attname, resource)
+        return self.get_prep_value(resource)
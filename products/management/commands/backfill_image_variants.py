@@ -0,0 +1,80 @@
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand
+
+from products.cache import bump_catalog_version
+from products.cards import refresh_product_cards
+from products.local_images import generate_variants, get_image_path, get_variant_workers, use_local_images
+from products.models import Category, Product
+
+
+class Command(BaseCommand):
+    help = (
+        'Precompute and store image variant URLs for products and categories '
+        '(with IMAGE_BACKEND=local, render the variant files first)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Rows per bulk_update (default: 500)'
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Rebuild every row (and re-render local variant files), not only stale ones'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        force = options['force']
+
+        total = 0
+        for model in (Category, Product):
+            updated = self._backfill(model, batch_size, force)
+            total += updated
+            self.stdout.write(f"{model._meta.verbose_name_plural.title()}: {updated} updated")
+
+        if total:
+            bump_catalog_version()
+
+        self.stdout.write(self.style.SUCCESS(f'\nDone. {total} rows backfilled.'))
+
+    def _backfill(self, model, batch_size, force):
+        queryset = (
+            model.objects.exclude(image__isnull=True).exclude(image='')
+            .only('id', 'image', 'image_variants')
+        )
+
+        local = use_local_images()
+        if local and model.IMAGE_VARIANTS:
+            # All rows' variants at once, spread over a process pool
+            paths = [get_image_path(obj.image) for obj in queryset.iterator(chunk_size=batch_size)]
+            workers = get_variant_workers()
+            with ProcessPoolExecutor(max_workers=workers) if workers > 1 else nullcontext() as executor:
+                rendered = generate_variants(paths, model.IMAGE_VARIANTS, force=force, executor=executor)
+            self.stdout.write(f"{model._meta.verbose_name_plural.title()}: {rendered} variant files rendered")
+
+        batch = []
+        updated_ids = []
+        for obj in queryset.iterator(chunk_size=batch_size):
+            # Local variant URLs change once their files exist, not only with the image
+            if not force and not local and not obj.image_variants_stale():
+                continue
+            previous = obj.image_variants
+            if obj.refresh_image_variants() == previous:
+                continue
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                model.objects.bulk_update(batch, ['image_variants'])
+                updated_ids.extend(o.pk for o in batch)
+                batch = []
+
+        if batch:
+            model.objects.bulk_update(batch, ['image_variants'])
+            updated_ids.extend(o.pk for o in batch)
+
+        if model is Product and updated_ids:
+            # The list cards embed the image URLs
+            refresh_product_cards(updated_ids)
+        return len(updated_ids)
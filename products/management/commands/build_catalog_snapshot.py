@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from products.snapshot import (
+    build_snapshot, get_snapshot_dir, get_snapshot_manifest, snapshot_is_current,
+)
+
+
+class Command(BaseCommand):
+    help = 'Render the static catalog snapshot (JSON, gzip/brotli) into STATIC_ROOT'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--if-stale', action='store_true',
+            help='Only rebuild if the catalog or pricing changed since the last snapshot (for cron)'
+        )
+
+    def handle(self, *args, **options):
+        if options['if_stale']:
+            manifest = get_snapshot_manifest()
+            if snapshot_is_current(manifest):
+                self.stdout.write(f"Snapshot version {manifest['version']} is current, nothing to do.")
+                return
+
+        manifest = build_snapshot()
+        self.stdout.write(self.style.SUCCESS(
+            f"Done. {len(manifest['files'])} snapshot files (version {manifest['version']}) "
+            f"in {get_snapshot_dir()}."
+        ))
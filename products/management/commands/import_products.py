@@ -0,0 +1,58 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.bulk import FORMATS, ProductImporter, detect_format, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Upsert products from a CSV or JSON Lines file, keyed on (category, slug)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Input file, or '-' for stdin")
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Input format (default: from the file extension, else csv)'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Rows per bulk_create / bulk_update (default: 500)'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Validate every row without writing anything'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or detect_format(path)
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+
+        importer = ProductImporter(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        started = time.monotonic()
+
+        if path == '-':
+            importer.run(read_rows(sys.stdin, fmt))
+        else:
+            try:
+                stream = open(path, newline='', encoding='utf-8-sig')
+            except OSError as e:
+                raise CommandError(f'Cannot open {path}: {e}')
+            with stream:
+                importer.run(read_rows(stream, fmt))
+
+        elapsed = time.monotonic() - started
+        for line_number, message in importer.errors:
+            self.stderr.write(f'Line {line_number}: {message}')
+
+        rate = importer.processed / elapsed if elapsed else importer.processed
+        summary = (
+            f'{importer.created} created, {importer.updated} updated, {importer.unchanged} unchanged, '
+            f'{len(importer.errors)} failed in {elapsed:.2f}s ({rate:.0f} rows/s)'
+        )
+        if options['dry_run']:
+            summary = f'Dry run: {summary}. Nothing was written.'
+        style = self.style.WARNING if importer.errors else self.style.SUCCESS
+        self.stdout.write(style(f'\nDone. {summary}'))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from products.cache import bump_catalog_version
+from products.cards import refresh_product_cards
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the precomputed list payload (card) of every product'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Rows per bulk_update (default: 500)'
+        )
+
+    def handle(self, *args, **options):
+        written = refresh_product_cards(batch_size=options['batch_size'])
+        if written:
+            bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS(f'Done. {written} product cards rebuilt.'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from products.cache import bump_catalog_version
+from products.counters import recount_categories
+
+
+class Command(BaseCommand):
+    help = 'Recompute the available-product counters on every category'
+
+    def handle(self, *args, **kwargs):
+        changed = recount_categories()
+        if changed:
+            bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS(f'Done. {changed} categories repaired.'))
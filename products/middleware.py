@@ -0,0 +1,45 @@
+import os
+
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .snapshot import SNAPSHOT_FILE_RE, get_snapshot_dir, get_snapshot_url_prefix
+
+
+class SnapshotWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise, plus the catalog snapshot files (products/snapshot.py).
+
+    WhiteNoise only indexes STATIC_ROOT at startup, while snapshots can be
+    rebuilt after it (build_catalog_snapshot --if-stale from cron), so an
+    unknown snapshot URL is looked up on disk
+    once and added to the index (and dropped again once it has been
+    cleaned up). Snapshot names are content-hashed, so they are served as
+    immutable.
+    """
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        # Needed by immutable_file_test() while WhiteNoise indexes files
+        self.snapshot_prefix = get_snapshot_url_prefix()
+        self.snapshot_dir = get_snapshot_dir()
+        super().__init__(get_response, *args, **kwargs)
+
+    def __call__(self, request):
+        path = request.path_info
+        if path.startswith(self.snapshot_prefix):
+            self.sync_snapshot_file(path)
+        return super().__call__(request)
+
+    def sync_snapshot_file(self, url):
+        name = url[len(self.snapshot_prefix):]
+        if not SNAPSHOT_FILE_RE.match(name):
+            return
+        path = os.path.join(self.snapshot_dir, name)
+        if not os.path.isfile(path):
+            self.files.pop(url, None)
+        elif url not in self.files:
+            self.add_file_to_dictionary(url, path)
+
+    def immutable_file_test(self, path, url):
+        if url.startswith(self.snapshot_prefix):
+            return bool(SNAPSHOT_FILE_RE.match(url[len(self.snapshot_prefix):]))
+        return super().immutable_file_test(path, url)
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:42
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_counters(apps, schema_editor):
+    Category = apps.get_model('products', 'Category')
+    Product = apps.get_model('products', 'Product')
+    fields = {'cake': 'available_cake_count', 'pastry': 'available_pastry_count'}
+
+    rows = (
+        Product.objects.filter(available=True, category__isnull=False)
+        .values('category_id', 'product_type')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    for row in rows:
+        field = fields.get(row['product_type'])
+        if field:
+            Category.objects.filter(pk=row['category_id']).update(**{field: row['total']})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_product_products_pr_name_37bd5c_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='available_cake_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of available cakes in this category.'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='available_pastry_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of available pastries in this category.'),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_category_updated_at_catalogtombstone_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='card',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Precomputed list payload, rebuilt whenever the product or its category changes.'),
+        ),
+    ]
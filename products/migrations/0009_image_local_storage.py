@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:10
+
+import products.local_images
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_product_card'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='category',
+            name='image',
+            field=products.local_images.CloudinaryOrLocalField(blank=True, help_text='Category image. Recommended size: 800x600px.', max_length=255, null=True, verbose_name='image'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='image',
+            field=products.local_images.CloudinaryOrLocalField(blank=True, help_text='An image of the product. Recommended size: 800x600px.', max_length=255, null=True, verbose_name='image'),
+        ),
+    ]
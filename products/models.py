@@ -1,12 +1,25 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils.text import slugify
 from django.urls import reverse
 from django.core.validators import MinValueValidator, MaxValueValidator
-from cloudinary.models import CloudinaryField
-from cloudinary import CloudinaryImage
+from django.contrib.postgres.search import SearchVectorField
 
+from products.cards import build_card, card_source_state, get_card, refresh_cards
+from products.counters import (
+    COUNTER_STATE_FIELDS,
+    move_counter,
+    product_counter_key,
+    stored_counter_key,
+)
+from products.images import (
+    ImageVariantsMixin,
+    PRODUCT_IMAGE_VARIANTS,
+    CATEGORY_IMAGE_VARIANTS,
+)
+from products.local_images import CloudinaryOrLocalField
 
-class Category(models.Model):
+
+class Category(ImageVariantsMixin, models.Model):
     """
     Represents a category for products (e.g., Birthday, Wedding, Anniversary).
     Used for organizing products in the store.
@@ -20,7 +33,7 @@ class Category(models.Model):
         unique=True,
         help_text="A URL-friendly identifier for the category."
     )
-    image = CloudinaryField(
+    image = CloudinaryOrLocalField(
         'image',
         folder='category_images',
         transformation=[{'quality': 'auto', 'fetch_format': 'auto'}],
@@ -33,14 +46,60 @@ class Category(models.Model):
         null=True,
         help_text="Short description of this category."
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text="Precomputed image URLs, rebuilt when the image changes."
+    )
+
+    # Denormalized counters, maintained by Product.save()/delete (see products/counters.py)
+    available_cake_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Number of available cakes in this category."
+    )
+    available_pastry_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Number of available pastries in this category."
+    )
+
+    # Bumped by saves and counter changes; drives the delta sync (products/sync.py)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    IMAGE_VARIANTS = CATEGORY_IMAGE_VARIANTS
+
+    # Name as stored, when loaded from the database (see from_db)
+    _stored_name = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the stored name: only a rename touches the product cards."""
+        instance = super().from_db(db, field_names, values)
+        instance._stored_name = instance.__dict__.get('name')
+        return instance
 
     def save(self, *args, **kwargs):
         """
         Overrides the default save method to automatically generate a slug if one is not provided.
+        A rename is copied into the cards of the category's products in the same transaction.
+        The card shows the category name only, so other changes leave the cards alone.
         """
         if not self.slug:
             self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        renamed = (
+            not self._state.adding
+            and (not update_fields or 'name' in update_fields)
+            and self.name != self._stored_name
+        )
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if renamed:
+                refresh_cards(self.products.exclude(card__data__category_name=self.name))
+        self._stored_name = self.name
+        self.save_image_variants_if_stale()
 
     def get_absolute_url(self):
         """
@@ -51,14 +110,18 @@ class Category(models.Model):
     @property
     def image_url(self):
         """Get the full Cloudinary URL for the image."""
-        if self.image:
-            return self.image.url
-        return None
+        return self.get_image_variant('original')
+
+    @property
+    def product_count(self):
+        """Number of available products in this category."""
+        return self.available_cake_count + self.available_pastry_count
 
     class Meta:
         ordering = ['name']
         indexes = [
             models.Index(fields=['name']),
+            models.Index(fields=['updated_at']),
         ]
         verbose_name = 'category'
         verbose_name_plural = 'categories'
@@ -67,7 +130,7 @@ class Category(models.Model):
         return self.name
 
 
-class Product(models.Model):
+class Product(ImageVariantsMixin, models.Model):
     """
     Represents a product in the bakery store.
     Can be either a Cake (customizable) or Pastry (fixed product).
@@ -117,7 +180,7 @@ class Product(models.Model):
     )
     
     # Image field using Cloudinary
-    image = CloudinaryField(
+    image = CloudinaryOrLocalField(
         'image',
         folder='products_images',
         transformation=[{'quality': 'auto', 'fetch_format': 'auto'}],
@@ -173,17 +236,83 @@ class Product(models.Model):
         help_text="Whether the product is available for purchase. Uncheck to hide from store."
     )
     
+    # Precomputed Cloudinary URLs (original + thumbnail/medium/large)
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text="Precomputed image URLs, rebuilt when the image changes."
+    )
+
+    # Precomputed ProductListSerializer payload (see products/cards.py)
+    card = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text="Precomputed list payload, rebuilt whenever the product or its category changes."
+    )
+
+    # Full-text search document (PostgreSQL only, GIN-indexed; see products/search.py)
+    search_vector = SearchVectorField(
+        null=True,
+        blank=True,
+        editable=False
+    )
+
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    IMAGE_VARIANTS = PRODUCT_IMAGE_VARIANTS
+
+    # CARD_SOURCE_FIELDS values as stored (see from_db), None if unknown
+    _card_state = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Remember which category counter the stored row counts towards, and
+        the values its card was built from.
+        """
+        instance = super().from_db(db, field_names, values)
+        if all(f in instance.__dict__ for f in COUNTER_STATE_FIELDS):
+            instance._counter_key = product_counter_key(instance)
+        instance._card_state = card_source_state(instance)
+        return instance
+
     def save(self, *args, **kwargs):
         """
         Overrides the default save method to automatically generate a slug if one is not provided.
+        Also keeps the category product counters and the product card in step,
+        in the same transaction. The card is only rebuilt when a field it
+        shows changed (or it is missing or stale).
         """
         if not self.slug:
             self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+
+        with transaction.atomic():
+            if self._state.adding:
+                previous_key = None
+            elif hasattr(self, '_counter_key'):
+                previous_key = self._counter_key
+            else:
+                previous_key = stored_counter_key(self)
+
+            super().save(*args, **kwargs)
+
+            current_key = product_counter_key(self)
+            move_counter(previous_key, current_key)
+            self._counter_key = current_key
+
+            card_state = card_source_state(self)
+            if card_state is None or card_state != self._card_state or get_card(self) is None:
+                card = build_card(self)
+                if card != self.card:
+                    self.card = card
+                    Product.objects.filter(pk=self.pk).update(card=card)
+            self._card_state = card_state
+
+        self.save_image_variants_if_stale()
 
     
     # ========== UPDATED CLEAN METHOD ==========
@@ -239,68 +368,38 @@ class Product(models.Model):
         """
         return reverse('product_detail', args=[self.id, self.slug])
     
-    # Cloudinary image URL properties
+    # Cloudinary image URL properties — served from image_variants
     @property
     def image_url(self):
         """Get the full Cloudinary URL for the image."""
-        if self.image:
-            return self.image.url
-        return None
+        return self.get_image_variant('original')
     
     @property
     def thumbnail_url(self):
         """Get a thumbnail version from Cloudinary (150x150)."""
-        if self.image:
-            public_id = self.image.public_id
-            # Fixed the typo: changed 'cake' to 'crop'
-            thumbnail = CloudinaryImage(public_id).build_url(
-                transformation=[
-                    {'width': 150, 'height': 150, 'crop': 'fill', 'gravity': 'center'},
-                    {'quality': 'auto', 'fetch_format': 'auto'}    
-                ]
-            )
-            return thumbnail
-        return None
+        return self.get_image_variant('thumbnail')
     
     @property
     def medium_image_url(self):
         """Get a medium-size version from Cloudinary (400x300)."""
-        if self.image:
-            public_id = self.image.public_id
-            # Fixed the typo: changed 'cake' to 'fit'
-            medium = CloudinaryImage(public_id).build_url(
-                transformation=[
-                    {'width': 400, 'height': 300, 'crop': 'fit'},
-                    {'quality': 'auto', 'fetch_format': 'auto'}
-                ]
-            )
-            return medium
-        return None
+        return self.get_image_variant('medium')
     
     @property
     def large_image_url(self):
         """Get a large version from Cloudinary (800x600)."""
-        if self.image:
-            public_id = self.image.public_id
-            # Fixed the typo: changed 'cake' to 'fit'
-            large = CloudinaryImage(public_id).build_url(
-                transformation=[
-                    {'width': 800, 'height': 600, 'crop': 'fit'},
-                    {'quality': 'auto', 'fetch_format': 'auto'}
-                ]
-            )
-            return large
-        return None
+        return self.get_image_variant('large')
 
     class Meta:
         ordering = ['name']
         indexes = [
             models.Index(fields=['id', 'slug']),
             models.Index(fields=['name']),
+            models.Index(fields=['name', 'id']),
             models.Index(fields=['-created_at']),
             models.Index(fields=['available']),
             models.Index(fields=['product_type', 'available']),
             models.Index(fields=['category', 'available']),
+            models.Index(fields=['updated_at']),
         ]
         # Ensures that each product's slug is unique within its category
         constraints = [
@@ -312,4 +411,45 @@ class Product(models.Model):
 
     def __str__(self):
         product_type_display = dict(self.PRODUCT_TYPES).get(self.product_type, self.product_type)
-        return f"{self.name} ({product_type_display})"
\ No newline at end of file
+        return f"{self.name} ({product_type_display})"
+
+
+class CatalogVersion(models.Model):
+    """
+    Single-row counter bumped on every catalog change; the catalog cache
+    keys and ETags are built from it (see products/cache.py). Kept in the
+    database so every worker process agrees on it.
+    """
+    version = models.BigIntegerField(default=0)
+    modified_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Catalog Version'
+
+    def __str__(self):
+        return f"Catalog version {self.version}"
+
+
+class CatalogTombstone(models.Model):
+    """
+    Marks a deleted Product or Category so delta-sync clients can drop it
+    from their local copy (see products/sync.py). Written by the post_delete
+    signals; pruned after CATALOG_TOMBSTONE_RETENTION_DAYS.
+    """
+    KIND_CHOICES = [
+        ('product', 'Product'),
+        ('category', 'Category'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['deleted_at', 'id']
+        indexes = [
+            models.Index(fields=['deleted_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.object_id} deleted {self.deleted_at:%Y-%m-%d %H:%M}"
@@ -1,5 +1,17 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import binascii
+import hashlib
+import json
+import math
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 from collections import OrderedDict
 
 
@@ -46,4 +58,219 @@ class LargeResultsSetPagination(PageNumberPagination):
     """
     page_size = 50
     page_size_query_param = 'page_size'
-    max_page_size = 200
\ No newline at end of file
+    max_page_size = 200
+
+# ============================================================================
+# KEYSET (CURSOR) PAGINATION
+# ============================================================================
+
+class KeysetPagination(BasePagination):
+    """
+    Opt-in keyset pagination: seeks on the `ordering` keys instead of using
+    OFFSET, so every page costs the same no matter how deep it is.
+
+    Enabled per request with ?pagination=cursor (or any ?cursor=...).
+    `count` and `total_pages` are approximate: they come from a cached
+    counter, never from a COUNT(*) per page.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    mode_query_value = 'cursor'
+
+    # Sort keys; the last one must be unique (normally the primary key)
+    ordering = ('name', 'id')
+
+    count_cache_timeout = 300
+    # Query params that don't change the result set, left out of count keys
+    count_ignored_params = ('cursor', 'pagination', 'page', 'page_size', 'fields', 'omit')
+
+    @classmethod
+    def is_requested(cls, request):
+        params = request.query_params
+        return (
+            params.get(cls.mode_query_param) == cls.mode_query_value
+            or cls.cursor_query_param in params
+        )
+
+    # ------------------------------------------------------------------
+    # Cursor encoding
+    # ------------------------------------------------------------------
+
+    def _fields(self):
+        return [(key.lstrip('-'), key.startswith('-')) for key in self.ordering]
+
+    def encode_cursor(self, obj, reverse=False):
+        values = []
+        for field, _ in self._fields():
+            value = getattr(obj, field)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        payload = json.dumps({'k': values, 'r': int(reverse)}, default=str)
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, queryset, encoded):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            values = payload['k']
+            fields = self._fields()
+            if len(values) != len(fields):
+                raise ValueError
+            opts = queryset.model._meta
+            keys = [opts.get_field(field).to_python(value) for (field, _), value in zip(fields, values)]
+            return keys, bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError, binascii.Error, ValidationError):
+            raise NotFound('Invalid cursor.')
+
+    # ------------------------------------------------------------------
+    # Seeking
+    # ------------------------------------------------------------------
+
+    def _seek_filter(self, keys, reverse):
+        """
+        (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ... with the comparison
+        flipped for descending keys and for backwards (reverse) seeks.
+        """
+        condition = Q()
+        equal = Q()
+        for (field, descending), value in zip(self._fields(), keys):
+            lookup = 'lt' if descending != reverse else 'gt'
+            condition |= equal & Q(**{f"{field}__{lookup}": value})
+            equal &= Q(**{field: value})
+        return condition
+
+    def _order_by(self, reverse):
+        order = []
+        for field, descending in self._fields():
+            desc = descending != reverse
+            order.append(f"-{field}" if desc else field)
+        return order
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                size = int(request.query_params[self.page_size_query_param])
+                if size > 0:
+                    return min(size, self.max_page_size)
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.count = self.get_count(queryset, request, view)
+
+        encoded = request.query_params.get(self.cursor_query_param)
+        keys, reverse = self.decode_cursor(queryset, encoded) if encoded else (None, False)
+
+        queryset = queryset.order_by(*self._order_by(reverse))
+        if keys is not None:
+            queryset = queryset.filter(self._seek_filter(keys, reverse))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.has_next = has_more if not reverse else True
+        self.has_previous = (keys is not None) if not reverse else has_more
+        self.page = rows
+        return rows
+
+    # ------------------------------------------------------------------
+    # Approximate count
+    # ------------------------------------------------------------------
+
+    def get_count_cache_prefix(self, request, view):
+        return f"pagination:count:{request.path}"
+
+    def get_count(self, queryset, request, view):
+        params = [
+            f"{key}={value}"
+            for key in sorted(request.query_params.keys())
+            if key not in self.count_ignored_params
+            for value in sorted(request.query_params.getlist(key))
+        ]
+        digest = hashlib.md5('&'.join(params).encode('utf-8')).hexdigest()
+        key = f"{self.get_count_cache_prefix(request, view)}:{digest}"
+
+        count = cache.get(key)
+        if count is None:
+            count = queryset.order_by().count()
+            cache.set(key, count, self.count_cache_timeout)
+        return count
+
+    # ------------------------------------------------------------------
+    # Response
+    # ------------------------------------------------------------------
+
+    def _link(self, cursor):
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.cursor_query_param, cursor)
+        return remove_query_param(url, self.mode_query_param)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._link(self.encode_cursor(self.page[-1]))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self._link(self.encode_cursor(self.page[0], reverse=True))
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('total_pages', math.ceil(self.count / self.page_size) if self.page_size else 1),
+            ('page_size', self.page_size),
+            ('results', data),
+        ]))
+
+
+class ProductKeysetPagination(KeysetPagination):
+    """
+    Keyset pagination for product listings, seeking on (name, id).
+    Counts are cached until the catalog version changes.
+
+    Not used for ?search= requests: their results are ordered by search
+    rank, which re-ordering on (name, id) would discard, so they keep
+    page-number pagination.
+    """
+    ordering = ('name', 'id')
+    count_cache_timeout = 3600
+
+    @classmethod
+    def is_requested(cls, request):
+        from products.search import tokenize
+        if tokenize(request.query_params.get(api_settings.SEARCH_PARAM, '')):
+            return False
+        return super().is_requested(request)
+
+    def get_count_cache_prefix(self, request, view):
+        from products.cache import get_catalog_version
+        return f"catalog:v{get_catalog_version()}:count:{request.path}"
+
+
+class KeysetPaginationMixin:
+    """
+    View mixin that swaps in `keyset_pagination_class` when the request
+    asks for cursor pagination, keeping `pagination_class` as the default.
+    """
+    keyset_pagination_class = None
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.keyset_pagination_class and self.keyset_pagination_class.is_requested(self.request):
+                self._paginator = self.keyset_pagination_class()
+            elif self.pagination_class is None:
+                self._paginator = None
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
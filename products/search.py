@@ -0,0 +1,216 @@
+"""
+Full-text product search.
+
+- PostgreSQL: a weighted `tsvector` column (Product.search_vector) with a GIN
+  index, queried with prefix terms and ranked with ts_rank.
+- SQLite: an FTS5 virtual table (products_product_fts) keyed by product id,
+  queried with prefix terms and ranked with bm25.
+- Any other backend falls back to the previous icontains search.
+
+The index is kept current by the Product save/delete signals
+(products/signals.py) and can be rebuilt with `manage.py rebuild_search_index`.
+"""
+import re
+
+from django.db import connection
+from django.db.models import F, FloatField
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+
+SEARCH_CONFIG = 'english'
+FTS_TABLE = 'products_product_fts'
+
+# Relative weights of name vs description matches
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(query):
+    """Split a user query into safe search terms (drops FTS operators)."""
+    return _TOKEN_RE.findall(query or '')
+
+
+class BaseSearchBackend:
+    """
+    Interface shared by all search backends.
+    `search()` returns the queryset filtered to matches and annotated with
+    `search_rank` (higher is better), ordered by rank then name.
+    """
+    vendor = None
+
+    def search(self, queryset, query):
+        raise NotImplementedError
+
+    def index_product(self, product):
+        pass
+
+    def remove_product(self, product_id):
+        pass
+
+    def index_products(self, product_ids):
+        """Reindex a set of products after a bulk write (signals don't fire)."""
+        return 0
+
+    def rebuild(self):
+        return 0
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    vendor = 'postgresql'
+
+    def _vector(self):
+        from django.contrib.postgres.search import SearchVector
+        from django.db.models import Value
+        from django.db.models.functions import Coalesce
+
+        return (
+            SearchVector('name', weight='A', config=SEARCH_CONFIG)
+            + SearchVector(Coalesce('description', Value('')), weight='B', config=SEARCH_CONFIG)
+        )
+
+    def search(self, queryset, query):
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        terms = tokenize(query)
+        if not terms:
+            return queryset
+        search_query = SearchQuery(
+            ' & '.join(f"{term}:*" for term in terms),
+            search_type='raw',
+            config=SEARCH_CONFIG,
+        )
+        return queryset.filter(search_vector=search_query).annotate(
+            search_rank=SearchRank(F('search_vector'), search_query)
+        ).order_by('-search_rank', 'name')
+
+    def index_product(self, product):
+        from products.models import Product
+        Product.objects.filter(pk=product.pk).update(search_vector=self._vector())
+
+    def index_products(self, product_ids):
+        from products.models import Product
+        return Product.objects.filter(pk__in=list(product_ids)).update(search_vector=self._vector())
+
+    def rebuild(self):
+        from products.models import Product
+        return Product.objects.update(search_vector=self._vector())
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    vendor = 'sqlite'
+
+    def _match_expression(self, terms):
+        # Each term quoted (no FTS syntax injection) and prefix-matched
+        return ' '.join('"{}"*'.format(term.replace('"', '')) for term in terms)
+
+    def search(self, queryset, query):
+        from products.models import Product
+
+        terms = tokenize(query)
+        if not terms:
+            return queryset
+        expression = self._match_expression(terms)
+        table = Product._meta.db_table
+
+        matches = RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+            [expression],
+        )
+        rank = RawSQL(
+            f"SELECT -bm25({FTS_TABLE}, {NAME_WEIGHT}, {DESCRIPTION_WEIGHT}) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = {table}.id",
+            [expression],
+            output_field=FloatField(),
+        )
+        return queryset.filter(id__in=matches).annotate(
+            search_rank=rank
+        ).order_by('-search_rank', 'name')
+
+    def index_product(self, product):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [product.pk])
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, name, description) VALUES (%s, %s, %s)",
+                [product.pk, product.name or '', product.description or ''],
+            )
+
+    def remove_product(self, product_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [product_id])
+
+    def index_products(self, product_ids):
+        from products.models import Product
+
+        table = Product._meta.db_table
+        product_ids = list(product_ids)
+        indexed = 0
+        with connection.cursor() as cursor:
+            # Chunked to stay under SQLite's bound-parameter limit
+            for start in range(0, len(product_ids), 500):
+                chunk = product_ids[start:start + 500]
+                placeholders = ', '.join(['%s'] * len(chunk))
+                cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", chunk)
+                cursor.execute(
+                    f"INSERT INTO {FTS_TABLE} (rowid, name, description) "
+                    f"SELECT id, name, COALESCE(description, '') FROM {table} WHERE id IN ({placeholders})",
+                    chunk,
+                )
+                indexed += cursor.rowcount
+        return indexed
+
+    def rebuild(self):
+        from products.models import Product
+
+        table = Product._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, name, description) "
+                f"SELECT id, name, COALESCE(description, '') FROM {table}"
+            )
+            return cursor.rowcount
+
+
+class FallbackSearchBackend(BaseSearchBackend):
+    """Unindexed icontains search, used on backends without full-text support."""
+
+    def search(self, queryset, query):
+        from django.db.models import Q, Value
+
+        terms = tokenize(query)
+        if not terms:
+            return queryset
+        condition = Q()
+        for term in terms:
+            condition &= Q(name__icontains=term) | Q(description__icontains=term)
+        return queryset.filter(condition).annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        )
+
+
+_BACKENDS = {
+    PostgresSearchBackend.vendor: PostgresSearchBackend,
+    SQLiteSearchBackend.vendor: SQLiteSearchBackend,
+}
+
+
+def get_search_backend():
+    """Search backend matching the default database connection."""
+    return _BACKENDS.get(connection.vendor, FallbackSearchBackend)()
+
+
+class ProductSearchFilter(filters.SearchFilter):
+    """
+    Drop-in replacement for DRF's SearchFilter on product views: the
+    `?search=` term goes through the full-text backend and results are
+    ordered by relevance.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        if not tokenize(query):
+            return queryset
+        return get_search_backend().search(queryset, query)
@@ -1,38 +1,47 @@
 from rest_framework import serializers
+from django.db import models
 from django.utils.text import slugify
+from bake_world.fieldsets import SparseFieldsetMixin
+from products.cards import get_card, with_live_rows
 from products.models import Category, Product
 
 
-class CategoryListSerializer(serializers.ModelSerializer):
-    product_count = serializers.SerializerMethodField()
+IMAGE_SOURCES = ('image', 'image_variants')
+
+
+class CategoryListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    product_count = serializers.IntegerField(read_only=True)
     image_url = serializers.ReadOnlyField()
 
     class Meta:
         model = Category
         fields = ['id', 'name', 'slug', 'description', 'image_url', 'product_count']
         read_only_fields = ['slug']
-
-    def get_product_count(self, obj):
-        return obj.products.filter(available=True).count()
+        sparse_sources = {
+            'image_url': IMAGE_SOURCES,
+            'product_count': ('available_cake_count', 'available_pastry_count'),
+        }
 
 
-class CategoryDetailSerializer(serializers.ModelSerializer):
+class CategoryDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     products = serializers.SerializerMethodField()
-    product_count = serializers.SerializerMethodField()
+    product_count = serializers.IntegerField(read_only=True)
     image_url = serializers.ReadOnlyField()
 
     class Meta:
         model = Category
         fields = ['id', 'name', 'slug', 'description', 'image_url', 'product_count', 'products']
         read_only_fields = ['slug']
+        sparse_sources = {
+            'image_url': IMAGE_SOURCES,
+            'product_count': ('available_cake_count', 'available_pastry_count'),
+            'products': (),
+        }
 
     def get_products(self, obj):
-        products = obj.products.filter(available=True)[:10]
+        products = obj.products.filter(available=True).select_related('category')[:10]
         return ProductListSerializer(products, many=True, context=self.context).data
 
-    def get_product_count(self, obj):
-        return obj.products.filter(available=True).count()
-
 
 class CategoryCreateUpdateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -48,10 +57,22 @@ class CategoryCreateUpdateSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
     
 
-class ProductListSerializer(serializers.ModelSerializer):
+class ProductCardListSerializer(serializers.ListSerializer):
+    """Reloads rows whose card is stale before serializing (see products/cards.py)."""
+
+    def to_representation(self, data):
+        if isinstance(data, models.manager.BaseManager):
+            data = data.all()
+        return super().to_representation(with_live_rows(list(data)))
+
+
+class ProductListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializes a Product for list views with essential fields.
     Updated for simplified product model with cake/pastry differentiation.
+
+    Rows are served from their precomputed card when it holds every
+    selected field (products/cards.py); otherwise serialized live.
     """
     category_name = serializers.CharField(source='category.name', read_only=True)
     
@@ -77,9 +98,43 @@ class ProductListSerializer(serializers.ModelSerializer):
             'slug', 'created_at', 'image_url', 'thumbnail_url',
             'medium_image_url', 'large_image_url', 'product_type_display'
         ]
+        sparse_sources = {
+            'category_name': ('category__name',),
+            'image_url': IMAGE_SOURCES,
+            'thumbnail_url': IMAGE_SOURCES,
+            'medium_image_url': IMAGE_SOURCES,
+            'large_image_url': IMAGE_SOURCES,
+            'product_type_display': ('product_type',),
+        }
+        list_serializer_class = ProductCardListSerializer
+
+    def to_representation(self, instance):
+        if not hasattr(self, '_card_field_names'):
+            # Subclasses with extra fields are always serialized live
+            names = [field.field_name for field in self._readable_fields]
+            self._card_field_names = names if set(names) <= set(ProductListSerializer.Meta.fields) else None
+
+        card = get_card(instance) if self._card_field_names else None
+        if card is None:
+            return super().to_representation(instance)
+        # A field the live serializer skipped (e.g. category_name without a category) is absent
+        return {name: card[name] for name in self._card_field_names if name in card}
+
+
+class ProductSyncSerializer(ProductListSerializer):
+    """
+    ProductListSerializer for delta-sync clients: the category is referenced
+    by id (clients sync categories too), so renaming a category doesn't
+    invalidate its products.
+    """
+
+    class Meta(ProductListSerializer.Meta):
+        fields = [
+            field for field in ProductListSerializer.Meta.fields if field != 'category_name'
+        ] + ['category', 'updated_at']
 
 
-class ProductDetailSerializer(serializers.ModelSerializer):
+class ProductDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializes a single Product for detail views with all fields.
     Updated for simplified product model.
@@ -111,6 +166,15 @@ class ProductDetailSerializer(serializers.ModelSerializer):
             'slug', 'created_at', 'updated_at', 'image_url', 'thumbnail_url',
             'medium_image_url', 'large_image_url', 'is_cake', 'is_pastry'
         ]
+        sparse_sources = {
+            'product_type_display': ('product_type',),
+            'image_url': IMAGE_SOURCES,
+            'thumbnail_url': IMAGE_SOURCES,
+            'medium_image_url': IMAGE_SOURCES,
+            'large_image_url': IMAGE_SOURCES,
+            'is_cake': ('product_type',),
+            'is_pastry': ('product_type',),
+        }
 
 
 class ProductCreateUpdateSerializer(serializers.ModelSerializer):
@@ -226,7 +290,7 @@ class ProductCakeDetailSerializer(serializers.ModelSerializer):
         ]
 
 
-class ProductSearchSerializer(serializers.ModelSerializer):
+class ProductSearchSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializes a Product for search results, providing key information.
     """
@@ -242,6 +306,12 @@ class ProductSearchSerializer(serializers.ModelSerializer):
             'image_url', 'thumbnail_url', 'price', 'available',
             'category_name', 'description'
         ]
+        sparse_sources = {
+            'category_name': ('category__name',),
+            'product_type_display': ('product_type',),
+            'image_url': IMAGE_SOURCES,
+            'thumbnail_url': IMAGE_SOURCES,
+        }
 
 
 class ProductBulkUpdateSerializer(serializers.Serializer):
@@ -281,6 +351,23 @@ class ProductBulkUpdateSerializer(serializers.Serializer):
         return data
 
 
+class ProductChangeOperationSerializer(serializers.Serializer):
+    """
+    One operation of a batch product update: the product (by slug, plus the
+    category slug when the product slug is not unique) and its changes.
+    """
+    slug = serializers.SlugField(max_length=200)
+    category = serializers.SlugField(max_length=200, required=False, allow_null=True)
+    changes = serializers.DictField(allow_empty=False)
+
+
+class ProductBatchUpdateSerializer(serializers.Serializer):
+    """
+    Request body of the batch product update endpoint.
+    """
+    operations = ProductChangeOperationSerializer(many=True, allow_empty=False, max_length=200)
+
+
 class ProductTypeFilterSerializer(serializers.Serializer):
     """
     Serializer for filtering products by type.
@@ -0,0 +1,78 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from bake_world.versions import on_commit_once
+
+from .autocomplete import autocomplete_index
+from .cache import bump_catalog_version
+from .cards import refresh_product_cards
+from .counters import adjust_counter, product_counter_key
+from .models import Product, Category
+from .search import get_search_backend
+from .sync import record_tombstone
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_catalog_cache(sender, instance, **kwargs):
+    """Bump the catalog version once the change is committed."""
+    on_commit_once(bump_catalog_version)
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, **kwargs):
+    """Keep the full-text search index in step with the product row."""
+    get_search_backend().index_product(instance)
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    get_search_backend().remove_product(instance.pk)
+
+
+@receiver(post_delete, sender=Product)
+def decrement_category_counter(sender, instance, **kwargs):
+    """Remove a deleted product's contribution to its category counter."""
+    key = getattr(instance, '_counter_key', None) or product_counter_key(instance)
+    adjust_counter(key, -1)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def update_autocomplete_index(sender, instance, **kwargs):
+    """Apply the change to this process's autocomplete index after the version bump."""
+    kind = 'product' if sender is Product else 'category'
+    # post_delete has no `created`; the collector clears instance.pk afterwards
+    pk, obj = instance.pk, instance if 'created' in kwargs else None
+    transaction.on_commit(lambda: autocomplete_index.apply_change(kind, pk, obj))
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Category)
+def record_catalog_tombstone(sender, instance, **kwargs):
+    """Tell delta-sync clients the row is gone."""
+    record_tombstone('product' if sender is Product else 'category', instance.pk)
+
+
+@receiver(pre_delete, sender=Category)
+def touch_category_products(sender, instance, **kwargs):
+    """
+    Deleting a category nulls its products' category with a bulk UPDATE
+    that doesn't touch updated_at; do it here so delta sync picks them up.
+    """
+    instance._product_ids = list(instance.products.values_list('id', flat=True))
+    instance.products.update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Category)
+def refresh_category_product_cards(sender, instance, **kwargs):
+    """The products' cards still show the deleted category's name."""
+    product_ids = getattr(instance, '_product_ids', None)
+    if product_ids:
+        refresh_product_cards(product_ids)
@@ -0,0 +1,197 @@
+"""
+Pre-rendered static catalog snapshot.
+
+Anonymous catalog browsing doesn't need Django: the full catalog, one list
+per category and the customization options are rendered to compact JSON
+files under STATIC_ROOT/<CATALOG_SNAPSHOT_DIR>/, content-hashed
+(`catalog.<hash>.json`) and precompressed (`.gz`, plus `.br` when the
+brotli package is installed). SnapshotWhiteNoiseMiddleware serves them with
+far-future caching. Clients find the current files through the manifest
+endpoint (/api/products/snapshot/).
+
+Snapshots are only written by `manage.py build_catalog_snapshot`: on
+deploy (build.sh) and, where the command can reach the web instance's
+disk, periodically with --if-stale, which skips the rebuild until the
+catalog or pricing version has moved. Requests and saves never render
+one. The manifest (manifest.json, next to the files) records the versions
+it was built from and when; clients load the snapshot, then catch up
+through delta sync (products/sync.py) from `generated_at`.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import time
+
+from django.conf import settings
+from django.utils import timezone
+from bake_world.renderers import FastJSONRenderer
+
+from .cache import get_catalog_version
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+
+MANIFEST_FILE = 'manifest.json'
+
+# Old files stay available this long so clients holding a previous
+# manifest can finish loading it
+SNAPSHOT_RETENTION = 24 * 3600
+
+# Built offline, so the slowest and smallest brotli setting
+BROTLI_QUALITY = 11
+
+# <name>.<12 hex chars>.json
+SNAPSHOT_FILE_RE = re.compile(r'^[a-z0-9-]+\.[0-9a-f]{12}\.json$')
+
+# This process's copy of the manifest: (mtime_ns, manifest)
+_manifest = None
+
+
+def get_snapshot_dir():
+    return os.path.join(settings.STATIC_ROOT, getattr(settings, 'CATALOG_SNAPSHOT_DIR', 'catalog'))
+
+
+def get_snapshot_url_prefix():
+    directory = getattr(settings, 'CATALOG_SNAPSHOT_DIR', 'catalog').strip('/')
+    return f"{settings.STATIC_URL.rstrip('/')}/{directory}/"
+
+
+def _versions():
+    from cart.pricing import get_pricing_version
+    return get_catalog_version(), get_pricing_version()
+
+
+def build_snapshot_documents():
+    """{file name: data} for the catalog, each category and the customization options."""
+    from cart.pricing import build_customization_options
+    from .models import Category, Product
+    from .serializers import CategoryListSerializer, ProductListSerializer
+
+    products = list(
+        Product.objects.filter(available=True).select_related('category').order_by('name', 'id')
+    )
+    categories = list(Category.objects.order_by('name'))
+    product_data = ProductListSerializer(products, many=True).data
+
+    by_category = {}
+    for product, data in zip(products, product_data):
+        by_category.setdefault(product.category_id, []).append(data)
+
+    category_data = CategoryListSerializer(categories, many=True).data
+    documents = {
+        'catalog': {'categories': category_data, 'products': product_data},
+        'customization-options': build_customization_options(),
+    }
+    for category, data in zip(categories, category_data):
+        documents[f'category-{category.slug}'] = {
+            'category': data,
+            'products': by_category.get(category.pk, []),
+        }
+    return documents
+
+
+def _write_atomic(path, content):
+    tmp_path = f'{path}.tmp{os.getpid()}'
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def write_snapshot_file(directory, name, content, brotli_quality=BROTLI_QUALITY):
+    """
+    Write `<name>.<hash>.json` and its precompressed variants. Existing
+    files are left alone (same name, same content). Variants are written
+    first so WhiteNoise finds them with the main file.
+    """
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    filename = f'{name}.{digest}.json'
+    path = os.path.join(directory, filename)
+
+    if os.path.exists(path):
+        # Reused by this snapshot: restart its retention period
+        os.utime(path)
+    else:
+        if brotli is not None:
+            _write_atomic(path + '.br', brotli.compress(content, quality=brotli_quality))
+        _write_atomic(path + '.gz', gzip.compress(content, compresslevel=9, mtime=0))
+        _write_atomic(path, content)
+
+    encodings = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return {'file': filename, 'size': len(content), 'encodings': encodings}
+
+
+def remove_stale_files(directory, keep, max_age=SNAPSHOT_RETENTION):
+    """Delete snapshot files older than max_age that the manifest doesn't use."""
+    cutoff = time.time() - max_age
+    removed = 0
+    for entry in os.scandir(directory):
+        if not SNAPSHOT_FILE_RE.match(entry.name) or entry.name in keep:
+            continue
+        if entry.stat().st_mtime >= cutoff:
+            continue
+        # Variants first, so WhiteNoise never sees a file without them
+        for path in (entry.path + '.br', entry.path + '.gz', entry.path):
+            if os.path.exists(path):
+                os.remove(path)
+                removed += 1
+    return removed
+
+
+def build_snapshot(brotli_quality=BROTLI_QUALITY):
+    """Render and write every snapshot file and the manifest; returns the manifest."""
+    catalog_version, pricing_version = _versions()
+    # Taken before reading the catalog: delta sync from here re-sends
+    # anything that changes while the snapshot is rendered
+    generated_at = timezone.now()
+    directory = get_snapshot_dir()
+    os.makedirs(directory, exist_ok=True)
+
+    renderer = FastJSONRenderer()
+    files = {}
+    for name, data in build_snapshot_documents().items():
+        files[name] = write_snapshot_file(directory, name, renderer.render(data), brotli_quality)
+
+    manifest = {
+        'version': f'{catalog_version}-{pricing_version}',
+        'catalog_version': catalog_version,
+        'pricing_version': pricing_version,
+        'generated_at': generated_at.isoformat(),
+        'files': files,
+    }
+    # Written last, so it only ever names files that exist
+    _write_atomic(os.path.join(directory, MANIFEST_FILE), json.dumps(manifest).encode('utf-8'))
+    remove_stale_files(directory, keep={entry['file'] for entry in files.values()})
+    return manifest
+
+
+def get_snapshot_manifest():
+    """
+    Manifest of the last built snapshot, or None if none has been built.
+    Re-read only when the file changes.
+    """
+    global _manifest
+    path = os.path.join(get_snapshot_dir(), MANIFEST_FILE)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+    cached = _manifest
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with open(path, 'rb') as f:
+        manifest = json.load(f)
+    _manifest = (mtime, manifest)
+    return manifest
+
+
+def snapshot_is_current(manifest):
+    """True if `manifest` was built from the current catalog and pricing versions."""
+    if manifest is None:
+        return False
+    return (manifest.get('catalog_version'), manifest.get('pricing_version')) == _versions()
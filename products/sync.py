@@ -0,0 +1,90 @@
+"""
+Catalog delta sync for clients that keep a local copy of the catalog.
+
+A client loads the catalog once (the static snapshot, see
+products/snapshot.py), then asks for what changed since its last sync:
+
+    GET /api/products/sync/?changed_since=<ISO 8601 timestamp>
+
+Changed rows are found through the updated_at indexes on Product and
+Category. Hidden products and deleted rows come back as tombstones
+({type, id, reason}) rather than full payloads; deletions are recorded in
+CatalogTombstone by the post_delete signals.
+
+Every response carries `next_changed_since` for the following request. It
+lags the server clock by SYNC_OVERLAP, because a row's updated_at is set
+before its transaction commits: the overlap re-sends rows that committed
+late instead of missing them, so clients must apply changes idempotently.
+When the gap is older than the tombstone retention or holds more than
+MAX_SYNC_CHANGES rows, the response only says `full_sync_required`.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import CatalogTombstone, Category, Product
+from .serializers import CategoryListSerializer, ProductSyncSerializer
+
+
+SYNC_OVERLAP = timedelta(seconds=30)
+
+# Larger deltas are cheaper to replace with the snapshot
+MAX_SYNC_CHANGES = 1000
+
+
+def get_tombstone_retention():
+    return timedelta(days=getattr(settings, 'CATALOG_TOMBSTONE_RETENTION_DAYS', 30))
+
+
+def record_tombstone(kind, object_id):
+    CatalogTombstone.objects.create(kind=kind, object_id=object_id)
+
+
+def prune_tombstones():
+    """Delete tombstones older than the retention period; returns how many."""
+    cutoff = timezone.now() - get_tombstone_retention()
+    deleted, _ = CatalogTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+    return deleted
+
+
+def _tombstone(kind, object_id, reason):
+    return {'type': kind, 'id': object_id, 'reason': reason}
+
+
+def build_delta(changed_since, context=None):
+    """Changes since `changed_since` (an aware datetime) as response data."""
+    now = timezone.now()
+    data = {
+        'changed_since': changed_since,
+        'next_changed_since': now - SYNC_OVERLAP,
+        'full_sync_required': False,
+    }
+    full_sync = {**data, 'full_sync_required': True, 'categories': [], 'products': [], 'tombstones': []}
+
+    if changed_since < now - get_tombstone_retention():
+        # Tombstones this old may have been pruned
+        return full_sync
+
+    # Each query fetches one row past the limit to detect overflow
+    limit = MAX_SYNC_CHANGES + 1
+    categories = list(Category.objects.filter(updated_at__gte=changed_since).order_by('updated_at', 'id')[:limit])
+    products = list(Product.objects.filter(updated_at__gte=changed_since).order_by('updated_at', 'id')[:limit])
+    deleted = list(
+        CatalogTombstone.objects.filter(deleted_at__gte=changed_since)
+        .values_list('kind', 'object_id')[:limit]
+    )
+    if len(categories) + len(products) + len(deleted) > MAX_SYNC_CHANGES:
+        return full_sync
+
+    available = [product for product in products if product.available]
+    tombstones = [_tombstone(kind, object_id, 'deleted') for kind, object_id in deleted]
+    tombstones += [
+        _tombstone('product', product.pk, 'unavailable') for product in products if not product.available
+    ]
+    data.update(
+        categories=CategoryListSerializer(categories, many=True, context=context).data,
+        products=ProductSyncSerializer(available, many=True, context=context).data,
+        tombstones=tombstones,
+    )
+    return data
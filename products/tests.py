@@ -1,3 +1,616 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
 
-# Create your tests here.
+from cloudinary import CloudinaryResource
+from django.contrib.auth import get_user_model
+from django.core.cache import cache as default_cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from PIL import Image
+
+from products import cache, snapshot, sync
+from products.autocomplete import autocomplete_index
+from products.bulk import ProductImporter, read_rows
+from products.images import PRODUCT_IMAGE_VARIANTS
+from products.local_images import build_local_variant_url, generate_variants, get_variant_path
+from products.models import CatalogTombstone, CatalogVersion, Category, Product
+
+
+class CatalogVersionTests(TestCase):
+
+    def setUp(self):
+        cache.catalog_version.expire()
+
+    def test_changes_bump_the_version_once_per_transaction(self):
+        version = cache.get_catalog_version()
+        with self.captureOnCommitCallbacks() as callbacks:
+            Category.objects.create(name='Birthday', slug='birthday')
+            Category.objects.create(name='Wedding', slug='wedding')
+
+        self.assertEqual(callbacks.count(cache.bump_catalog_version), 1)
+        cache.bump_catalog_version()
+        self.assertEqual(cache.get_catalog_version(), version + 1)
+        self.assertEqual(CatalogVersion.objects.get(pk=1).version, version + 1)
+
+    @override_settings(CACHE_VERSION_TTL=0)
+    def test_bump_by_another_process_is_seen(self):
+        version = cache.get_catalog_version()
+        # Another worker bumped the shared row
+        CatalogVersion.objects.filter(pk=1).update(version=version + 1)
+
+        self.assertEqual(cache.get_catalog_version(), version + 1)
+
+    def test_version_is_read_once_per_ttl(self):
+        cache.get_catalog_version()
+        with self.assertNumQueries(0):
+            cache.get_catalog_version()
+            cache.get_catalog_last_modified()
+
+
+class CatalogSnapshotTests(TestCase):
+
+    def setUp(self):
+        static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, static_root)
+        settings_override = override_settings(STATIC_ROOT=static_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache.catalog_version.expire()
+
+    def build(self, *args):
+        call_command('build_catalog_snapshot', *args, stdout=StringIO())
+
+    def test_manifest_endpoint_before_the_first_build(self):
+        response = self.client.get('/api/products/snapshot/')
+        self.assertEqual(response.status_code, 503)
+
+    def test_saves_do_not_render_the_snapshot(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name='Birthday', slug='birthday')
+
+        self.assertFalse(os.path.exists(snapshot.get_snapshot_dir()))
+
+    def test_rebuild_if_stale(self):
+        self.build()
+        manifest = snapshot.get_snapshot_manifest()
+        self.assertTrue(snapshot.snapshot_is_current(manifest))
+        response = self.client.get('/api/products/snapshot/')
+        self.assertEqual(response.json()['version'], manifest['version'])
+
+        self.build('--if-stale')
+        self.assertEqual(snapshot.get_snapshot_manifest(), manifest)
+
+        cache.bump_catalog_version()
+        self.assertFalse(snapshot.snapshot_is_current(manifest))
+        self.build('--if-stale')
+        self.assertTrue(snapshot.snapshot_is_current(snapshot.get_snapshot_manifest()))
+
+
+class ProductCardTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Birthday', slug='birthday')
+        cls.product = Product.objects.create(
+            name='Croissant', product_type='pastry', price=Decimal('350.00'), category=cls.category
+        )
+
+    def mark_card(self):
+        """Overwrite the stored card so a rebuild is visible."""
+        marker = {'version': self.product.card['version'], 'data': {'marker': True}}
+        Product.objects.filter(pk=self.product.pk).update(card=marker)
+        return marker
+
+    def test_card_built_on_create(self):
+        self.assertEqual(self.product.card['data']['name'], 'Croissant')
+        self.assertEqual(self.product.card['data']['category_name'], 'Birthday')
+
+    def test_change_outside_the_card_keeps_it(self):
+        marker = self.mark_card()
+        product = Product.objects.get(pk=self.product.pk)
+        product.description = 'Flaky and buttery'
+        product.save()
+
+        self.assertEqual(Product.objects.get(pk=product.pk).card, marker)
+
+    def test_change_to_a_card_field_rebuilds_it(self):
+        self.mark_card()
+        product = Product.objects.get(pk=self.product.pk)
+        product.price = Decimal('400.00')
+        product.save()
+
+        self.assertEqual(Product.objects.get(pk=product.pk).card['data']['price'], '400.00')
+
+    def test_category_rename_refreshes_cards(self):
+        category = Category.objects.get(pk=self.category.pk)
+        category.name = 'Birthdays'
+        category.save()
+
+        self.assertEqual(Product.objects.get(pk=self.product.pk).card['data']['category_name'], 'Birthdays')
+
+    def test_other_category_changes_leave_cards_alone(self):
+        marker = self.mark_card()
+        category = Category.objects.get(pk=self.category.pk)
+        category.description = 'Cakes for every age'
+        category.save()
+
+        self.assertEqual(Product.objects.get(pk=self.product.pk).card, marker)
+
+
+class ProductListPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for name in ('Almond Tart', 'Baguette', 'Croissant', 'Danish', 'Eclair'):
+            Product.objects.create(name=name, product_type='pastry', price=Decimal('100.00'))
+        Product.objects.create(
+            name='Apricot Loaf', product_type='pastry', price=Decimal('100.00'),
+            description='Baguette dough with dried fruit'
+        )
+
+    def setUp(self):
+        default_cache.clear()
+        cache.catalog_version.expire()
+
+    def names(self, response):
+        return [row['name'] for row in response.json()['results']]
+
+    def test_cursor_round_trip(self):
+        response = self.client.get('/api/products/', {'pagination': 'cursor', 'page_size': 4})
+        first_page = self.names(response)
+        self.assertEqual(first_page, ['Almond Tart', 'Apricot Loaf', 'Baguette', 'Croissant'])
+        self.assertIsNone(response.json()['previous'])
+
+        response = self.client.get(response.json()['next'])
+        self.assertEqual(self.names(response), ['Danish', 'Eclair'])
+        self.assertIsNone(response.json()['next'])
+
+        response = self.client.get(response.json()['previous'])
+        self.assertEqual(self.names(response), first_page)
+
+    def test_search_keeps_rank_order_and_page_numbers(self):
+        ranked = self.names(self.client.get('/api/products/', {'search': 'baguette'}))
+        response = self.client.get('/api/products/', {'search': 'baguette', 'pagination': 'cursor'})
+
+        self.assertEqual(self.names(response), ranked)
+        # Name matches outrank description matches
+        self.assertEqual(ranked, ['Baguette', 'Apricot Loaf'])
+        self.assertIn('current_page', response.json())
+
+
+class CategoryConditionalGetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Category.objects.create(name='Birthday', slug='birthday')
+
+    def setUp(self):
+        default_cache.clear()
+        cache.catalog_version.expire()
+
+    def test_etag_round_trip(self):
+        response = self.client.get('/api/products/categories/birthday/')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        response = self.client.get('/api/products/categories/birthday/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        cache.bump_catalog_version()
+        response = self.client.get('/api/products/categories/birthday/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_unknown_slug_has_no_etag(self):
+        response = self.client.get('/api/products/categories/nope/', HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header('ETag'))
+
+
+class SparseFieldsetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Product.objects.create(name='Croissant', product_type='pastry', price=Decimal('350.00'))
+
+    def setUp(self):
+        default_cache.clear()
+        cache.catalog_version.expire()
+
+    def test_fields_selects_the_response_fields(self):
+        response = self.client.get('/api/products/', {'fields': 'id,name,price'})
+        self.assertEqual(set(response.json()['results'][0]), {'id', 'name', 'price'})
+
+    def test_omit_drops_fields(self):
+        full = self.client.get('/api/products/').json()['results'][0]
+        response = self.client.get('/api/products/', {'omit': 'category_name,created_at'})
+        self.assertEqual(set(response.json()['results'][0]), set(full) - {'category_name', 'created_at'})
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get('/api/products/', {'fields': 'id,nope'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ProductImportTests(TestCase):
+
+    HEADER = 'category,slug,name,product_type,description,price,available,layers,covering,inspiration,preparation_days\n'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Birthday', slug='birthday')
+        Product.objects.create(
+            name='Croissant', product_type='pastry', price=Decimal('350.00'),
+            description='Flaky and buttery', category=cls.category
+        )
+        Product.objects.create(
+            name='Butterfly Cake', product_type='cake', price=Decimal('5000.00'), layers=2,
+            covering='fondant', preparation_days=3, category=cls.category
+        )
+        Product.objects.create(name='Baguette', product_type='pastry', price=Decimal('200.00'))
+
+    def run_import(self, lines, **kwargs):
+        importer = ProductImporter(**kwargs)
+        with self.captureOnCommitCallbacks(execute=True):
+            importer.run(read_rows(StringIO(self.HEADER + lines), 'csv'))
+        return importer
+
+    def test_creates_and_updates_rows(self):
+        importer = self.run_import(
+            'birthday,croissant,Croissant,pastry,,400.00,,,,,\n'
+            'birthday,,Eclair,pastry,,150.00,,,,,\n'
+        )
+
+        self.assertEqual((importer.created, importer.updated, importer.errors), (1, 1, []))
+        croissant = Product.objects.get(slug='croissant')
+        self.assertEqual(croissant.price, Decimal('400.00'))
+        # Blank cells keep the stored values
+        self.assertEqual(croissant.description, 'Flaky and buttery')
+        self.assertTrue(croissant.available)
+        self.assertEqual(croissant.card['data']['price'], '400.00')
+        eclair = Product.objects.get(slug='eclair')
+        self.assertEqual((eclair.category, eclair.available), (self.category, True))
+        self.assertEqual(Category.objects.get(pk=self.category.pk).available_pastry_count, 2)
+
+    def test_bad_rows_are_reported_and_the_run_continues(self):
+        importer = self.run_import(
+            'birthday,,Eclair,pastry,,abc,,,,,\n'
+            'wedding,,Tart,pastry,,150.00,,,,,\n'
+            'birthday,,Danish,pastry,,150.00,,,,,\n'
+        )
+
+        self.assertEqual([line for line, _ in importer.errors], [2, 3])
+        self.assertIn('price', importer.errors[0][1])
+        self.assertIn('Unknown category "wedding"', importer.errors[1][1])
+        self.assertEqual(importer.created, 1)
+        self.assertTrue(Product.objects.filter(slug='danish').exists())
+        self.assertFalse(Product.objects.filter(slug__in=['eclair', 'tart']).exists())
+
+    def test_repeated_key_in_a_batch_updates_the_pending_row(self):
+        importer = self.run_import(
+            ',,Eclair,pastry,,150.00,,,,,\n'
+            ',eclair,Eclair,pastry,,180.00,False,,,,\n'
+        )
+
+        self.assertEqual((importer.created, importer.updated), (1, 1))
+        eclair = Product.objects.get(slug='eclair')
+        self.assertEqual((eclair.category, eclair.price, eclair.available), (None, Decimal('180.00'), False))
+
+    def test_dry_run_writes_nothing(self):
+        importer = self.run_import('birthday,croissant,Croissant,pastry,,400.00,,,,,\n', dry_run=True)
+
+        self.assertEqual(importer.updated, 1)
+        self.assertEqual(Product.objects.get(slug='croissant').price, Decimal('350.00'))
+
+    def test_export_import_round_trip_is_unchanged(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        for fmt in ('csv', 'jsonl'):
+            with self.subTest(format=fmt):
+                path = os.path.join(directory, f'products.{fmt}')
+                call_command('export_products', path, stderr=StringIO())
+                stdout = StringIO()
+                call_command('import_products', path, stdout=stdout, stderr=StringIO())
+
+                self.assertIn('0 created, 0 updated, 3 unchanged, 0 failed', stdout.getvalue())
+
+
+class ProductBatchUpdateTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = get_user_model().objects.create_superuser(
+            email='admin@example.com', username='admin', first_name='Ada', last_name='Obi', password='x'
+        )
+        cls.birthday = Category.objects.create(name='Birthday', slug='birthday')
+        cls.wedding = Category.objects.create(name='Wedding', slug='wedding')
+        for name in ('Croissant', 'Danish'):
+            Product.objects.create(name=name, product_type='pastry', price=Decimal('350.00'), category=cls.birthday)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def post(self, operations):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                '/api/products/batch-update/', {'operations': operations}, content_type='application/json'
+            )
+
+    def statuses(self, response):
+        return [result['status'] for result in response.json()['results']]
+
+    def test_applies_every_operation(self):
+        # A stale counter outside the batch shows the recount is scoped
+        Category.objects.filter(pk=self.wedding.pk).update(available_pastry_count=5)
+        response = self.post([
+            {'slug': 'croissant', 'changes': {'price': '400.00'}},
+            {'slug': 'danish', 'category': 'birthday', 'changes': {'available': False}},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.statuses(response), ['updated', 'updated'])
+        self.assertEqual(response.json()['results'][0]['product']['price'], '400.00')
+        self.assertEqual(Product.objects.get(slug='croissant').price, Decimal('400.00'))
+        self.assertFalse(Product.objects.get(slug='danish').available)
+        self.assertEqual(Category.objects.get(pk=self.birthday.pk).available_pastry_count, 1)
+        self.assertEqual(Category.objects.get(pk=self.wedding.pk).available_pastry_count, 5)
+
+    def test_moving_a_product_recounts_both_categories(self):
+        response = self.post([{'slug': 'danish', 'changes': {'category': self.wedding.pk}}])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Category.objects.get(pk=self.birthday.pk).available_pastry_count, 1)
+        self.assertEqual(Category.objects.get(pk=self.wedding.pk).available_pastry_count, 1)
+
+    def test_one_invalid_operation_rejects_the_batch(self):
+        response = self.post([
+            {'slug': 'croissant', 'changes': {'price': '400.00'}},
+            {'slug': 'eclair', 'changes': {'price': '400.00'}},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.statuses(response), ['not_applied', 'error'])
+        self.assertEqual(Product.objects.get(slug='croissant').price, Decimal('350.00'))
+
+    def test_rename_onto_a_taken_slug_is_rejected(self):
+        response = self.post([{'slug': 'danish', 'changes': {'name': 'Croissant'}}])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('name', response.json()['results'][0]['errors'])
+        self.assertTrue(Product.objects.filter(slug='danish').exists())
+
+
+class CatalogSyncTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Birthday', slug='birthday')
+        cls.croissant = Product.objects.create(
+            name='Croissant', product_type='pastry', price=Decimal('350.00'), category=cls.category
+        )
+
+    def sync(self, changed_since):
+        response = self.client.get('/api/products/sync/', {'changed_since': changed_since.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def ids(self, rows):
+        return [row['id'] for row in rows]
+
+    def test_overlap_resends_rows_that_committed_late(self):
+        started = timezone.now()
+        data = self.sync(started - timedelta(minutes=5))
+        self.assertEqual(self.ids(data['products']), [self.croissant.pk])
+        next_changed_since = parse_datetime(data['next_changed_since'])
+        self.assertLessEqual(next_changed_since, started - sync.SYNC_OVERLAP + timedelta(seconds=1))
+
+        # Stamped before the previous response but committed after it
+        Product.objects.filter(pk=self.croissant.pk).update(
+            price=Decimal('400.00'), updated_at=next_changed_since + timedelta(seconds=10)
+        )
+        data = self.sync(next_changed_since)
+        self.assertEqual(self.ids(data['products']), [self.croissant.pk])
+        self.assertEqual(data['products'][0]['price'], '400.00')
+
+    def test_deleted_and_hidden_products_are_tombstones(self):
+        since = timezone.now() - timedelta(seconds=1)
+        danish = Product.objects.create(name='Danish', product_type='pastry', price=Decimal('400.00'))
+        danish_id = danish.pk
+        danish.delete()
+        croissant = Product.objects.get(pk=self.croissant.pk)
+        croissant.available = False
+        croissant.save()
+
+        data = self.sync(since)
+        self.assertEqual(data['products'], [])
+        self.assertCountEqual(data['tombstones'], [
+            {'type': 'product', 'id': danish_id, 'reason': 'deleted'},
+            {'type': 'product', 'id': croissant.pk, 'reason': 'unavailable'},
+        ])
+
+    def test_large_or_old_gaps_require_a_full_sync(self):
+        since = timezone.now() - timedelta(seconds=1)
+        Product.objects.bulk_create([
+            Product(name=f'Roll {i}', slug=f'roll-{i}', product_type='pastry', price=Decimal('100.00'))
+            for i in range(sync.MAX_SYNC_CHANGES + 1)
+        ])
+        data = self.sync(since)
+        self.assertTrue(data['full_sync_required'])
+        self.assertEqual((data['products'], data['tombstones']), ([], []))
+
+        data = self.sync(timezone.now() - sync.get_tombstone_retention() - timedelta(days=1))
+        self.assertTrue(data['full_sync_required'])
+
+    def test_changed_since_is_required(self):
+        for value in ('', 'yesterday'):
+            with self.subTest(value=value):
+                response = self.client.get('/api/products/sync/', {'changed_since': value})
+                self.assertEqual(response.status_code, 400)
+
+    def test_prune_keeps_recent_tombstones(self):
+        old, recent = CatalogTombstone.objects.bulk_create([
+            CatalogTombstone(kind='product', object_id=1),
+            CatalogTombstone(kind='product', object_id=2),
+        ])
+        CatalogTombstone.objects.filter(pk=old.pk).update(
+            deleted_at=timezone.now() - sync.get_tombstone_retention() - timedelta(days=1)
+        )
+
+        call_command('prune_catalog_tombstones', stdout=StringIO())
+        self.assertEqual(list(CatalogTombstone.objects.values_list('pk', flat=True)), [recent.pk])
+
+
+class AutocompleteTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Birthday', slug='birthday')
+        cls.croissant = Product.objects.create(
+            name='Crème Croissant', product_type='pastry', price=Decimal('350.00'), category=cls.category
+        )
+        Product.objects.create(name='Cronut', product_type='pastry', price=Decimal('300.00'))
+        Product.objects.create(name='Danish', product_type='pastry', price=Decimal('400.00'))
+
+    def setUp(self):
+        cache.catalog_version.expire()
+        autocomplete_index.version = None
+
+    def names(self, query):
+        response = self.client.get('/api/products/autocomplete/', {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [entry['name'] for entry in response.json()['results']]
+
+    def test_prefix_lookup(self):
+        self.assertEqual(self.names('cro'), ['Cronut', 'Crème Croissant'])
+        self.assertEqual(self.names('creme cr'), ['Crème Croissant'])
+        self.assertEqual(self.names('birth'), ['Birthday'])
+        self.assertEqual(self.names('eclair'), [])
+
+    def test_rename_is_reflected_after_commit(self):
+        self.assertIn('Crème Croissant', self.names('cro'))
+        product = Product.objects.get(pk=self.croissant.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            product.name = 'Almond Croissant'
+            product.save()
+            # Not applied until the transaction commits
+            self.assertEqual(self.names('almond'), [])
+
+        self.assertEqual(self.names('almond'), ['Almond Croissant'])
+        self.assertEqual(self.names('creme'), [])
+
+    def test_deleted_product_disappears(self):
+        self.assertEqual(self.names('danish'), ['Danish'])
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.get(name='Danish').delete()
+
+        self.assertEqual(self.names('danish'), [])
+
+
+class FacetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        # bulk_create: a save here would leave a version bump pending for every test
+        birthday, wedding = Category.objects.bulk_create([
+            Category(name='Birthday', slug='birthday'),
+            Category(name='Wedding', slug='wedding'),
+        ])
+        cake = {'product_type': 'cake', 'layers': 2, 'preparation_days': 3}
+        Product.objects.bulk_create([
+            Product(name='Butterfly Cake', slug='butterfly-cake', price=Decimal('15000.00'),
+                    covering='fondant', category=birthday, **cake),
+            Product(name='Rose Cake', slug='rose-cake', price=Decimal('60000.00'),
+                    covering='fondant', category=wedding, **cake),
+            Product(name='Naked Cake', slug='naked-cake', price=Decimal('20000.00'),
+                    covering='naked', category=wedding, **cake),
+            Product(name='Croissant', slug='croissant', product_type='pastry',
+                    price=Decimal('350.00'), category=birthday),
+        ])
+
+    def setUp(self):
+        default_cache.clear()
+        cache.catalog_version.expire()
+
+    def get(self, **params):
+        response = self.client.get('/api/products/facets/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def counts(self, data, facet):
+        return {row['value']: row['count'] for row in data['facets'][facet]}
+
+    def test_counts_match_the_filtered_list(self):
+        for params in ({}, {'product_type': 'cake'}, {'covering': 'fondant'}, {'price_band': '10000-25000'}):
+            with self.subTest(params=params):
+                data = self.get(**params)
+                names = [row['name'] for row in data['results']]
+                products = Product.objects.filter(name__in=names)
+                self.assertEqual(sum(self.counts(data, 'product_type').values()), len(names))
+                self.assertEqual(
+                    self.counts(data, 'category'),
+                    {slug: products.filter(category__slug=slug).count()
+                     for slug in set(products.values_list('category__slug', flat=True))},
+                )
+
+        data = self.get(product_type='cake')
+        self.assertEqual(self.counts(data, 'covering'), {'fondant': 2, 'naked': 1})
+        self.assertEqual(self.counts(data, 'price_band'), {'10000-25000': 2, '50000-plus': 1})
+
+    def test_save_invalidates_the_cached_counts(self):
+        self.assertEqual(self.counts(self.get(), 'covering'), {'fondant': 2, 'naked': 1})
+
+        product = Product.objects.get(name='Naked Cake')
+        with self.captureOnCommitCallbacks(execute=True):
+            product.covering = 'fondant'
+            product.save()
+
+        self.assertEqual(self.counts(self.get(), 'covering'), {'fondant': 3})
+
+
+class LocalImageTests(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(IMAGE_BACKEND='local', MEDIA_ROOT=media_root, MEDIA_URL='/media/')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.media_root = media_root
+
+    def png(self):
+        stream = BytesIO()
+        Image.new('RGB', (1000, 800), 'pink').save(stream, format='PNG')
+        return stream.getvalue()
+
+    def test_variant_url_falls_back_to_the_original(self):
+        os.makedirs(os.path.join(self.media_root, 'products_images'))
+        with open(os.path.join(self.media_root, 'products_images', 'cake.png'), 'wb') as f:
+            f.write(self.png())
+        image = CloudinaryResource(public_id='products_images/cake', format='png')
+        path = 'products_images/cake.png'
+
+        self.assertEqual(build_local_variant_url(image, 'thumbnail'), '/media/products_images/cake.png')
+        self.assertEqual(generate_variants([path], PRODUCT_IMAGE_VARIANTS), 3)
+        self.assertEqual(
+            build_local_variant_url(image, 'thumbnail'), '/media/' + get_variant_path(path, 'thumbnail')
+        )
+
+    @override_settings(IMAGE_VARIANT_WORKERS=3)
+    def test_upload_renders_the_variants(self):
+        product = Product.objects.create(
+            name='Butterfly Cake', product_type='pastry', price=Decimal('350.00'),
+            image=SimpleUploadedFile('cake.png', self.png(), content_type='image/png'),
+        )
+
+        path = f'{product.image.public_id}.png'
+        self.assertEqual(product.image_variants['thumbnail'], '/media/' + get_variant_path(path, 'thumbnail'))
+        with Image.open(os.path.join(self.media_root, get_variant_path(path, 'thumbnail'))) as thumbnail:
+            self.assertEqual(thumbnail.size, (150, 150))
+        with Image.open(os.path.join(self.media_root, get_variant_path(path, 'large'))) as large:
+            self.assertEqual(large.size, (750, 600))
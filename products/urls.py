@@ -15,7 +15,12 @@ urlpatterns = [
     path('cakes/', views.ProductCakeListView.as_view(), name='product-cake-list'),
     path('pastries/', views.ProductPastryListView.as_view(), name='product-pastry-list'),
     path('search/', views.ProductSearchView.as_view(), name='product-search'),
+    path('facets/', views.ProductFacetSearchView.as_view(), name='product-facets'),
+    path('autocomplete/', views.ProductAutocompleteView.as_view(), name='product-autocomplete'),
     path('counts/', views.ProductCountByTypeView.as_view(), name='product-counts'),
+    path('customization-options/', views.CustomizationOptionsView.as_view(), name='product-customization-options'),
+    path('snapshot/', views.CatalogSnapshotView.as_view(), name='catalog-snapshot'),
+    path('sync/', views.CatalogSyncView.as_view(), name='catalog-sync'),
 
     # Category endpoints — fixed paths before wildcards
     path('categories/', views.CategoryListView.as_view(), name='category-list'),
@@ -26,6 +31,7 @@ urlpatterns = [
 
     # Admin endpoints — fixed paths before wildcards
     path('create/', views.ProductCreateView.as_view(), name='product-create'),
+    path('batch-update/', views.ProductBatchUpdateView.as_view(), name='product-batch-update'),
 
     # Wildcard slug patterns LAST — these must come after all fixed paths
     path('<slug:slug>/', views.ProductDetailView.as_view(), name='product-detail'),
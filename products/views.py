@@ -2,6 +2,8 @@ from rest_framework import generics, filters, status, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db import IntegrityError
+from django.db.models import Count
 from django.shortcuts import get_object_or_404
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
@@ -16,8 +18,22 @@ from .serializers import (
     CategoryCreateUpdateSerializer,
     ProductTypeFilterSerializer,
     ProductSearchSerializer,
+    ProductBatchUpdateSerializer,
 )
+from bake_world.fieldsets import SparseFieldsetViewMixin
+from bake_world.conditional import ConditionalGetMixin, conditional_response, make_etag
+from .cache import (
+    CatalogCacheMixin,
+    cached_catalog_response,
+    get_catalog_last_modified,
+    get_catalog_version,
+)
+from .cards import ProductCardViewMixin
+from .facets import filter_price_band, get_facets
+from .search import ProductSearchFilter
 from .pagination import (
+    KeysetPaginationMixin,
+    ProductKeysetPagination,
     StandardResultsSetPagination, 
     SmallResultsSetPagination,
     LargeResultsSetPagination
@@ -39,16 +55,19 @@ class IsAdminOrReadOnly(permissions.BasePermission):
 # PUBLIC VIEWS
 # ============================================================================
 
-class ProductListView(generics.ListAPIView):
+class ProductListView(CatalogCacheMixin, KeysetPaginationMixin, ProductCardViewMixin, SparseFieldsetViewMixin, generics.ListAPIView):
     """
     GET /api/products/
 
     Supported query parameters:
-      - search:          text search on name/description
+      - search:          full-text search on name/description (ranked)
       - product_type:    'cake' or 'pastry'
       - category:        category integer ID  (e.g. ?category=3)
       - category_slug:   category slug        (e.g. ?category_slug=signature-cakes)
       - page, page_size: pagination
+      - pagination=cursor, cursor: opt-in keyset pagination on (name, id);
+                         ignored with search, whose results are ranked
+      - fields, omit:    sparse fieldset (e.g. ?fields=id,name,price,thumbnail_url)
 
     FIX 1: Removed the custom list() override that wrapped paginated results
             inside { products: [...] }. The standard DRF shape is returned:
@@ -62,17 +81,22 @@ class ProductListView(generics.ListAPIView):
             Filtering is now done manually in get_queryset().
 
     FIX 4: Added select_related('category') to avoid N+1 queries.
+
+    Responses are cached per catalog version and normalized query string
+    (see products/cache.py). Rows are served from their precomputed cards
+    (see products/cards.py).
     """
     permission_classes = [permissions.AllowAny]
     serializer_class = ProductListSerializer
     pagination_class = StandardResultsSetPagination
-    filter_backends = [filters.SearchFilter]
+    keyset_pagination_class = ProductKeysetPagination
+    filter_backends = [ProductSearchFilter]
     search_fields = ['name', 'description']
 
     def get_queryset(self):
         queryset = Product.objects.filter(
             available=True
-        ).select_related('category').order_by('name')
+        ).select_related('category').order_by('name', 'id')
 
         # Filter by product_type
         product_type = self.request.query_params.get('product_type')
@@ -99,7 +123,7 @@ class ProductListView(generics.ListAPIView):
         return queryset
 
 
-class ProductCakeListView(generics.ListAPIView):
+class ProductCakeListView(CatalogCacheMixin, ProductCardViewMixin, SparseFieldsetViewMixin, generics.ListAPIView):
     """
     GET /api/products/cakes/
     """
@@ -114,7 +138,7 @@ class ProductCakeListView(generics.ListAPIView):
         ).select_related('category').order_by('name')
 
 
-class ProductPastryListView(generics.ListAPIView):
+class ProductPastryListView(CatalogCacheMixin, ProductCardViewMixin, SparseFieldsetViewMixin, generics.ListAPIView):
     """
     GET /api/products/pastries/
     """
@@ -129,15 +153,27 @@ class ProductPastryListView(generics.ListAPIView):
         ).select_related('category').order_by('name')
 
 
-class ProductDetailView(generics.RetrieveAPIView):
+class ProductDetailView(ConditionalGetMixin, SparseFieldsetViewMixin, generics.RetrieveAPIView):
     """
     GET /api/products/<slug>/
+
+    Supports If-None-Match / If-Modified-Since. The ETag covers the product
+    row and the catalog version (the payload embeds its category).
     """
     permission_classes = [permissions.AllowAny]
     queryset = Product.objects.filter(available=True).select_related('category')
     serializer_class = ProductDetailSerializer
     lookup_field = 'slug'
 
+    def get_validators(self, request, slug):
+        row = Product.objects.filter(available=True, slug=slug).values_list('id', 'updated_at').first()
+        if row is None:
+            return None, None
+        product_id, updated_at = row
+        catalog_modified = get_catalog_last_modified()
+        last_modified = max(updated_at, catalog_modified) if catalog_modified else updated_at
+        return make_etag('product', product_id, updated_at, get_catalog_version()), last_modified
+
 
 class ProductCakeDetailView(APIView):
     """
@@ -168,41 +204,133 @@ class ProductCakeDetailView(APIView):
         return Response(data)
 
     def _get_customization_options(self):
-        from cart.models import CakeSizeMultiplier, CakeFlavorPrice, CakeCustomizationOption
-
-        sizes  = CakeSizeMultiplier.objects.all().order_by('size')
-        flavors = CakeFlavorPrice.objects.filter(is_active=True)
-        addons  = CakeCustomizationOption.objects.filter(is_active=True)
-
-        return {
-            'sizes': [
-                {
-                    'id': s.id,
-                    'size': s.size,
-                    'display': s.get_size_display(),
-                    'multiplier': str(s.multiplier)
-                } for s in sizes
-            ],
-            'flavors': [
-                {
-                    'id': f.id,
-                    'name': f.flavor,
-                    'multiplier': str(f.price_multiplier)
-                } for f in flavors
-            ],
-            'addons': [
-                {
-                    'id': a.id,
-                    'type': a.customization_type,
-                    'name': a.name,
-                    'price': str(a.price_per_unit),
-                    'description': a.description
-                } for a in addons
-            ]
+        from cart.pricing import get_customization_options
+        options, _ = get_customization_options()
+        return options
+
+
+class CustomizationOptionsView(APIView):
+    """
+    GET /api/products/customization-options/
+
+    Sizes, flavors and addons for the cake customize page. Served from a
+    cached document with an ETag; send If-None-Match to get a 304 when the
+    options haven't changed.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    @swagger_auto_schema(
+        operation_summary="Get Cake Customization Options",
+        responses={
+            200: openapi.Response(description="Sizes, flavors and addons."),
+            304: openapi.Response(description="Options unchanged since the given ETag."),
         }
+    )
+    def get(self, request):
+        from cart.pricing import get_customization_options
 
+        options, etag = get_customization_options()
+        return conditional_response(request, etag, None, lambda: Response(options))
+
+
+class CatalogSnapshotView(APIView):
+    """
+    GET /api/products/snapshot/
 
-class CategoryListView(generics.ListAPIView):
+    Manifest of the pre-rendered catalog snapshot: absolute URLs of the
+    content-hashed JSON files (full catalog, per category, customization
+    options), served as static files with far-future caching. The snapshot
+    is built offline (build_catalog_snapshot) and may trail the catalog;
+    clients catch up with /api/products/sync/ from `generated_at`.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    @swagger_auto_schema(
+        operation_summary="Catalog Snapshot Manifest",
+        responses={
+            200: openapi.Response(description="Current snapshot version and file URLs."),
+            304: openapi.Response(description="Snapshot unchanged since the given ETag."),
+            503: openapi.Response(description="No snapshot has been built yet."),
+        }
+    )
+    def get(self, request):
+        from .snapshot import get_snapshot_manifest, get_snapshot_url_prefix
+
+        manifest = get_snapshot_manifest()
+        if manifest is None:
+            return Response(
+                {'error': 'The catalog snapshot has not been built yet.'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        prefix = request.build_absolute_uri(get_snapshot_url_prefix())
+
+        def build_response():
+            files = {
+                name: {
+                    'url': prefix + entry['file'],
+                    'size': entry['size'],
+                    'encodings': entry['encodings'],
+                }
+                for name, entry in manifest['files'].items()
+            }
+            return Response({
+                'version': manifest['version'],
+                'generated_at': manifest['generated_at'],
+                'files': files,
+            })
+
+        etag = make_etag('snapshot', prefix, manifest['version'], *sorted(e['file'] for e in manifest['files'].values()))
+        return conditional_response(request, etag, None, build_response)
+
+
+class CatalogSyncView(APIView):
+    """
+    GET /api/products/sync/?changed_since=2026-10-18T09:00:00Z
+
+    Catalog delta for clients keeping a local copy: categories and available
+    products changed since the timestamp, plus tombstones for deleted and
+    hidden ones. Pass the response's `next_changed_since` on the next call.
+    See products/sync.py.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    @swagger_auto_schema(
+        operation_summary="Catalog Changes Since a Timestamp",
+        manual_parameters=[
+            openapi.Parameter(
+                'changed_since', openapi.IN_QUERY, type=openapi.TYPE_STRING, format=openapi.FORMAT_DATETIME,
+                required=True, description="ISO 8601 timestamp (UTC if no offset) from the previous sync"
+            ),
+        ],
+        responses={
+            200: openapi.Response(description="Changed rows and tombstones, or full_sync_required."),
+            400: openapi.Response(description="Missing or invalid changed_since."),
+        }
+    )
+    def get(self, request):
+        from datetime import timezone as dt_timezone
+        from django.utils import timezone
+        from django.utils.dateparse import parse_datetime
+        from .sync import build_delta
+
+        # An unencoded '+hh:mm' offset arrives as a space
+        value = request.query_params.get('changed_since', '').strip().replace(' ', '+')
+        try:
+            changed_since = parse_datetime(value)
+        except ValueError:
+            changed_since = None
+        if changed_since is None:
+            return Response(
+                {'error': 'changed_since must be an ISO 8601 timestamp.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if timezone.is_naive(changed_since):
+            changed_since = timezone.make_aware(changed_since, dt_timezone.utc)
+
+        return Response(build_delta(changed_since, context={'request': request}))
+
+
+class CategoryListView(CatalogCacheMixin, SparseFieldsetViewMixin, generics.ListAPIView):
     """
     GET /api/products/categories/
     """
@@ -214,25 +342,39 @@ class CategoryListView(generics.ListAPIView):
     pagination_class = SmallResultsSetPagination
 
 
-class CategoryDetailView(generics.RetrieveAPIView):
+class CategoryDetailView(ConditionalGetMixin, CatalogCacheMixin, SparseFieldsetViewMixin, generics.RetrieveAPIView):
     """
     GET /api/products/categories/<slug>/
+
+    The payload (category, counts, first products) changes only with the
+    catalog, so the validators come from the category row and the catalog
+    version; an unknown slug gets none (plain 404).
     """
     permission_classes = [permissions.AllowAny]
     queryset = Category.objects.all()
     serializer_class = CategoryDetailSerializer
     lookup_field = 'slug'
 
+    def get_validators(self, request, slug):
+        row = Category.objects.filter(slug=slug).values_list('id', 'updated_at').first()
+        if row is None:
+            return None, None
+        category_id, updated_at = row
+        catalog_modified = get_catalog_last_modified()
+        last_modified = max(updated_at, catalog_modified) if catalog_modified else updated_at
+        return make_etag('category', category_id, updated_at, get_catalog_version()), last_modified
+
 
-class ProductSearchView(generics.ListAPIView):
+class ProductSearchView(SparseFieldsetViewMixin, generics.ListAPIView):
     """
     GET /api/products/search/?search=<query>
 
     NOTE: use ?search= not ?q=
+    Results are ranked by relevance with prefix matching (see products/search.py).
     """
     permission_classes = [permissions.AllowAny]
     serializer_class = ProductSearchSerializer
-    filter_backends = [filters.SearchFilter]
+    filter_backends = [ProductSearchFilter]
     search_fields = ['name', 'description']
     pagination_class = StandardResultsSetPagination
 
@@ -242,19 +384,129 @@ class ProductSearchView(generics.ListAPIView):
         ).select_related('category').order_by('name')
 
 
+class ProductFacetSearchView(ProductListView):
+    """
+    GET /api/products/facets/
+
+    ProductListView results plus counts for every sidebar facet:
+    product_type, category, covering, layers and price_band.
+
+    Accepts the ProductListView query parameters, plus:
+      - covering:   e.g. ?covering=fondant
+      - layers:     e.g. ?layers=2
+      - price_band: one of products.facets.PRICE_BANDS (e.g. ?price_band=10000-25000)
+
+    Facet counts come from one grouped query over the filtered products and
+    are cached per filter combination, so paging reuses them.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        params = self.request.query_params
+
+        covering = params.get('covering')
+        if covering:
+            queryset = queryset.filter(covering=covering)
+
+        layers = params.get('layers')
+        if layers and layers.isdigit():
+            queryset = queryset.filter(layers=int(layers))
+
+        price_band = params.get('price_band')
+        if price_band:
+            queryset = filter_price_band(queryset, price_band)
+
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        facets = get_facets(request, queryset)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            response = self.get_paginated_response(self.get_serializer(page, many=True).data)
+        else:
+            response = Response({'results': self.get_serializer(queryset, many=True).data})
+        response.data['facets'] = facets
+        return response
+
+
+class ProductAutocompleteView(APIView):
+    """
+    GET /api/products/autocomplete/?q=<prefix>&limit=8
+
+    Typeahead suggestions (products and categories) from the in-process
+    prefix index in products/autocomplete.py; no database query once the
+    index is built.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    @swagger_auto_schema(
+        operation_summary="Autocomplete Product and Category Names",
+        manual_parameters=[
+            openapi.Parameter('q', openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Prefix typed so far"),
+            openapi.Parameter('limit', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description="Max suggestions (default 8, max 20)"),
+        ],
+        responses={200: openapi.Response(description="Ranked suggestions.")}
+    )
+    def get(self, request):
+        from .autocomplete import DEFAULT_LIMIT, MAX_LIMIT, autocomplete_index
+
+        query = request.query_params.get('q', '').strip()
+        limit = request.query_params.get('limit', '')
+        limit = min(int(limit), MAX_LIMIT) if limit.isdigit() and int(limit) > 0 else DEFAULT_LIMIT
+
+        return Response({'query': query, 'results': autocomplete_index.search(query, limit)})
+
+
 class ProductCountByTypeView(APIView):
     """
     GET /api/products/counts/
+
+    Available product counts by type, overall and per category, built from
+    one grouped aggregate over (product_type, category) and cached until the
+    catalog version changes.
     """
     permission_classes = [permissions.AllowAny]
 
     def get(self, request):
-        cake_count   = Product.objects.filter(product_type='cake',   available=True).count()
-        pastry_count = Product.objects.filter(product_type='pastry', available=True).count()
+        return cached_catalog_response(request, self._build_response)
+
+    def _build_response(self):
+        rows = (
+            Product.objects.filter(available=True)
+            .values('product_type', 'category_id', 'category__name', 'category__slug')
+            .annotate(total=Count('id'))
+            .order_by()
+        )
+
+        totals = {'cake': 0, 'pastry': 0}
+        categories = {}
+        for row in rows:
+            product_type = row['product_type']
+            totals[product_type] = totals.get(product_type, 0) + row['total']
+
+            if row['category_id'] is None:
+                continue
+            entry = categories.setdefault(row['category_id'], {
+                'id': row['category_id'],
+                'name': row['category__name'],
+                'slug': row['category__slug'],
+                'cakes': 0,
+                'pastries': 0,
+                'total': 0,
+            })
+            if product_type == 'cake':
+                entry['cakes'] += row['total']
+            elif product_type == 'pastry':
+                entry['pastries'] += row['total']
+            entry['total'] += row['total']
+
         return Response({
-            'cakes':   cake_count,
-            'pastries': pastry_count,
-            'total':   cake_count + pastry_count
+            'cakes':   totals['cake'],
+            'pastries': totals['pastry'],
+            'total':   sum(totals.values()),
+            'categories': sorted(categories.values(), key=lambda c: c['name']),
         })
 
 
@@ -300,6 +552,56 @@ class ProductUpdateView(generics.UpdateAPIView):
         return Response({'message': 'Product updated successfully.', 'product': serializer.data})
 
 
+class ProductBatchUpdateView(APIView):
+    """
+    POST /api/products/batch-update/
+
+    Apply many product changes at once:
+        {"operations": [{"slug": "...", "category": "...", "changes": {"price": "25.00"}}, ...]}
+
+    Every operation is validated first; if any fails nothing is written,
+    the per-item results carry the errors and the valid operations are
+    marked "not_applied". Otherwise all changes are saved
+    in one transaction with a single bulk_update and one catalog version bump.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    @swagger_auto_schema(
+        operation_summary="Batch Update Products",
+        request_body=ProductBatchUpdateSerializer,
+        responses={
+            200: openapi.Response(description="All operations applied; per-item results."),
+            400: openapi.Response(description="Invalid operations; nothing was applied."),
+            409: openapi.Response(description="Conflicting product slugs; nothing was applied."),
+        }
+    )
+    def post(self, request):
+        from .bulk import batch_update_products
+
+        serializer = ProductBatchUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            results, applied = batch_update_products(
+                serializer.validated_data['operations'],
+                context={'request': request},
+            )
+        except IntegrityError:
+            return Response(
+                {'error': 'The changes would give two products in a category the same slug.'},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        if not applied:
+            return Response(
+                {'error': 'Some operations are invalid. No changes were applied.', 'results': results},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        updated = sum(1 for result in results if result['status'] == 'updated')
+        return Response({'message': f'{updated} products updated.', 'results': results})
+
+
 class ProductDeleteView(generics.DestroyAPIView):
     """
     DELETE /api/products/<slug>/delete/